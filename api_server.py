@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+海绵宝宝影视 无界面JSON解析服务
+与Streamlit界面共用 EnhancedVIPParser 解析核心，提供轻量HTTP接口：
+
+    GET  /healthz                健康检查
+    GET  /platforms              支持的平台列表
+    GET  /parse?url=...          解析单个视频（可加 &fields=url_id,platform 只取部分字段，&timings=1 附带分阶段耗时，
+                                 &profile=1 剖析本次解析并返回剖析文件路径）
+    POST /parse                  {"url": "..."}
+    POST /parse/batch            {"urls": ["...", "..."]}
+    GET  /series?url=...         解析剧集列表（一次请求获取全部分集）
+    GET  /timings                按平台和阶段汇总的耗时直方图（多进程模式下为当前工作进程的数据）
+    GET  /metrics                Prometheus文本格式的指标（多进程模式下为当前工作进程的数据）
+    GET  /warmup                 启动预热的进度（多进程模式下为当前工作进程的数据）
+    GET  /snapshot               以快照格式流式导出结果缓存（cache_snapshot.py，多进程模式下为当前工作进程的缓存）
+
+工作线程池有上限，排队已满时直接返回 429，由调用方退避重试。
+--warmup 指定预热清单（或设置 VIDEO_PARSE_HISTORY 从解析记录中取热门链接）时，
+每个工作进程启动后在后台预热自己的结果缓存，不影响就绪。
+
+多进程时默认所有工作进程共用一个监听套接字，由内核分配连接，同一个视频的请求落在不同进程上，
+各自的进程内缓存互相不命中。--dispatch hash 时由前端分发进程监听端口，每个工作进程监听自己的本地端口：
+
+    /parse、/series             按 (平台, 视频ID) 的一致性哈希（hash_ring.py）转发到固定的工作进程，
+                                目标进程正在处理的请求数达到其线程数时改发给最空闲的进程
+    /parse/batch                按归属拆分成几个子批次并发转发，结果按输入顺序合并
+    其他接口                    转发给最空闲的工作进程；/metrics 返回分发进程自己的指标
+    GET /workers                各工作进程的端口、是否可用、正在处理和累计转发的请求数
+
+请求头 X-Video-Worker: worker-N 指定由哪个工作进程处理（如分别抓取各工作进程的 /metrics），
+响应头 X-Video-Worker 给出实际处理的工作进程。工作进程退出后从哈希环上移除，只有它的键改投其他进程。
+预热时每个工作进程只预热归属自己的链接。--dispatch least-loaded 不看缓存键，总是发给最空闲的进程。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from enhanced_parser import EnhancedVIPParser
+import events
+from hash_ring import HashRing
+import metrics
+import platforms
+from profiling import ProfileSession
+from timings import get_histograms
+import cache_snapshot
+import warmup
+
+# 单次批量解析允许的最大链接数
+MAX_BATCH_SIZE = 100
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = 1024 * 1024
+# 分发模式下转发到工作进程的超时（秒）
+FORWARD_TIMEOUT = 60
+# 分发模式下指定/给出处理请求的工作进程的请求头和响应头
+WORKER_HEADER = 'X-Video-Worker'
+DISPATCH_POLICIES = ('hash', 'least-loaded')
+
+# 按接口统计时使用的路径，其余路径归为 other，避免标签数量失控
+KNOWN_PATHS = frozenset((
+    '/healthz', '/platforms', '/parse', '/parse/batch', '/series', '/timings', '/metrics', '/patterns',
+    '/warmup', '/workers', '/snapshot'
+))
+
+API_REQUESTS = metrics.REGISTRY.counter('video_api_requests_total', '解析服务处理的请求数', ('path', 'status'))
+API_IN_FLIGHT = metrics.REGISTRY.gauge('video_api_requests_in_flight', '解析服务正在处理的请求数')
+API_REJECTED = metrics.REGISTRY.counter('video_api_rejected_total', '服务饱和时直接返回429的请求数')
+DISPATCH_REQUESTS = metrics.REGISTRY.counter('video_dispatch_requests_total', '分发进程转发到各工作进程的请求数',
+                                             ('worker', 'route'))
+DISPATCH_IN_FLIGHT = metrics.REGISTRY.gauge('video_dispatch_in_flight', '分发进程转发到各工作进程、尚未返回的请求数',
+                                            ('worker',))
+
+_log = events.get_logger('api_server')
+
+
+class ParseRequestHandler(BaseHTTPRequestHandler):
+    """解析接口请求处理器"""
+
+    server_version = 'SpongeBobParser/1.0'
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+
+        if parsed.path == '/healthz':
+            self._send_json(200, {'status': 'ok', 'pid': os.getpid()})
+        elif parsed.path == '/platforms':
+            self._send_json(200, {'platforms': self.server.get_platforms()})
+        elif parsed.path == '/parse':
+            params = parse_qs(parsed.query)
+            url = params.get('url', [''])[0]
+            fields = params.get('fields', [''])[0]
+            timings = params.get('timings', [''])[0] in ('1', 'true')
+            profile = params.get('profile', [''])[0] in ('1', 'true')
+            self._handle_parse(url, fields.split(',') if fields else None, timings or None, profile or None)
+        elif parsed.path == '/series':
+            params = parse_qs(parsed.query)
+            url = params.get('url', [''])[0]
+            self._handle_series(url)
+        elif parsed.path == '/timings':
+            self._send_json(200, get_histograms().snapshot())
+        elif parsed.path == '/metrics':
+            self._send_body(200, metrics.REGISTRY.render().encode('utf-8'), metrics.CONTENT_TYPE)
+        elif parsed.path == '/patterns':
+            self._send_json(200, platforms.pattern_stats())
+        elif parsed.path == '/warmup':
+            warmer = self.server.warmer
+            self._send_json(200, warmer.stats() if warmer is not None else {'running': False, 'total': 0})
+        elif parsed.path == '/snapshot':
+            self._send_snapshot()
+        else:
+            self._send_json(404, {'success': False, 'error': f'未知接口: {parsed.path}'})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+
+        if parsed.path not in ('/parse', '/parse/batch'):
+            self._send_json(404, {'success': False, 'error': f'未知接口: {parsed.path}'})
+            return
+
+        body = self._read_json_body()
+        if body is None:
+            return
+
+        fields = body.get('fields')
+        if fields is not None and not isinstance(fields, list):
+            self._send_json(400, {'success': False, 'error': 'fields必须是列表'})
+            return
+
+        timings = True if body.get('timings') else None
+        profile = True if body.get('profile') else None
+        if parsed.path == '/parse':
+            self._handle_parse(body.get('url', ''), fields, timings, profile)
+        else:
+            self._handle_batch(body.get('urls'), fields, timings, profile)
+
+    def _handle_parse(self, url: str, fields: Optional[List[str]] = None,
+                      timings: Optional[bool] = None, profile: Optional[bool] = None):
+        """处理单个解析请求"""
+        if not url:
+            self._send_json(400, {'success': False, 'error': '缺少url参数'})
+            return
+
+        result = self.server.parse(url, fields, timings, profile)
+        self._send_json(200, result)
+
+    def _handle_series(self, url: str):
+        """处理剧集解析请求"""
+        if not url:
+            self._send_json(400, {'success': False, 'error': '缺少url参数'})
+            return
+
+        self._send_json(200, self.server.parse_series(url))
+
+    def _handle_batch(self, urls: Any, fields: Optional[List[str]] = None,
+                      timings: Optional[bool] = None, profile: Optional[bool] = None):
+        """处理批量解析请求"""
+        if not isinstance(urls, list) or not urls:
+            self._send_json(400, {'success': False, 'error': 'urls必须是非空列表'})
+            return
+
+        if len(urls) > MAX_BATCH_SIZE:
+            self._send_json(413, {
+                'success': False,
+                'error': f'单次最多解析 {MAX_BATCH_SIZE} 个链接'
+            })
+            return
+
+        urls = [str(url) for url in urls]
+        if not profile:
+            results = self.server.parse_batch(urls, fields, timings)
+            self._send_json(200, {'success': True, 'results': results})
+            return
+
+        # 整批解析合并为一份剖析
+        with ProfileSession('api-batch') as session:
+            results = self.server.parse_batch(urls, fields, timings, session)
+        self._send_json(200, {'success': True, 'results': results, 'profile': session.write()})
+
+    def _send_snapshot(self):
+        """流式导出本进程的结果缓存（不带 Content-Length，写完后关闭连接）"""
+        items = self.server.get_parser().cache.items()
+        self.send_response(200)
+        self.send_header('Content-Type', cache_snapshot.CONTENT_TYPE)
+        self.send_header('X-Snapshot-Entries', str(len(items)))
+        self.end_headers()
+        self.close_connection = True
+        cache_snapshot.write_snapshot(items, self.wfile)
+        API_REQUESTS.labels('/snapshot', '200').inc()
+
+    def _read_json_body(self) -> Optional[Dict[str, Any]]:
+        """读取并解析JSON请求体，失败时直接返回错误响应"""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+
+        if length < 0 or length > MAX_BODY_SIZE:
+            self._send_json(413, {'success': False, 'error': '请求体过大或长度无效'})
+            return None
+
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'success': False, 'error': '请求体不是有效的JSON'})
+            return None
+
+        if not isinstance(body, dict):
+            self._send_json(400, {'success': False, 'error': '请求体必须是JSON对象'})
+            return None
+
+        return body
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        """发送JSON响应"""
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send_body(status, data, 'application/json; charset=utf-8')
+
+    def _send_body(self, status: int, data: bytes, content_type: str,
+                   headers: Optional[Dict[str, str]] = None):
+        """发送响应并记入请求指标"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+        path = urlparse(self.path).path
+        API_REQUESTS.labels(path if path in KNOWN_PATHS else 'other', str(status)).inc()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ParseAPIServer(HTTPServer):
+    """带有界工作线程池和背压控制的解析服务"""
+
+    handler_class = ParseRequestHandler
+
+    def __init__(self, server_address, threads: int = 16, queue_size: int = 64,
+                 verbose: bool = False, bind_and_activate: bool = True):
+        super().__init__(server_address, self.handler_class, bind_and_activate)
+        self.threads = threads
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='api-worker')
+        self.batch_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='api-batch')
+        # 正在处理和排队中的请求总数上限，超出后返回429
+        self.slots = threading.BoundedSemaphore(threads + queue_size)
+        self._local = threading.local()
+        self.warmer = None
+
+    def get_parser(self) -> EnhancedVIPParser:
+        """每个工作线程持有独立的解析器，复用各自的连接池"""
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            parser = EnhancedVIPParser()
+            self._local.parser = parser
+        return parser
+
+    def start_warmup(self, manifest: Optional[str] = None, rate: Optional[float] = None,
+                     select: Optional[Callable[[str], bool]] = None):
+        """在后台预热结果缓存，有请求正在处理时预热先让出；select 指定时只预热它接受的链接"""
+        self.warmer = warmup.start_warmup(manifest=manifest, rate=rate, busy=lambda: API_IN_FLIGHT.get() > 0,
+                                          select=select)
+
+    def get_platforms(self) -> List[Dict[str, str]]:
+        """获取支持的平台列表"""
+        return [{'key': platform.key, 'name': platform.name} for platform in platforms.registry()]
+
+    def parse(self, url: str, fields: Optional[List[str]] = None,
+              timings: Optional[bool] = None, profile: Optional[bool] = None) -> Dict[str, Any]:
+        """解析单个视频，timings/profile为None时按全局设置决定是否附带分阶段耗时、是否剖析"""
+        try:
+            parser = self.get_parser()
+            result = parser.parse_video(url, fields=fields, timings=timings, profile=profile)
+            warmup.record_parse(parser, url, result)
+            return result
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'解析失败: {str(e)}'
+            }
+
+    def parse_series(self, url: str) -> Dict[str, Any]:
+        """解析剧集列表"""
+        try:
+            return self.get_parser().parse_series(url)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'剧集解析失败: {str(e)}'
+            }
+
+    def parse_batch(self, urls: List[str], fields: Optional[List[str]] = None,
+                    timings: Optional[bool] = None,
+                    session: Optional[ProfileSession] = None) -> List[Dict[str, Any]]:
+        """并发解析多个视频，结果顺序与输入一致；传入session时在其剖析器下解析"""
+        if session is None:
+            results = list(self.batch_pool.map(lambda url: self.parse(url, fields, timings), urls))
+        else:
+            results = list(self.batch_pool.map(
+                lambda url: session.call(self.parse, url, fields, timings), urls))
+        for url, result in zip(urls, results):
+            result.setdefault('url', url)
+        return results
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self._reject_busy(request)
+            return
+        self.pool.submit(self._process_request_in_pool, request, client_address)
+
+    def _process_request_in_pool(self, request, client_address):
+        API_IN_FLIGHT.inc()
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+            API_IN_FLIGHT.dec()
+
+    def _reject_busy(self, request):
+        """服务已饱和，直接返回429"""
+        API_REJECTED.inc()
+        body = json.dumps({'success': False, 'error': '服务繁忙，请稍后重试'},
+                          ensure_ascii=False).encode('utf-8')
+        head = (
+            'HTTP/1.0 429 Too Many Requests\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            'Retry-After: 1\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('ascii')
+        try:
+            request.sendall(head + body)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+        self.batch_pool.shutdown(wait=False)
+
+
+class RoutingRequestHandler(ParseRequestHandler):
+    """分发进程的请求处理器：按缓存键把请求转发到工作进程"""
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+
+        if parsed.path == '/workers':
+            self._send_json(200, self.server.worker_stats())
+        elif parsed.path == '/metrics' and not self.headers.get(WORKER_HEADER):
+            self._send_body(200, metrics.REGISTRY.render().encode('utf-8'), metrics.CONTENT_TYPE)
+        else:
+            url = parse_qs(parsed.query).get('url', [''])[0]
+            self._forward(self.server.route_key(parsed.path, url))
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        body = self._read_json_body()
+        if body is None:
+            return
+
+        if (parsed.path == '/parse/batch' and self.server.policy == 'hash'
+                and not self.headers.get(WORKER_HEADER) and not body.get('profile')):
+            self._forward_batch(body)
+        else:
+            self._forward(self.server.route_key(parsed.path, str(body.get('url', ''))), body)
+
+    def _forward(self, key: Optional[str], body: Optional[Dict[str, Any]] = None):
+        """转发当前请求，把工作进程的响应原样返回"""
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+        status, content_type, headers, payload = self.server.forward(
+            self.command, self.path, data, key, self.headers.get(WORKER_HEADER))
+        self._send_body(status, payload, content_type, headers)
+
+    def _forward_batch(self, body: Dict[str, Any]):
+        """按归属把批量请求拆成子批次并发转发，结果按输入顺序合并"""
+        urls = body.get('urls')
+        if not isinstance(urls, list) or not urls or len(urls) > MAX_BATCH_SIZE:
+            # 由工作进程返回参数错误
+            self._forward(None, body)
+            return
+
+        groups = {}
+        for index, url in enumerate(urls):
+            key = self.server.route_key('/parse', str(url))
+            owner = self.server.ring.get(key) if key else None
+            group = groups.setdefault(owner, {'key': key, 'indexes': []})
+            group['indexes'].append(index)
+
+        def send(group):
+            sub = dict(body, urls=[urls[index] for index in group['indexes']])
+            return self.server.forward('POST', '/parse/batch', json.dumps(sub, ensure_ascii=False).encode('utf-8'),
+                                       group['key'])
+
+        results = [None] * len(urls)
+        for group, (status, _, _, payload) in zip(groups.values(), self.server.batch_pool.map(send, groups.values())):
+            try:
+                sub_results = json.loads(payload)['results'] if status == 200 else None
+            except (ValueError, KeyError):
+                sub_results = None
+            for position, index in enumerate(group['indexes']):
+                results[index] = sub_results[position] if sub_results else {
+                    'success': False, 'error': f'工作进程返回 {status}', 'url': str(urls[index])}
+        self._send_json(200, {'success': True, 'results': results})
+
+
+class WorkerEndpoint:
+    """分发模式下的一个工作进程"""
+
+    __slots__ = ('name', 'port', 'pid', 'up', 'in_flight', 'requests', 'fallbacks')
+
+    def __init__(self, name: str, port: int, pid: Optional[int] = None):
+        self.name = name
+        self.port = port
+        self.pid = pid
+        self.up = True
+        self.in_flight = 0
+        self.requests = 0
+        # 目标进程饱和、改由本进程处理的请求数
+        self.fallbacks = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def route_key(path: str, url: str) -> Optional[str]:
+    """请求的路由键：/parse 为 平台:视频ID（多P视频的各P归同一个工作进程），/series 为 series:平台:剧集ID，
+    其他请求没有路由键；只解析URL，分发进程不创建解析器和缓存"""
+    if not url or path not in ('/parse', '/series'):
+        return None
+    platform = platforms.detect(url)
+    if platform is None:
+        return None
+    if path == '/series':
+        series_id = platforms.series_id(platform.key, url)
+        return f'series:{platform.key}:{series_id}' if series_id else None
+    vid = platforms.extract_id(platform.key, url)
+    return f'{platform.key}:{vid}' if vid else None
+
+
+def owned_by(ring: HashRing, name: str) -> Callable[[str], bool]:
+    """链接按 /parse 分发时是否归属工作进程 name（与 RoutingServer 使用同一个路由键），用于预热时选择链接"""
+    def owns(url: str) -> bool:
+        key = route_key('/parse', url)
+        return key is not None and ring.get(key) == name
+    return owns
+
+
+class RoutingServer(ParseAPIServer):
+    """前端分发进程：按缓存键的一致性哈希把请求转发到固定的工作进程，目标饱和时改发给最空闲的进程"""
+
+    handler_class = RoutingRequestHandler
+
+    def __init__(self, server_address, ring: HashRing, workers: List[WorkerEndpoint], policy: str = 'hash',
+                 capacity: int = 16, threads: int = 64, queue_size: int = 256, verbose: bool = False,
+                 bind_and_activate: bool = True):
+        super().__init__(server_address, threads=threads, queue_size=queue_size, verbose=verbose,
+                         bind_and_activate=bind_and_activate)
+        self.ring = ring
+        self.workers = {worker.name: worker for worker in workers}
+        self.policy = policy
+        # 工作进程正在处理的请求数达到这个值时视为饱和（工作进程的线程数）
+        self.capacity = capacity
+        self._dispatch_lock = threading.Lock()
+        for worker in workers:
+            DISPATCH_IN_FLIGHT.labels(worker.name).set_function(lambda worker=worker: worker.in_flight)
+
+    def route_key(self, path: str, url: str) -> Optional[str]:
+        """请求的路由键（见模块函数 route_key）"""
+        return route_key(path, url)
+
+    def choose(self, key: Optional[str], pinned: Optional[str] = None) -> Tuple[Optional[WorkerEndpoint], str]:
+        """选择工作进程并计入正在处理的请求数，返回 (工作进程, 路由方式)，没有可用的工作进程时返回 (None, ...)"""
+        owner = self.ring.get(key) if key is not None and self.policy == 'hash' else None
+        with self._dispatch_lock:
+            if pinned:
+                worker = self.workers.get(pinned)
+                route = 'pinned'
+                if worker is not None and not worker.up:
+                    worker = None
+            elif owner is not None and self.workers[owner].up:
+                worker = self.workers[owner]
+                route = 'hash'
+                if worker.in_flight >= self.capacity:
+                    least = self._least_loaded()
+                    if least is not None and least.in_flight < worker.in_flight:
+                        worker = least
+                        route = 'fallback'
+                        worker.fallbacks += 1
+            else:
+                worker = self._least_loaded()
+                route = 'least_loaded'
+            if worker is not None:
+                worker.in_flight += 1
+                worker.requests += 1
+        if worker is not None:
+            DISPATCH_REQUESTS.labels(worker.name, route).inc()
+        return worker, route
+
+    def _least_loaded(self) -> Optional[WorkerEndpoint]:
+        available = [worker for worker in self.workers.values() if worker.up]
+        if not available:
+            return None
+        return min(available, key=lambda worker: (worker.in_flight, worker.requests))
+
+    def forward(self, method: str, path: str, body: Optional[bytes], key: Optional[str],
+                pinned: Optional[str] = None) -> Tuple[int, str, Dict[str, str], bytes]:
+        """转发请求，返回 (状态码, Content-Type, 需要带回的响应头, 响应体)；
+        工作进程已退出时把它移出哈希环，改发给键的新归属进程"""
+        while True:
+            worker, route = self.choose(key, pinned)
+            if worker is None:
+                if pinned:
+                    return self._error(502, f'工作进程 {pinned} 不可用')
+                return self._error(503, '没有可用的工作进程')
+            try:
+                return self._send(worker, method, path, body)
+            except ConnectionRefusedError as e:
+                # 工作进程已退出（监听套接字已关闭）
+                self._mark_down(worker, e)
+                if pinned:
+                    return self._error(502, f'工作进程 {worker.name} 不可用')
+            except socket.timeout:
+                return self._error(504, f'工作进程 {worker.name} 处理超时')
+            except OSError as e:
+                return self._error(502, f'转发到工作进程 {worker.name} 失败: {e}')
+            finally:
+                with self._dispatch_lock:
+                    worker.in_flight -= 1
+
+    @staticmethod
+    def _send(worker: WorkerEndpoint, method: str, path: str,
+              body: Optional[bytes]) -> Tuple[int, str, Dict[str, str], bytes]:
+        connection = http.client.HTTPConnection('127.0.0.1', worker.port, timeout=FORWARD_TIMEOUT)
+        try:
+            headers = {'Content-Type': 'application/json; charset=utf-8'} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+            extra = {WORKER_HEADER: worker.name}
+            if response.getheader('Retry-After'):
+                extra['Retry-After'] = response.getheader('Retry-After')
+            return response.status, response.getheader('Content-Type', 'application/octet-stream'), extra, payload
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, str, Dict[str, str], bytes]:
+        payload = json.dumps({'success': False, 'error': message}, ensure_ascii=False).encode('utf-8')
+        return status, 'application/json; charset=utf-8', {}, payload
+
+    def _mark_down(self, worker: WorkerEndpoint, error: Exception):
+        with self._dispatch_lock:
+            if not worker.up:
+                return
+            worker.up = False
+        self.ring.remove(worker.name)
+        _log.warning('worker_down', worker=worker.name, pid=worker.pid, error=str(error))
+
+    def worker_stats(self) -> Dict[str, Any]:
+        """各工作进程的转发统计"""
+        return {
+            'policy': self.policy,
+            'replicas': self.ring.replicas,
+            'capacity': self.capacity,
+            'workers': [worker.stats() for worker in self.workers.values()]
+        }
+
+
+def _exit_on_signal(signum, frame):
+    raise SystemExit(0)
+
+
+def _fork_worker(server: ParseAPIServer, on_start: Optional[Callable[[], None]] = None) -> int:
+    """fork 一个运行 server 的工作进程，返回其pid；on_start 在工作进程开始服务前调用"""
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, _exit_on_signal)
+        try:
+            if on_start is not None:
+                on_start()
+            server.serve_forever()
+        finally:
+            warmup.flush_history()
+            os._exit(0)
+    return pid
+
+
+def _stop_children(children: List[int]):
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def _wait_children(children: List[int]):
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+
+def run_prefork(server: ParseAPIServer, workers: int, on_start: Optional[Callable[[], None]] = None):
+    """在共享监听套接字上预先fork多个工作进程，on_start 在每个工作进程开始服务前调用"""
+    children = [_fork_worker(server, on_start) for _ in range(workers)]
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: _stop_children(children))
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        _stop_children(children)
+        _wait_children(children)
+
+
+def run_dispatch(server_address, workers: int, policy: str = 'hash', threads: int = 16, queue_size: int = 64,
+                 verbose: bool = False,
+                 on_start: Optional[Callable[[ParseAPIServer, Callable[[str], bool]], None]] = None):
+    """分发模式：每个工作进程监听自己的本地端口，前端分发进程监听 server_address 并转发请求；
+    on_start(工作进程的服务, 链接是否归属该进程) 在每个工作进程开始服务前调用"""
+    names = [f'worker-{index}' for index in range(workers)]
+    ring = HashRing(names)
+    servers = [ParseAPIServer(('127.0.0.1', 0), threads=threads, queue_size=queue_size, verbose=verbose)
+               for _ in names]
+    endpoints = []
+    children = []
+    for name, server in zip(names, servers):
+        def start(name=name, server=server):
+            for other in servers:
+                if other is not server:
+                    other.socket.close()
+            if on_start is not None:
+                on_start(server, owned_by(ring, name))
+
+        children.append(_fork_worker(server, start))
+        endpoints.append(WorkerEndpoint(name, server.server_address[1], children[-1]))
+    # 分发进程不再持有工作进程的监听套接字，工作进程退出后连接立即被拒绝
+    for server in servers:
+        server.server_close()
+
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    dispatcher = None
+    try:
+        dispatcher = RoutingServer(server_address, ring, endpoints, policy=policy, capacity=threads,
+                                   threads=threads * workers, queue_size=queue_size * workers, verbose=verbose)
+        dispatcher.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if dispatcher is not None:
+            dispatcher.server_close()
+        _stop_children(children)
+        _wait_children(children)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = 1,
+          threads: int = 16, queue_size: int = 64, verbose: bool = False,
+          warmup_manifest: Optional[str] = None, warmup_rate: Optional[float] = None,
+          dispatch: Optional[str] = None):
+    """启动解析服务，dispatch 为 hash/least-loaded 时多个工作进程前面加一个分发进程"""
+    if workers > 1 and not hasattr(os, 'fork'):
+        print('⚠️ 当前系统不支持fork，改为单进程运行')
+        workers = 1
+
+    # 每个工作进程各自预热自己的缓存，总的源站请求速率保持不变
+    if warmup_rate is None:
+        warmup_rate = float(os.environ.get('VIDEO_WARMUP_RATE', '2'))
+
+    if dispatch and workers > 1:
+        print(f'🚀 解析服务已启动: http://{host}:{port} '
+              f'(进程数: {workers}, 每进程线程数: {threads}, 分发: {dispatch})')
+
+        def start_worker(worker: ParseAPIServer, owns: Callable[[str], bool]):
+            # 按一致性哈希分发时只预热归属自己的链接，其余的由对应的工作进程预热
+            worker.start_warmup(warmup_manifest, warmup_rate / workers, owns if dispatch == 'hash' else None)
+
+        run_dispatch((host, port), workers, dispatch, threads, queue_size, verbose, on_start=start_worker)
+        return
+
+    server = ParseAPIServer((host, port), threads=threads,
+                            queue_size=queue_size, verbose=verbose)
+
+    print(f'🚀 解析服务已启动: http://{host}:{port} '
+          f'(进程数: {workers}, 每进程线程数: {threads})')
+
+    def start_warmup():
+        server.start_warmup(warmup_manifest, warmup_rate / workers)
+
+    try:
+        if workers > 1:
+            run_prefork(server, workers, on_start=start_warmup)
+        else:
+            signal.signal(signal.SIGTERM, _exit_on_signal)
+            start_warmup()
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='海绵宝宝影视 无界面JSON解析服务')
+    arg_parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    arg_parser.add_argument('--port', type=int, default=8000, help='监听端口')
+    arg_parser.add_argument('--workers', type=int, default=1, help='预fork的工作进程数')
+    arg_parser.add_argument('--threads', type=int, default=16, help='每个进程的工作线程数')
+    arg_parser.add_argument('--queue-size', type=int, default=64, help='排队请求上限，超出返回429')
+    arg_parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+    arg_parser.add_argument('--warmup', help='预热清单（每行一个链接），默认取环境变量 VIDEO_WARMUP_MANIFEST')
+    arg_parser.add_argument('--warmup-rate', type=float, help='预热时每秒最多解析的链接数（所有工作进程合计）')
+    arg_parser.add_argument('--dispatch', choices=DISPATCH_POLICIES,
+                            help='多进程时由分发进程转发请求：hash 按视频一致性哈希，least-loaded 发给最空闲的进程'
+                                 '（默认共用监听套接字，由内核分配）')
+    args = arg_parser.parse_args(argv)
+
+    serve(args.host, args.port, workers=max(1, args.workers), threads=max(1, args.threads),
+          queue_size=max(0, args.queue_size), verbose=args.verbose,
+          warmup_manifest=args.warmup, warmup_rate=args.warmup_rate, dispatch=args.dispatch)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,9 @@
 import streamlit as st
-import requests
-import re
-import json
-from urllib.parse import urlparse, parse_qs
-import base64
-from typing import Optional, Dict, Any
+import os
 from enhanced_parser import EnhancedVIPParser
+from prefetch import EpisodePrefetcher
+import warmup
+import metrics
 
 # 页面配置
 st.set_page_config(
@@ -138,6 +136,24 @@ st.markdown("""
 
 # VideoParser类已移到video_parser.py模块中
 
+@st.cache_resource
+def get_prefetcher() -> EpisodePrefetcher:
+    """进程内共享的下一集预取器"""
+    return EpisodePrefetcher(enabled=False)
+
+@st.cache_resource
+def start_warmup():
+    """设置了预热清单或解析记录时，在后台预热结果缓存（每个进程只启动一次）"""
+    return warmup.start_warmup()
+
+@st.cache_resource
+def start_metrics_server():
+    """设置了 VIDEO_METRICS_PORT 时，在独立端口上导出Prometheus指标（每个进程只启动一次）"""
+    port = os.environ.get('VIDEO_METRICS_PORT')
+    if not port:
+        return None
+    return metrics.start_http_server(int(port))
+
 def main():
     """主函数"""
     
@@ -159,6 +175,9 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    start_metrics_server()
+    start_warmup()
+    
     # 创建强化版解析器实例
     parser = EnhancedVIPParser()
     
@@ -236,6 +255,22 @@ def main():
         
         st.markdown("---")
         
+        # 下一集预取
+        st.header("下一集预取")
+        prefetch_enabled = st.checkbox(
+            "解析后预取后续剧集",
+            value=os.environ.get('VIDEO_PREFETCH') == '1',
+            help="解析成功后在后台预取接下来几集的信息，看下一集时无需等待"
+        )
+        if prefetch_enabled:
+            prefetch_stats = get_prefetcher().get_stats()
+            st.caption(
+                f"已预取 {prefetch_stats['fetched'] + prefetch_stats['already_cached']} 集，"
+                f"命中 {prefetch_stats['hits']} 次"
+            )
+        
+        st.markdown("---")
+        
         # 使用提示
         st.header("使用小贴士")
         st.markdown("""
@@ -282,6 +317,8 @@ def main():
                             st.info("正在解析视频信息...")
                             # 解析视频信息
                             result = parser.parse_video(video_url)
+                            get_prefetcher().on_parsed(video_url, result, prefetch=prefetch_enabled)
+                            warmup.record_parse(parser, video_url, result)
                         else:
                             st.error("不支持的视频平台，请检查链接格式")
                             return
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量视频解析命令行工具
+从文件或标准输入读取链接，并发解析，每完成一个就输出一行NDJSON记录
+
+用法:
+    python -m batch_parse urls.txt --workers 32 > results.ndjson
+    cat urls.txt | python -m batch_parse --ordered
+    python -m batch_parse urls.txt --fields url_id,platform # 只做去重，不请求网络
+    python -m batch_parse urls.txt --timings                # 每条记录附带分阶段耗时，汇总各平台各阶段平均耗时
+    python -m batch_parse urls.txt --profile                # 整批解析合并剖析，写入 profiles/ 目录
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, List, Iterable, Iterator, TextIO, Tuple
+
+import timings
+from profiling import ProfileSession
+from enhanced_parser import EnhancedVIPParser
+
+_local = threading.local()
+
+
+def get_parser() -> EnhancedVIPParser:
+    """每个工作线程持有独立的解析器，复用各自的连接池"""
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = EnhancedVIPParser()
+        _local.parser = parser
+    return parser
+
+
+def read_urls(stream: TextIO) -> Iterator[str]:
+    """逐行读取链接，跳过空行和#开头的注释"""
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url
+
+
+def parse_one(index: int, url: str,
+              fields: Optional[List[str]] = None) -> Tuple[int, Dict[str, Any]]:
+    """解析单个链接，异常也转换为失败记录"""
+    start = time.perf_counter()
+    try:
+        result = get_parser().parse_video(url, fields=fields)
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': f'解析失败: {str(e)}'
+        }
+
+    record = {'url': url}
+    record.update(result)
+    record['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return index, record
+
+
+def run_batch(urls: Iterable[str], out: TextIO, workers: int = 8,
+              ordered: bool = False, fields: Optional[List[str]] = None,
+              profile_session: Optional[ProfileSession] = None) -> Dict[str, Any]:
+    """并发解析并流式输出NDJSON，返回汇总信息；指定fields时只输出这些字段，传入profile_session时在其剖析器下解析"""
+    summary = {'total': 0, 'success': 0, 'failed': 0, 'errors': {}}
+    # 同时在途的任务数有上限，避免一次性读入数万个链接
+    max_in_flight = workers * 4
+    pending = set()
+    buffered = {}
+    next_index = 0
+    start = time.perf_counter()
+
+    def emit(record: Dict[str, Any]):
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+        summary['total'] += 1
+        if record.get('success'):
+            summary['success'] += 1
+        else:
+            summary['failed'] += 1
+            error = str(record.get('error', '未知错误')).split(':')[0]
+            summary['errors'][error] = summary['errors'].get(error, 0) + 1
+
+    def collect(done):
+        nonlocal next_index
+        for future in done:
+            index, record = future.result()
+            if not ordered:
+                emit(record)
+                continue
+            buffered[index] = record
+            while next_index in buffered:
+                emit(buffered.pop(next_index))
+                next_index += 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+        for index, url in enumerate(urls):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            if profile_session is None:
+                pending.add(pool.submit(parse_one, index, url, fields))
+            else:
+                pending.add(pool.submit(profile_session.call, parse_one, index, url, fields))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    elapsed = time.perf_counter() - start
+    summary['elapsed_s'] = round(elapsed, 3)
+    summary['urls_per_s'] = round(summary['total'] / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
+
+
+def print_summary(summary: Dict[str, Any], stream: TextIO = sys.stderr):
+    """输出批量解析汇总"""
+    print("=" * 50, file=stream)
+    print(f"📊 总计: {summary['total']}  ✅ 成功: {summary['success']}  ❌ 失败: {summary['failed']}",
+          file=stream)
+    print(f"⏱️ 耗时: {summary['elapsed_s']}s  🚀 吞吐: {summary['urls_per_s']} 个/秒", file=stream)
+    for error, count in sorted(summary['errors'].items(), key=lambda item: -item[1]):
+        print(f"   {count:>6}  {error}", file=stream)
+    for platform, data in summary.get('timings', {}).items():
+        stages = data['stages']
+        detail = '  '.join(f"{stage} {stages[stage]['mean_ms']}ms" for stage in timings.STAGES)
+        print(f"   {platform}: 平均 {stages['total']['mean_ms']}ms  ({detail})", file=stream)
+    for kind, path in summary.get('profile', {}).items():
+        print(f"🔬 剖析 {kind}: {path}", file=stream)
+    print("=" * 50, file=stream)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='批量视频解析，输出NDJSON')
+    arg_parser.add_argument('input', nargs='?', default='-',
+                            help='链接文件，每行一个；省略或为 - 时读取标准输入')
+    arg_parser.add_argument('-o', '--output', default='-', help='输出文件，默认标准输出')
+    arg_parser.add_argument('-w', '--workers', type=int, default=8, help='并发解析线程数')
+    arg_parser.add_argument('--ordered', action='store_true', help='按输入顺序输出结果')
+    arg_parser.add_argument('--fields',
+                            help='只输出指定字段（逗号分隔），如 url_id,platform；'
+                                 '全部能从URL得到时不会请求网络')
+    arg_parser.add_argument('--timings', action='store_true',
+                            help='每条记录附带分阶段耗时（timings字段），汇总中输出各平台各阶段平均耗时')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='在cProfile和tracemalloc下运行整批解析，结果写入剖析目录（VIDEO_PROFILE_DIR，默认profiles）')
+    arg_parser.add_argument('--summary-json', action='store_true',
+                            help='以JSON格式向标准错误输出汇总信息')
+    args = arg_parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()] if args.fields else None
+    if args.timings:
+        timings.set_enabled(True)
+
+    session = ProfileSession('batch') if args.profile else None
+    try:
+        if session is None:
+            summary = run_batch(read_urls(source), out, workers=max(1, args.workers),
+                                ordered=args.ordered, fields=fields)
+        else:
+            with session:
+                summary = run_batch(read_urls(source), out, workers=max(1, args.workers),
+                                    ordered=args.ordered, fields=fields, profile_session=session)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    if args.timings:
+        summary['timings'] = timings.get_histograms().snapshot()['platforms']
+    if session is not None:
+        summary['profile'] = session.write()
+
+    if args.summary_json:
+        print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    else:
+        print_summary(summary)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
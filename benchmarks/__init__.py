@@ -0,0 +1,4 @@
+"""
+离线基准测试套件
+使用录制并脱敏的平台页面和接口数据，通过本地替身源站运行，不需要访问外网
+"""
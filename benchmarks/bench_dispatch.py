@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程分发基准测试
+对比解析服务多个工作进程的三种请求分配方式下，进程内结果缓存的效果：
+
+    shared         工作进程共用监听套接字，由内核分配连接（默认方式）
+    hash           分发进程按 (平台, 视频ID) 一致性哈希转发到固定的工作进程
+    least-loaded   分发进程总是转发给最空闲的工作进程
+
+请求按 Zipf 分布访问一批B站视频（替身源站对任意视频ID返回录制数据），统计：
+缓存命中率、源站请求数、各工作进程的命中率和缓存条目数之和（分发模式下逐个抓取工作进程的 /metrics）、
+延迟分位数。另外单独测量哈希环的负载均衡程度和增删一个工作进程时改变归属的键的比例
+
+用法:
+    python -m benchmarks.bench_dispatch --workers 4 --videos 400 --requests 4000 --check
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Optional, Dict, Any, List
+
+from benchmarks.bench_render import ROOT_DIR
+from benchmarks.origin_server import StandInOrigin
+from benchmarks.stats import percentile
+from hash_ring import HashRing
+
+MODES = ('shared', 'hash', 'least-loaded')
+
+
+def ring_balance(workers: int, replicas: int, keys: int = 100000) -> Dict[str, Any]:
+    """哈希环的负载均衡程度，以及移除/加入一个节点时改变归属的键的比例"""
+    names = [f'worker-{index}' for index in range(workers)]
+    ring = HashRing(names, replicas=replicas)
+    sample = [f'bilibili.com:BV{index:010d}' for index in range(keys)]
+    before = {key: ring.get(key) for key in sample}
+    counts = {name: 0 for name in names}
+    for owner in before.values():
+        counts[owner] += 1
+
+    ring.remove(names[-1])
+    removed = {key: ring.get(key) for key in sample}
+    ring.add(names[-1])
+    ring.add(f'worker-{workers}')
+    added = {key: ring.get(key) for key in sample}
+    return {
+        'max_over_mean': round(max(counts.values()) / (keys / workers), 3),
+        'moved_on_remove': round(sum(before[key] != removed[key] for key in sample) / keys, 4),
+        'moved_unrelated': sum(before[key] != removed[key] and before[key] != names[-1] for key in sample),
+        'moved_on_add': round(sum(before[key] != added[key] for key in sample) / keys, 4),
+        'expected_on_remove': round(1 / workers, 4),
+        'expected_on_add': round(1 / (workers + 1), 4)
+    }
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'解析服务进程已退出（退出码 {process.returncode}）')
+        try:
+            with urllib.request.urlopen(f'{base_url}/healthz', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('解析服务未就绪')
+
+
+def _get(base_url: str, path: str, worker: Optional[str] = None) -> bytes:
+    request = urllib.request.Request(f'{base_url}{path}', headers={'X-Video-Worker': worker} if worker else {})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _scrape_cache(text: str) -> Dict[str, float]:
+    """从 /metrics 中取默认结果缓存的命中、未命中次数和条目数"""
+    values = {'hit': 0.0, 'miss': 0.0, 'entries': 0.0}
+    for line in text.splitlines():
+        if line.startswith('video_cache_requests_total{cache="results",result="hit"}'):
+            values['hit'] = float(line.rsplit(' ', 1)[1])
+        elif line.startswith('video_cache_requests_total{cache="results",result="miss"}'):
+            values['miss'] = float(line.rsplit(' ', 1)[1])
+        elif line.startswith('video_cache_entries{cache="results"}'):
+            values['entries'] = float(line.rsplit(' ', 1)[1])
+    return values
+
+
+def run_mode(mode: str, origin: StandInOrigin, urls: List[str], sequence: List[int], workers: int,
+             threads: int, concurrency: int, port: int) -> Dict[str, Any]:
+    """按一种分配方式启动解析服务，并发发送请求序列"""
+    command = [sys.executable, 'api_server.py', '--port', str(port), '--workers', str(workers),
+               '--threads', str(threads)]
+    if mode != 'shared':
+        command += ['--dispatch', mode]
+    env = dict(os.environ, VIDEO_ORIGIN_OVERRIDE=origin.base_url)
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        _wait_ready(base_url, process)
+        origin_before = origin.requests
+        latencies = []
+        hits = [0]
+        errors = [0]
+        lock = threading.Lock()
+        position = [0]
+
+        def client():
+            while True:
+                with lock:
+                    if position[0] >= len(sequence):
+                        return
+                    url = urls[sequence[position[0]]]
+                    position[0] += 1
+                started = time.perf_counter()
+                try:
+                    result = json.loads(_get(base_url, '/parse?' + urllib.parse.urlencode({'url': url})))
+                except (OSError, ValueError):
+                    result = {}
+                elapsed = (time.perf_counter() - started) * 1e3
+                with lock:
+                    latencies.append(elapsed)
+                    hits[0] += bool(result.get('cache_hit'))
+                    errors[0] += not result.get('success')
+
+        clients = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+
+        row = {
+            'requests': len(sequence),
+            'errors': errors[0],
+            'hit_rate': round(hits[0] / len(sequence), 4),
+            'origin_requests': origin.requests - origin_before,
+            'throughput': round(len(sequence) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'worker_hit_rates': None,
+            'cache_entries': None
+        }
+        if mode != 'shared':
+            # 分发模式下可以逐个抓取工作进程的指标
+            caches = [_scrape_cache(_get(base_url, '/metrics', f'worker-{index}').decode('utf-8'))
+                      for index in range(workers)]
+            row['worker_hit_rates'] = [round(cache['hit'] / max(1, cache['hit'] + cache['miss']), 4)
+                                       for cache in caches]
+            row['cache_entries'] = int(sum(cache['entries'] for cache in caches))
+            row['fallbacks'] = sum(worker['fallbacks']
+                                   for worker in json.loads(_get(base_url, '/workers'))['workers'])
+        return row
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(workers: int = 4, threads: int = 8, videos: int = 400, requests: int = 4000, concurrency: int = 16,
+        zipf: float = 1.1, latency_ms: float = 20, replicas: int = 160, port: int = 18200,
+        modes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """测量哈希环，并依次按各种分配方式压测"""
+    rng = random.Random(42)
+    urls = [f'https://www.bilibili.com/video/BV{index:010d}' for index in range(videos)]
+    weights = [1 / (rank + 1) ** zipf for rank in range(videos)]
+    sequence = rng.choices(range(videos), weights=weights, k=requests)
+    results = {'ring': ring_balance(workers, replicas), 'distinct_videos': len(set(sequence)), 'modes': {}}
+    with StandInOrigin(latency_ms=latency_ms) as origin:
+        for offset, mode in enumerate(modes or MODES):
+            results['modes'][mode] = run_mode(mode, origin, urls, sequence, workers, threads, concurrency,
+                                              port + offset)
+    return results
+
+
+def print_report(results: Dict[str, Any], workers: int):
+    ring = results['ring']
+    print(f'\n💍 哈希环（{workers} 个工作进程）：最多/平均负载 {ring["max_over_mean"]}，'
+          f'移除一个进程时改变归属 {ring["moved_on_remove"]:.1%}（理想 {ring["expected_on_remove"]:.1%}，'
+          f'其余进程之间的迁移 {ring["moved_unrelated"]}），加入一个进程时 {ring["moved_on_add"]:.1%}'
+          f'（理想 {ring["expected_on_add"]:.1%}）')
+    print(f'\n🔀 请求分配（{results["distinct_videos"]} 个不同视频）')
+    print(f'{"方式":<14}{"命中率":>8}{"源站请求":>10}{"缓存条目":>10}{"吞吐(次/秒)":>14}{"p50(ms)":>10}{"p95(ms)":>10}'
+          f'  各进程命中率')
+    print('-' * 100)
+    for mode, row in results['modes'].items():
+        entries = '-' if row['cache_entries'] is None else row['cache_entries']
+        rates = ', '.join(f'{rate:.0%}' for rate in row['worker_hit_rates'] or [])
+        print(f'{mode:<14}{row["hit_rate"]:>8.1%}{row["origin_requests"]:>10}{entries:>10}{row["throughput"]:>14}'
+              f'{row["p50_ms"]:>10}{row["p95_ms"]:>10}  {rates}')
+        if row['errors']:
+            print(f'{"":<14}⚠️ {row["errors"]} 个请求失败')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='多进程分发基准测试')
+    arg_parser.add_argument('--workers', type=int, default=4, help='工作进程数')
+    arg_parser.add_argument('--threads', type=int, default=8, help='每个工作进程的线程数')
+    arg_parser.add_argument('--videos', type=int, default=400, help='不同视频数')
+    arg_parser.add_argument('--requests', type=int, default=4000, help='每种方式的请求数')
+    arg_parser.add_argument('--concurrency', type=int, default=16, help='客户端并发数')
+    arg_parser.add_argument('--zipf', type=float, default=1.1, help='视频热度的 Zipf 指数')
+    arg_parser.add_argument('--latency-ms', type=float, default=20, help='替身源站延迟（毫秒）')
+    arg_parser.add_argument('--replicas', type=int, default=160, help='每个工作进程的虚拟节点数')
+    arg_parser.add_argument('--port', type=int, default=18200, help='解析服务使用的起始端口')
+    arg_parser.add_argument('--modes', help=f'分配方式，逗号分隔（默认 {",".join(MODES)}）')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='hash 的命中率不高于 shared、缓存条目明显多于不同视频数或有请求失败时返回非零状态')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    workers = max(2, args.workers)
+    modes = [mode.strip() for mode in args.modes.split(',')] if args.modes else None
+    results = run(workers, max(1, args.threads), args.videos, args.requests, max(1, args.concurrency),
+                  args.zipf, args.latency_ms, args.replicas, args.port, modes)
+    print_report(results, workers)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    if args.check:
+        rows = results['modes']
+        failures = [f'{mode} 有 {row["errors"]} 个请求失败' for mode, row in rows.items() if row['errors']]
+        if 'hash' in rows:
+            hashed = rows['hash']
+            if 'shared' in rows and hashed['hit_rate'] <= rows['shared']['hit_rate']:
+                failures.append('hash 的命中率没有高于 shared')
+            # 饱和时改发给其他进程的请求会在那里多缓存一份
+            if hashed['cache_entries'] > results['distinct_videos'] + hashed['fallbacks']:
+                failures.append('hash 的缓存条目多于不同视频数')
+        if results['ring']['moved_unrelated']:
+            failures.append('移除一个进程时其他进程之间也有键迁移')
+        if failures:
+            print('\n❌ ' + '；'.join(failures))
+            return 1
+        print('\n✅ 全部通过')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
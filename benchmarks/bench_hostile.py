@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+恶意页面提取基准测试
+构造会让回溯正则退化的页面，确认各平台页面字段的提取耗时始终有上限：
+
+    title_unclosed   大量没有闭合的 <title>，<title>(.*?)</title> 按原写法为平方复杂度
+    h1_unclosed      大量没有 > 的 <h1，<h1[^>]*> 按原写法为平方复杂度
+    vid_capture      vid= 之后几MB没有 &，vid=([^&]+) 按原写法会捕获整段内容
+    giant_page       正常页面填充到几十MB，标题和视频ID都不在页面中
+
+每种页面分别用当前的提取（线性模式 + 扫描窗口 + CPU预算）和原始正则整体查找测量，
+原始正则只在较小的页面上测量（大页面上要几十秒）
+
+用法:
+    python -m benchmarks.bench_hostile --sizes-mb 1,4,16 --legacy-max-mb 1 --check
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+import extractors
+import platforms
+from benchmarks.fixtures import make_padding
+
+PAGES: Dict[str, Callable[[int], bytes]] = {
+    'title_unclosed': lambda size: (b'<title>' + b'x' * 1000) * (size // 1007 + 1),
+    'h1_unclosed': lambda size: b'<h1 class="a"' * (size // 13 + 1),
+    'vid_capture': lambda size: b'vid=' + b'a' * size,
+    'giant_page': lambda size: b'<html><body>' + make_padding(size) + b'</body></html>',
+}
+
+
+def legacy_extract(body: bytes, fields) -> Dict[str, str]:
+    """原来的提取方式：原始正则在整个页面上查找，没有窗口和预算"""
+    result = {}
+    for field in fields:
+        for pattern in field.patterns:
+            match = re.search(pattern, body)
+            if match:
+                result[field.name] = match.group(1)[:64].decode('utf-8', errors='replace')
+                break
+    return result
+
+
+def measure(func: Callable[[], Any]) -> float:
+    """单次调用的CPU时间（毫秒）"""
+    started = time.thread_time()
+    func()
+    return (time.thread_time() - started) * 1e3
+
+
+def run(sizes_mb: List[float], legacy_max_mb: float = 1) -> Dict[str, Dict[str, Any]]:
+    """在各种页面上测量各平台页面字段的提取耗时"""
+    rows = {}
+    specs = [spec for spec in platforms.registry() if spec.page]
+    for size_mb in sizes_mb:
+        size = int(size_mb * 1024 * 1024)
+        for name, build in PAGES.items():
+            body = build(size)[:size]
+            for spec in specs:
+                outcome = {}
+
+                def safe():
+                    outcome['result'] = extractors.extract_fields_tracked(body, spec.page)
+
+                row = {
+                    'page_bytes': len(body),
+                    'safe_ms': round(measure(safe), 2),
+                    'budget_exceeded': outcome['result'][2],
+                    'legacy_ms': None
+                }
+                if size_mb <= legacy_max_mb:
+                    row['legacy_ms'] = round(measure(lambda: legacy_extract(body, spec.page)), 2)
+                rows[f'{size_mb:g}MB.{name}.{spec.key}'] = row
+    return rows
+
+
+def print_report(rows: Dict[str, Dict[str, Any]]):
+    print(f'\n🛡️ 恶意页面提取耗时（CPU预算 {extractors.BUDGET * 1e3:g}ms）')
+    print(f'{"名称":<40}{"当前(ms)":>12}{"超预算":>8}{"原始正则(ms)":>16}')
+    print('-' * 76)
+    for name, row in rows.items():
+        legacy = '-' if row['legacy_ms'] is None else row['legacy_ms']
+        print(f'{name:<40}{row["safe_ms"]:>12}{"是" if row["budget_exceeded"] else "":>8}{legacy:>16}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='恶意页面提取基准测试')
+    arg_parser.add_argument('--sizes-mb', default='1,4,16', help='页面大小（MB），逗号分隔')
+    arg_parser.add_argument('--legacy-max-mb', type=float, default=1, help='原始正则只在不超过该大小的页面上测量')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='任一提取超过预算的2倍（另加一段查找的余量）时返回非零状态')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    sizes = [float(size) for size in args.sizes_mb.split(',') if size.strip()]
+    rows = run(sizes, args.legacy_max_mb)
+    print_report(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    if args.check and extractors.BUDGET > 0:
+        limit = extractors.BUDGET * 2e3 + 50
+        slow = [name for name, row in rows.items() if row['safe_ms'] > limit]
+        if slow:
+            print(f'\n❌ {len(slow)} 项超过 {limit:g}ms: {", ".join(slow)}')
+            return 1
+        print(f'\n✅ 全部在 {limit:g}ms 以内')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
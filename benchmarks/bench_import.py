@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+冷启动导入基准测试
+在全新的解释器中用 python -X importtime 导入各个入口模块，统计导入耗时和导入了哪些模块：
+
+    cumulative   入口模块的累计导入耗时（多次运行的中位数）
+    heaviest     入口模块导入链中累计耗时最多的依赖
+    eager        不应在导入时加载、只在第一次使用时才导入的重量级模块（requests、http.server、
+                 multiprocessing 等），出现在导入链中说明某处又变成了模块级导入
+
+解释器启动时由 site 导入的模块（如 .pth 钩子引入的包）不计入入口模块
+每次运行可以追加到 benchmarks/import_history.jsonl，与上一次对比
+
+用法:
+    python -m benchmarks.bench_import --runs 5
+    python -m benchmarks.bench_import --check --record
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Optional, Dict, Any, List, Tuple
+
+from benchmarks.bench_render import ROOT_DIR, git_revision, load_history
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_history.jsonl')
+
+# 入口模块 -> 允许在导入时加载的重量级模块
+TARGETS: Dict[str, Tuple[str, ...]] = {
+    'enhanced_parser': (),
+    'video_parser': (),
+    'youku_preferred': (),
+    'prefetch': (),
+    'batch_parse': ('concurrent.futures',),
+    'api_server': ('http.server', 'concurrent.futures'),
+}
+LAZY_MODULES = ('requests', 'urllib3', 'http.server', 'multiprocessing', 'concurrent.futures', 'pstats')
+
+
+def parse_importtime(stderr: str, target: str) -> List[Tuple[str, int, int, int]]:
+    """解析 -X importtime 的输出，返回入口模块导入链中的 (模块, 深度, 自身微秒, 累计微秒)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+
+    # 输出按导入完成的顺序排列，入口模块的导入链是它之前、上一个顶层模块之后的连续部分
+    end = max(i for i, row in enumerate(rows) if row[0] == target and row[1] == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def measure(target: str) -> List[Tuple[str, int, int, int]]:
+    """在全新的解释器中导入一次入口模块"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+                               cwd=ROOT_DIR, capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise RuntimeError(f'导入 {target} 失败:\n{completed.stderr[-2000:]}')
+    return parse_importtime(completed.stderr, target)
+
+
+def run(runs: int = 5, targets: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """测量各入口模块的冷启动导入耗时"""
+    results = {}
+    for target in targets or list(TARGETS):
+        samples = [measure(target) for _ in range(runs)]
+        cumulative = sorted(rows[-1][3] for rows in samples)
+        rows = samples[len(samples) // 2]
+        modules = {name for name, _, _, _ in rows}
+        allowed = TARGETS.get(target, ())
+        heaviest = sorted((row for row in rows[:-1] if row[1] == 1), key=lambda row: -row[3])[:5]
+        results[target] = {
+            'cumulative_ms': round(statistics.median(cumulative) / 1e3, 2),
+            'min_ms': round(cumulative[0] / 1e3, 2),
+            'modules': len(modules),
+            'heaviest': {name: round(total / 1e3, 2) for name, _, _, total in heaviest},
+            'eager': [name for name in LAZY_MODULES if name in modules and name not in allowed]
+        }
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, Any]], previous: Optional[Dict[str, Any]] = None):
+    """输出结果，有上一次记录时一并显示变化"""
+    print('\n📦 冷启动导入')
+    print(f'{"入口模块":<18}{"累计(ms)":>10}{"最快(ms)":>10}{"模块数":>8}  最重的依赖')
+    print('-' * 90)
+    for name, row in results.items():
+        heaviest = ', '.join(f'{module} {ms}ms' for module, ms in list(row['heaviest'].items())[:3])
+        line = f'{name:<18}{row["cumulative_ms"]:>10}{row["min_ms"]:>10}{row["modules"]:>8}  {heaviest}'
+        old = (previous or {}).get(name)
+        if old:
+            line += f'   (上次 {old["cumulative_ms"]}ms)'
+        print(line)
+        if row['eager']:
+            print(f'{"":<18}⚠️ 导入时加载了: {", ".join(row["eager"])}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='冷启动导入基准测试')
+    arg_parser.add_argument('--runs', type=int, default=5, help='每个入口模块的运行次数')
+    arg_parser.add_argument('--targets', help='入口模块，逗号分隔（默认全部）')
+    arg_parser.add_argument('--max-ms', type=float, default=0, help='配合 --check：累计导入耗时上限，0 表示不限制')
+    arg_parser.add_argument('--check', action='store_true', help='有模块在导入时加载了重量级依赖（或超过 --max-ms）时返回非零状态')
+    arg_parser.add_argument('--history', default=DEFAULT_HISTORY, help='历史记录文件路径')
+    arg_parser.add_argument('--record', action='store_true', help='把本次结果追加到历史记录')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    targets = [target.strip() for target in args.targets.split(',')] if args.targets else None
+    results = run(max(1, args.runs), targets)
+    history = load_history(args.history)
+    print_results(results, history[-1]['targets'] if history else None)
+
+    if args.record:
+        entry = {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'targets': {name: {key: row[key] for key in ('cumulative_ms', 'min_ms', 'modules')}
+                        for name, row in results.items()}
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        print(f'\n💾 已追加到 {args.history}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.check:
+        failed = [name for name, row in results.items()
+                  if row['eager'] or (args.max_ms and row['cumulative_ms'] > args.max_ms)]
+        if failed:
+            print(f'\n❌ {len(failed)} 个入口模块未通过: {", ".join(failed)}')
+            return 1
+        print('\n✅ 全部通过')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存占用基准测试
+用 tracemalloc 测量两项：
+
+    per-result  结果缓存中每条结果占用的内存：原先保存完整dict（含全部解析链接），
+                现在保存紧凑的 ParseResult
+    peak        解析 1–5 MB 页面时的内存峰值（不含页面原始字节本身）
+
+用法:
+    python -m benchmarks.bench_memory --entries 2000 --sizes-mb 1,2,5
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+import http_client
+from benchmarks.bench_parsers import build_parsers
+from benchmarks.fixtures import FixtureTransport, PLATFORM_URLS, ROUTES, load_fixture
+from enhanced_parser import EnhancedVIPParser
+from parse_result import ParseResult
+from result_cache import ResultCache
+
+# 按条目数估算容量时使用的内存预算
+BUDGET_MB = 64
+
+
+def sample_results(parser: EnhancedVIPParser) -> List[Dict[str, Any]]:
+    """用录制数据解析各平台链接，得到真实形状的解析结果"""
+    http_client.set_transport(FixtureTransport())
+    try:
+        results = [parser.parse_video(url) for url in PLATFORM_URLS.values()]
+    finally:
+        http_client.set_transport(None)
+    return [result for result in results if result.get('success')]
+
+
+def make_result(parser: EnhancedVIPParser, base: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """以真实结果为模板构造第 index 条结果，标题、视频ID和链接各不相同"""
+    url = f'{base["original_url"]}?index={index}'
+    parse_urls = parser.get_all_parse_urls(url)
+    result = dict(base)
+    result.update({
+        'title': f'{base["title"]} 第{index}集',
+        'vid': f'{base["vid"]}{index}',
+        'original_url': url,
+        'parse_urls': parse_urls,
+        'best_parse_url': parse_urls[0]['url'] if parse_urls else None
+    })
+    return result
+
+
+def measure_per_result(entries: int) -> Dict[str, Any]:
+    """缓存中每条结果占用的内存"""
+    parser = EnhancedVIPParser(cache=ResultCache(max_entries=0))
+    bases = sample_results(parser)
+
+    def fill(store):
+        for index in range(entries):
+            base = bases[index % len(bases)]
+            result = make_result(parser, base, index)
+            # 与解析器一致：缓存键中的视频ID由链接单独提取，是另一个字符串对象
+            store((base['platform'], f'{base["vid"]}{index}'), result)
+
+    tracemalloc.start()
+    try:
+        # 原先的做法：缓存保存完整dict的副本
+        legacy = OrderedDict()
+        before, _ = tracemalloc.get_traced_memory()
+        fill(lambda key, result: legacy.__setitem__(key, (0.0, dict(result))))
+        legacy_bytes = tracemalloc.get_traced_memory()[0] - before
+        del legacy
+
+        cache = ResultCache(max_entries=entries + 1)
+        before, _ = tracemalloc.get_traced_memory()
+        fill(lambda key, result: cache.put(key, ParseResult.compact(result, key)))
+        compact_bytes = tracemalloc.get_traced_memory()[0] - before
+        del cache
+
+        # 缓存自身的开销（键、LRU链表、过期时间），两种保存方式相同
+        cache = ResultCache(max_entries=entries + 1)
+        shared = ParseResult()
+        before, _ = tracemalloc.get_traced_memory()
+        fill(lambda key, result: cache.put(key, shared))
+        overhead_bytes = tracemalloc.get_traced_memory()[0] - before
+        del cache
+    finally:
+        tracemalloc.stop()
+
+    budget = BUDGET_MB * 1024 * 1024
+    legacy_per = legacy_bytes / entries
+    compact_per = compact_bytes / entries
+    overhead_per = overhead_bytes / entries
+    return {
+        'entries': entries,
+        'dict_bytes_per_result': round(legacy_per, 1),
+        'compact_bytes_per_result': round(compact_per, 1),
+        'cache_overhead_bytes': round(overhead_per, 1),
+        'dict_results_per_budget': int(budget / legacy_per),
+        'compact_results_per_budget': int(budget / compact_per),
+        'ratio': round(legacy_per / compact_per, 1),
+        'payload_ratio': round((legacy_per - overhead_per) / (compact_per - overhead_per), 1)
+    }
+
+
+def measure_peak(sizes_mb: List[float]) -> Dict[str, Dict[str, Any]]:
+    """解析大页面时的内存峰值"""
+    parsers = build_parsers()
+    rows = {}
+    for size_mb in sizes_mb:
+        pad_bytes = int(size_mb * 1024 * 1024)
+        # 页面数据先加载好，峰值中不计页面原始字节
+        for key in ROUTES:
+            load_fixture(key, pad_bytes)
+        http_client.set_transport(FixtureTransport(pad_bytes))
+        try:
+            for name, (parser, parse, urls) in parsers.items():
+                for platform, url in urls.items():
+                    parse(parser, url)
+                    tracemalloc.start()
+                    try:
+                        baseline, _ = tracemalloc.get_traced_memory()
+                        parse(parser, url)
+                        _, peak = tracemalloc.get_traced_memory()
+                    finally:
+                        tracemalloc.stop()
+                    peak_bytes = peak - baseline
+                    rows[f'{size_mb:g}MB.{name}.{platform}'] = {
+                        'page_bytes': pad_bytes,
+                        'peak_kb': round(peak_bytes / 1024, 1),
+                        'peak_per_page': round(peak_bytes / pad_bytes, 2)
+                    }
+        finally:
+            http_client.set_transport(None)
+    return rows
+
+
+def run(entries: int = 2000, sizes_mb: Optional[List[float]] = None) -> Dict[str, Any]:
+    """运行全部测量"""
+    return {
+        'per_result': measure_per_result(entries),
+        'peak': measure_peak(sizes_mb or [1, 2, 5])
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    per_result = results['per_result']
+    print(f'\n📦 缓存中每条结果的内存（{per_result["entries"]} 条）')
+    print(f'{"保存方式":<24}{"字节/条":>12}{f"{BUDGET_MB}MB可存条数":>20}')
+    print('-' * 56)
+    print(f'{"完整dict":<24}{per_result["dict_bytes_per_result"]:>12}{per_result["dict_results_per_budget"]:>20}')
+    print(f'{"ParseResult":<24}{per_result["compact_bytes_per_result"]:>12}'
+          f'{per_result["compact_results_per_budget"]:>20}')
+    print(f'同样内存可多存 {per_result["ratio"]} 倍的结果；'
+          f'扣除缓存自身每条 {per_result["cache_overhead_bytes"]} 字节的开销后，结果本身缩小 {per_result["payload_ratio"]} 倍')
+
+    print('\n📈 解析大页面时的内存峰值')
+    print(f'{"名称":<48}{"峰值(KB)":>12}{"峰值/页面":>12}')
+    print('-' * 72)
+    for name, row in results['peak'].items():
+        print(f'{name:<48}{row["peak_kb"]:>12}{row["peak_per_page"]:>12}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='内存占用基准测试')
+    arg_parser.add_argument('--entries', type=int, default=2000, help='测量每条结果内存时写入的条目数')
+    arg_parser.add_argument('--sizes-mb', default='1,2,5', help='测量峰值的页面大小（MB），逗号分隔')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    sizes = [float(size) for size in args.sizes_mb.split(',') if size.strip()]
+    results = run(args.entries, sizes)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析器离线基准测试
+对 VideoParser、EnhancedVIPParser、YoukuFixer、YoukuPreferredParser 分别测量：
+
+    detect  平台检测（纯URL处理）
+    fetch   通过本地替身源站请求页面和接口
+    extract 页面数据直接从内存返回，只测解析和提取
+    e2e     通过带延迟和抖动的本地替身源站完整解析
+
+用法:
+    python -m benchmarks.bench_parsers --iterations 200 --latency-ms 20 --jitter-ms 5
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+import requests
+
+import http_client
+from benchmarks.fixtures import FixtureTransport, PLATFORM_URLS, YOUKU_URLS, ROUTES
+from benchmarks.origin_server import StandInOrigin
+from benchmarks.stats import summarize, time_calls, print_table
+from enhanced_parser import EnhancedVIPParser
+from result_cache import ResultCache
+from video_parser import VideoParser
+from youku_fix import YoukuFixer
+from youku_preferred import YoukuPreferredParser
+
+
+def build_parsers() -> Dict[str, Tuple[Any, Callable[[Any, str], Dict[str, Any]], Dict[str, str]]]:
+    """被测解析器：名称 -> (实例, 解析函数, 测试链接)"""
+    youku_urls = {f'youku{i}': url for i, url in enumerate(YOUKU_URLS, 1)}
+    return {
+        'VideoParser': (VideoParser(), lambda p, url: p.parse_video(url), PLATFORM_URLS),
+        # 关闭结果缓存，测量的是每次真正解析的开销
+        'EnhancedVIPParser': (EnhancedVIPParser(cache=ResultCache(max_entries=0)),
+                              lambda p, url: p.parse_video(url), PLATFORM_URLS),
+        'YoukuFixer': (YoukuFixer(), lambda p, url: p.parse_youku_video(url), youku_urls),
+        'YoukuPreferredParser': (YoukuPreferredParser(), lambda p, url: p.parse_youku_video(url), youku_urls),
+    }
+
+
+def bench_detect(parsers, iterations: int) -> Dict[str, Any]:
+    """平台检测"""
+    rows = {}
+    for name, (parser, _, urls) in parsers.items():
+        if hasattr(parser, 'detect_platform'):
+            detect = parser.detect_platform
+        elif hasattr(parser, 'extract_youku_vid'):
+            detect = parser.extract_youku_vid
+        else:
+            continue
+
+        url_list = list(urls.values())
+        samples = time_calls(lambda: [detect(url) for url in url_list], iterations)
+        # 每次调用检测了多个链接，换算为单个链接的耗时
+        rows[name] = summarize([sample / len(url_list) for sample in samples])
+    return rows
+
+
+def bench_fetch(origin: StandInOrigin, iterations: int) -> Dict[str, Any]:
+    """通过替身源站请求"""
+    rows = {}
+    session = requests.Session()
+    for route in ROUTES:
+        url = 'https://' + route
+        samples = time_calls(lambda: http_client.fetch(url, timeout=10, session=session), iterations)
+        rows[route] = summarize(samples)
+    return rows
+
+
+def bench_parse(parsers, iterations: int) -> Dict[str, Any]:
+    """按当前的传输设置完整解析"""
+    rows = {}
+    for name, (parser, parse, urls) in parsers.items():
+        for platform, url in urls.items():
+            samples = time_calls(lambda: parse(parser, url), iterations)
+            rows[f'{name}.{platform}'] = summarize(samples)
+    return rows
+
+
+def check_results(parsers) -> List[str]:
+    """检查每个解析器在录制数据上都能解析成功"""
+    failures = []
+    for name, (parser, parse, urls) in parsers.items():
+        for platform, url in urls.items():
+            result = parse(parser, url)
+            if not result.get('success'):
+                failures.append(f'{name}.{platform}: {result.get("error")}')
+    return failures
+
+
+def run(iterations: int = 100, latency_ms: float = 0, jitter_ms: float = 0,
+        pad_bytes: int = 0, seed: int = 42) -> Dict[str, Any]:
+    """运行全部基准测试"""
+    parsers = build_parsers()
+    results = {
+        'config': {
+            'iterations': iterations,
+            'latency_ms': latency_ms,
+            'jitter_ms': jitter_ms,
+            'pad_bytes': pad_bytes
+        }
+    }
+
+    results['detect'] = bench_detect(parsers, iterations * 10)
+
+    http_client.set_transport(FixtureTransport(pad_bytes))
+    try:
+        results['failures'] = check_results(parsers)
+        results['extract'] = bench_parse(parsers, iterations)
+    finally:
+        http_client.set_transport(None)
+
+    with StandInOrigin(latency_ms=latency_ms, jitter_ms=jitter_ms,
+                       pad_bytes=pad_bytes, seed=seed) as origin:
+        http_client.set_origin_override(origin.base_url)
+        try:
+            results['fetch'] = bench_fetch(origin, iterations)
+            results['e2e'] = bench_parse(parsers, iterations)
+        finally:
+            http_client.set_origin_override(None)
+
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='解析器离线基准测试')
+    arg_parser.add_argument('--iterations', type=int, default=100, help='每项测试的重复次数')
+    arg_parser.add_argument('--latency-ms', type=float, default=0, help='替身源站固定延迟（毫秒）')
+    arg_parser.add_argument('--jitter-ms', type=float, default=0, help='替身源站延迟抖动（毫秒）')
+    arg_parser.add_argument('--pad-kb', type=int, default=0, help='在页面中填充的无关内容大小（KB）')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    results = run(args.iterations, args.latency_ms, args.jitter_ms, args.pad_kb * 1024)
+
+    print_table('平台检测 (detect, 每个链接)', results['detect'])
+    print_table('源站请求 (fetch)', results['fetch'])
+    print_table('内存数据解析 (extract)', results['extract'])
+    print_table('完整解析 (e2e)', results['e2e'])
+
+    if results['failures']:
+        print('\n❌ 以下解析在录制数据上失败:')
+        for failure in results['failures']:
+            print(f'   {failure}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    return 1 if results['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
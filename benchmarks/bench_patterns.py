@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面正则命中统计基准测试
+对比按配置顺序直接执行全部正则（extract_fields）和带命中统计的提取（platforms.extract_page）：
+
+    small      录制的播放页（几百字节），统计本身的开销：每次提取取一次计数、读一次缓存的字段规则，
+               每 SAMPLE_EVERY 次记录一次
+    revamped   模拟平台改版：视频ID只能由最后一个正则在页面末尾提取，前面的正则都已失效，
+               统计判定失效后先查找字面量，不再在整个页面上执行这些正则
+
+最后给出净收益：一次改版页面上省下的时间抵得上多少次小页面提取的统计开销
+
+用法:
+    python -m benchmarks.bench_patterns --size-kb 1024 --check
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+import requests
+
+import extractors
+import offload
+import platforms
+from benchmarks.fixtures import FixtureTransport, PLATFORM_URLS, make_padding
+from platforms.ordering import STATS, MIN_ATTEMPTS, SAMPLE_EVERY
+
+SMALL_PLATFORMS = {'iqiyi': 'iqiyi.com', 'youku': 'youku.com', 'mgtv': 'mgtv.com', 'tencent': 'v.qq.com'}
+
+# 改版后的页面中只有各平台最后一个视频ID正则能匹配的写法
+REVAMPED_VID = {
+    'iqiyi.com': b'<script>window.Q.PageInfo = {"tvId": 7382918300};</script>',
+    'youku.com': b'<a class="next" href="//v.youku.com/v_show/id_XNTkxNjcwMjg0OA==.html">',
+    'mgtv.com': b'<a class="next" href="https://www.mgtv.com/b/332759/3567533.html">',
+    'v.qq.com': b'<script>var COVER_INFO = {"id": "m4101qychtr"};</script>',
+}
+
+
+def _response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = body
+    return response
+
+
+def revamped_page(key: str, size: int) -> bytes:
+    """标题在开头、视频ID只在页面末尾且只有最后一个正则能匹配的页面"""
+    return (b'<html><head><title>\xe7\x8b\x82\xe9\xa3\x99\xe7\xac\xac1\xe9\x9b\x86</title></head><body>'
+            + make_padding(size) + REVAMPED_VID[key] + b'</body></html>')
+
+
+def compare(key: str, response: requests.Response, number: int, rounds: int) -> Dict[str, Any]:
+    """交替测量两种提取，返回单次提取的中位数（微秒），并确认结果相同"""
+    spec = platforms.get(key)
+    calls: Dict[str, Callable[[], Dict[str, str]]] = {
+        'configured': lambda: offload.extract(response, extractors.extract_fields, spec.page),
+        'adaptive': lambda: platforms.extract_page(key, response, spec),
+    }
+    values = {name: call() for name, call in calls.items()}
+    samples = {name: [] for name in calls}
+    for _ in range(rounds):
+        for name, call in calls.items():
+            started = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples[name].append((time.perf_counter() - started) / number * 1e6)
+    row = {name: round(statistics.median(times), 2) for name, times in samples.items()}
+    row['same'] = values['configured'] == values['adaptive']
+    return row
+
+
+def run(size_kb: int, rounds: int = 30) -> Dict[str, Dict[str, Any]]:
+    """测量小页面上的统计开销和改版页面上的节省"""
+    rows = {}
+    transport = FixtureTransport(0)
+    for name, key in SMALL_PLATFORMS.items():
+        STATS.reset([key])
+        rows[f'small.{name}'] = compare(key, transport(PLATFORM_URLS[name]), 200, rounds)
+
+    for name, key in SMALL_PLATFORMS.items():
+        STATS.reset([key])
+        # 先在小的改版页面上提取到足够的抽样次数，让统计判定前面的正则失效
+        warm = _response(revamped_page(key, 1024))
+        for _ in range(MIN_ATTEMPTS * SAMPLE_EVERY * 2):
+            platforms.extract_page(key, warm)
+        rows[f'revamped.{name}'] = compare(key, _response(revamped_page(key, size_kb * 1024)), 1,
+                                           max(rounds // 3, 5))
+    return rows
+
+
+def summarize(rows: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """小页面上的平均开销、改版页面上的平均节省（微秒）及两者之比"""
+    overhead = statistics.mean(row['adaptive'] - row['configured']
+                               for name, row in rows.items() if name.startswith('small.'))
+    saving = statistics.mean(row['configured'] - row['adaptive']
+                             for name, row in rows.items() if name.startswith('revamped.'))
+    return {
+        'overhead_us': round(overhead, 2),
+        'saving_us': round(saving, 2),
+        'break_even': round(saving / overhead) if overhead > 0 else None
+    }
+
+
+def print_report(rows: Dict[str, Dict[str, Any]], summary: Dict[str, float], size_kb: int):
+    print(f'\n🔎 页面正则命中统计（每 {SAMPLE_EVERY} 次提取记录一次，改版页面 {size_kb}KB）')
+    print(f'{"名称":<24}{"按配置顺序(µs)":>16}{"带统计(µs)":>14}{"差值(µs)":>12}{"结果相同":>10}')
+    print('-' * 76)
+    for name, row in rows.items():
+        delta = round(row['adaptive'] - row['configured'], 2)
+        print(f'{name:<24}{row["configured"]:>16}{row["adaptive"]:>14}{delta:>12}'
+              f'{"是" if row["same"] else "否":>10}')
+    print(f'\n📊 净收益: 小页面每次多 {summary["overhead_us"]}µs，改版页面每次少 {summary["saving_us"]}µs'
+          + (f'，一次改版页面抵 {summary["break_even"]} 次小页面' if summary['break_even'] else ''))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='页面正则命中统计基准测试')
+    arg_parser.add_argument('--size-kb', type=int, default=1024, help='改版页面大小（KB）')
+    arg_parser.add_argument('--rounds', type=int, default=30, help='交替测量的轮数')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='结果不同，或改版页面上带统计的提取没有更快时返回非零状态')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    rows = run(args.size_kb, args.rounds)
+    summary = summarize(rows)
+    print_report(rows, summary, args.size_kb)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'rows': rows, 'summary': summary}, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    if args.check:
+        failed = [name for name, row in rows.items()
+                  if not row['same'] or (name.startswith('revamped.') and row['adaptive'] >= row['configured'])]
+        if failed:
+            print(f'\n❌ {len(failed)} 项未通过: {", ".join(failed)}')
+            return 1
+        print('\n✅ 结果相同，改版页面上带统计的提取更快')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面渲染基准测试
+用 streamlit AppTest 运行 app.py，解析器替换为不发网络请求的桩，测量几种主要页面状态下
+一次脚本执行的耗时和产生的元素数量：
+
+    empty      未解析时的页面
+    parsed     解析成功，显示完整线路列表
+    history    解析记录已满（侧边栏显示最近5条）后再解析一次
+
+每次运行可以追加到 benchmarks/render_history.jsonl，页面变重会直接体现为数字的变化
+
+用法:
+    python -m benchmarks.bench_render --runs 20
+    python -m benchmarks.bench_render --record      # 追加到历史记录并与上一次对比
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, List
+
+import enhanced_parser
+from benchmarks.fixtures import PLATFORM_URLS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, 'app.py')
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'render_history.jsonl')
+
+PARSE_BUTTON = '解析视频'
+
+
+class StubParser(enhanced_parser.EnhancedVIPParser):
+    """不发网络请求的解析器，返回固定的视频信息和完整的线路列表"""
+
+    def parse_video(self, url, fields=None):
+        platform_info = self.detect_platform(url)
+        return {
+            'success': True,
+            'platform': platform_info['name'] if platform_info else '未知平台',
+            'title': '海绵宝宝 第1集',
+            'duration': '11:00',
+            'thumbnail': '',
+            'original_url': url,
+            'vip_content': True,
+            'parse_urls': self.get_all_parse_urls(url),
+        }
+
+
+def count_elements(tree) -> Counter:
+    """按类型统计元素树中的节点数"""
+    counter = Counter()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        counter[node.type] += 1
+        children = getattr(node, 'children', None)
+        if children:
+            stack.extend(children.values())
+    return counter
+
+
+def delta_bytes(tree) -> int:
+    """元素树中所有元素消息的序列化大小，近似前端收到的数据量"""
+    total = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, 'proto', None)
+        if proto is not None and hasattr(proto, 'ByteSize'):
+            total += proto.ByteSize()
+        children = getattr(node, 'children', None)
+        if children:
+            stack.extend(children.values())
+    return total
+
+
+def _new_app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=30)
+
+
+def _timed_run(at) -> float:
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def _parse(at, url: str) -> float:
+    at.text_input[0].input(url)
+    next(button for button in at.button if button.label == PARSE_BUTTON).click()
+    return _timed_run(at)
+
+
+def render_empty(url: str):
+    at = _new_app()
+    at.run()
+    return _timed_run(at), at
+
+
+def render_parsed(url: str):
+    at = _new_app()
+    at.run()
+    return _parse(at, url), at
+
+
+def render_history(url: str):
+    at = _new_app()
+    at.run()
+    at.session_state['parse_history'] = [f'海绵宝宝 第{i}集' for i in range(1, 50)]
+    return _parse(at, url), at
+
+
+SCENARIOS = {
+    'empty': render_empty,
+    'parsed': render_parsed,
+    'history': render_history,
+}
+
+
+def run(runs: int = 10, url: Optional[str] = None) -> Dict[str, Any]:
+    """运行全部场景，返回每个场景的耗时中位数和元素数量"""
+    url = url or PLATFORM_URLS['tencent']
+    original = enhanced_parser.EnhancedVIPParser
+    enhanced_parser.EnhancedVIPParser = StubParser
+    results = {}
+    try:
+        for name, scenario in SCENARIOS.items():
+            # 第一次运行包含模块导入和缓存初始化，不计入
+            scenario(url)
+            samples = []
+            at = None
+            for _ in range(runs):
+                elapsed, at = scenario(url)
+                samples.append(elapsed)
+            if at.exception:
+                raise RuntimeError(f'{name}: {at.exception[0].message}')
+            samples.sort()
+            counter = count_elements(at._tree)
+            results[name] = {
+                'script_ms': round(statistics.median(samples) * 1e3, 2),
+                'script_min_ms': round(samples[0] * 1e3, 2),
+                'elements': sum(counter.values()),
+                'markdown': counter.get('markdown', 0),
+                'delta_bytes': delta_bytes(at._tree),
+                'types': dict(counter.most_common())
+            }
+    finally:
+        enhanced_parser.EnhancedVIPParser = original
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """当前提交的短哈希"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """读取历史记录"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_results(results: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+    """输出结果，有上一次记录时一并显示变化"""
+    print('\n📊 页面渲染')
+    print(f'{"场景":<12}{"耗时(ms)":>12}{"元素":>8}{"markdown":>10}{"数据(B)":>10}')
+    print('-' * 52)
+    for name, row in results.items():
+        line = (f'{name:<12}{row["script_ms"]:>12}{row["elements"]:>8}'
+                f'{row["markdown"]:>10}{row["delta_bytes"]:>10}')
+        old = (previous or {}).get(name)
+        if old:
+            line += (f'   (上次 {old["script_ms"]}ms, {old["elements"]} 元素, '
+                     f'{old["delta_bytes"]}B)')
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='页面渲染基准测试')
+    arg_parser.add_argument('--runs', type=int, default=10, help='每个场景的运行次数')
+    arg_parser.add_argument('--url', help='解析的视频链接（默认使用录制数据中的腾讯视频链接）')
+    arg_parser.add_argument('--history', default=DEFAULT_HISTORY, help='历史记录文件路径')
+    arg_parser.add_argument('--record', action='store_true', help='把本次结果追加到历史记录')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    results = run(max(1, args.runs), args.url)
+    history = load_history(args.history)
+    print_results(results, history[-1]['scenarios'] if history else None)
+
+    if args.record:
+        entry = {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'runs': args.runs,
+            'scenarios': {name: {key: value for key, value in row.items() if key != 'types'}
+                          for name, row in results.items()}
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        print(f'\n💾 已追加到 {args.history}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+跨进程共享缓存基准测试
+启动多个进程同时操作同一个共享缓存文件，检查并发语义，并测量多进程同时解析同一批视频时的源站请求数：
+
+    put_if_absent   所有进程同时写入同一批键，每个键恰好一个进程写入成功
+    claim           所有进程同时声明同一批键的解析租约，每个键恰好一个进程得到租约
+    bytes           所有进程写入大小不一的条目直到远超上限，之后总字节数不超过上限，
+                    触发器维护的总数与各条目大小之和一致
+    single_flight   每个进程各自的解析器（进程内缓存 + 共享层）同时解析同一批链接，
+                    对比不挂共享层时的源站请求总数
+
+用法:
+    python -m benchmarks.bench_shared_cache --processes 8 --check
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Optional, Dict, Any, List
+
+from benchmarks.fixtures import FixtureTransport, PLATFORM_URLS
+
+
+def _wait(start_at: float):
+    """等到约定时刻再开始，让各进程尽量同时操作"""
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _put_worker(path: str, keys: int, start_at: float) -> List[int]:
+    from shared_cache import SharedCache
+    cache = SharedCache(path)
+    _wait(start_at)
+    return [index for index in range(keys)
+            if cache.put_if_absent(('race', str(index)), {'pid': os.getpid()}, 60, 60)]
+
+
+def _claim_worker(path: str, keys: int, start_at: float) -> List[int]:
+    from shared_cache import SharedCache
+    cache = SharedCache(path)
+    _wait(start_at)
+    return [index for index in range(keys) if cache.claim(('race', str(index))) is not None]
+
+
+def _bytes_worker(path: str, max_bytes: int, writes: int, seed: int) -> int:
+    from shared_cache import SharedCache
+    cache = SharedCache(path, max_bytes=max_bytes)
+    rng = random.Random(seed)
+    for index in range(writes):
+        cache.put(('bytes', str(seed), str(index)), {'data': 'x' * rng.randint(100, 4000)}, 60, 60)
+        if rng.random() < 0.3:
+            cache.lookup(('bytes', str(seed), str(rng.randrange(index + 1))))
+    return writes
+
+
+class _SlowTransport(FixtureTransport):
+    """返回录制数据前等待一段时间，模拟源站延迟"""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def __call__(self, url: str):
+        time.sleep(self.latency)
+        return super().__call__(url)
+
+
+def _parse_worker(path: Optional[str], urls: List[str], latency: float, start_at: float) -> Dict[str, Any]:
+    import http_client
+    from enhanced_parser import EnhancedVIPParser
+    from result_cache import ResultCache
+    from shared_cache import SharedCache
+    transport = _SlowTransport(latency)
+    http_client.set_transport(transport)
+    parser = EnhancedVIPParser(cache=ResultCache(shared=SharedCache(path) if path else None))
+    _wait(start_at)
+    started = time.perf_counter()
+    succeeded = sum(1 for url in urls if parser.parse_video(url).get('success'))
+    return {'requests': transport.requests, 'succeeded': succeeded,
+            'elapsed_ms': (time.perf_counter() - started) * 1e3}
+
+
+def run(processes: int = 8, keys: int = 200, max_bytes: int = 256 * 1024, writes: int = 400,
+        latency: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """在临时目录中依次运行各项检查"""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, context.Pool(processes) as pool:
+        def race(worker, name: str) -> Dict[str, Any]:
+            path = os.path.join(tmp, f'{name}.sqlite')
+            start_at = time.time() + 1
+            won = pool.starmap(worker, [(path, keys, start_at)] * processes)
+            counts = [0] * keys
+            for indexes in won:
+                for index in indexes:
+                    counts[index] += 1
+            return {'keys': keys, 'winners_per_key': sorted(set(counts)),
+                    'ok': all(count == 1 for count in counts)}
+
+        results['put_if_absent'] = race(_put_worker, 'put')
+        results['claim'] = race(_claim_worker, 'claim')
+
+        from shared_cache import SharedCache
+        path = os.path.join(tmp, 'bytes.sqlite')
+        SharedCache(path, max_bytes=max_bytes)
+        pool.starmap(_bytes_worker, [(path, max_bytes, writes, seed) for seed in range(processes)])
+        db = SharedCache(path, max_bytes=max_bytes)._connect()
+        tracked = SharedCache._total(db)
+        actual = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        results['bytes'] = {'max_bytes': max_bytes, 'tracked': tracked, 'actual': actual,
+                            'entries': db.execute('SELECT COUNT(*) FROM entries').fetchone()[0],
+                            'ok': tracked == actual <= max_bytes}
+
+        urls = list(PLATFORM_URLS.values())
+        rows = {}
+        for mode, cache_path in (('local', None), ('shared', os.path.join(tmp, 'parse.sqlite'))):
+            start_at = time.time() + 1
+            outcomes = pool.starmap(_parse_worker, [(cache_path, urls, latency, start_at)] * processes)
+            rows[mode] = {
+                'requests': sum(row['requests'] for row in outcomes),
+                'succeeded': sum(row['succeeded'] for row in outcomes),
+                'max_elapsed_ms': round(max(row['elapsed_ms'] for row in outcomes), 1)
+            }
+        # 每个链接的源站请求只应发生一次（与单个进程相同）
+        single = rows['local']['requests'] // processes
+        results['single_flight'] = dict(rows, single_process_requests=single,
+                                        ok=rows['shared']['requests'] == single
+                                        and rows['shared']['succeeded'] == rows['local']['succeeded'])
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, Any]], processes: int):
+    print(f'\n🗄️ 共享缓存（{processes} 个进程）')
+    race = results['put_if_absent'], results['claim']
+    for name, row in zip(('put_if_absent', 'claim'), race):
+        print(f'{name:<16}{row["keys"]} 个键，每个键的成功进程数 {row["winners_per_key"]}  {"✅" if row["ok"] else "❌"}')
+    row = results['bytes']
+    print(f'{"bytes":<16}上限 {row["max_bytes"]}，记录 {row["tracked"]}，实际 {row["actual"]}，'
+          f'{row["entries"]} 个条目  {"✅" if row["ok"] else "❌"}')
+    row = results['single_flight']
+    print(f'{"single_flight":<16}源站请求 只用进程内缓存 {row["local"]["requests"]} / 挂共享层 {row["shared"]["requests"]}'
+          f'（单进程 {row["single_process_requests"]}），最慢进程 {row["local"]["max_elapsed_ms"]}ms / '
+          f'{row["shared"]["max_elapsed_ms"]}ms  {"✅" if row["ok"] else "❌"}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='跨进程共享缓存基准测试')
+    arg_parser.add_argument('--processes', type=int, default=8, help='进程数')
+    arg_parser.add_argument('--keys', type=int, default=200, help='竞争写入和租约的键数')
+    arg_parser.add_argument('--max-bytes', type=int, default=256 * 1024, help='容量检查的字节数上限')
+    arg_parser.add_argument('--writes', type=int, default=400, help='容量检查中每个进程写入的条目数')
+    arg_parser.add_argument('--latency-ms', type=float, default=200, help='模拟的源站延迟（毫秒）')
+    arg_parser.add_argument('--check', action='store_true', help='任一检查未通过时返回非零状态')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    processes = max(2, args.processes)
+    results = run(processes, args.keys, args.max_bytes, args.writes, args.latency_ms / 1e3)
+    print_report(results, processes)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    if args.check:
+        failed = [name for name, row in results.items() if not row['ok']]
+        if failed:
+            print(f'\n❌ 未通过: {", ".join(failed)}')
+            return 1
+        print('\n✅ 全部通过')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
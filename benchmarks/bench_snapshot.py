@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果缓存快照基准测试
+以录制数据的解析结果为模板构造不同规模的结果缓存，导出为快照后测量：
+
+    size        快照大小、每条目字节数，与逐行JSON（未压缩、整体gzip）对比
+    export      导出耗时
+    open        打开快照的耗时（只读取文件头和文件尾，与条目数无关）
+    eager       顺序读取全部条目写入缓存的耗时（不使用快照时新节点至少要付出的代价）
+    lookup      从快照按需读取一个条目的耗时，以及之后进程内缓存命中的耗时
+
+每种规模都抽样检查读取结果与导出前一致
+
+用法:
+    python -m benchmarks.bench_snapshot --entries 1000,10000,100000 --check
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Optional, Dict, Any, List
+
+import cache_snapshot
+import http_client
+from benchmarks.fixtures import FixtureTransport, PLATFORM_URLS
+from enhanced_parser import EnhancedVIPParser
+from parse_result import ParseResult
+from result_cache import ResultCache
+
+# 打开快照的耗时上限（毫秒），与条目数无关
+MAX_OPEN_MS = 50
+SAMPLE = 1000
+
+
+def build_cache(entries: int) -> ResultCache:
+    """以各平台录制数据的解析结果为模板，构造指定条目数的结果缓存"""
+    http_client.set_transport(FixtureTransport())
+    try:
+        parser = EnhancedVIPParser(cache=ResultCache(max_entries=0))
+        templates = []
+        for url in PLATFORM_URLS.values():
+            result = parser.parse_video(url)
+            if result.get('success'):
+                templates.append((parser.get_cache_key(url)[0], ParseResult.compact(result).to_dict()))
+    finally:
+        http_client.set_transport(None)
+
+    cache = ResultCache(max_entries=entries, ttl=1800, hard_ttl=7200)
+    for index in range(entries):
+        platform, template = templates[index % len(templates)]
+        vid = f'{index:012d}'
+        value = dict(template, vid=vid, title=f'{template.get("title", "")} 第{index}集')
+        cache.put((platform, vid), ParseResult.compact(value, (platform, vid)))
+    return cache
+
+
+def measure(entries: int, tmp: str) -> Dict[str, Any]:
+    """测量一种规模"""
+    cache = build_cache(entries)
+    items = cache.items()
+    path = os.path.join(tmp, f'{entries}.vps')
+
+    started = time.perf_counter()
+    cache_snapshot.save_snapshot(items, path)
+    export_ms = (time.perf_counter() - started) * 1e3
+
+    expected = {key: value.to_dict() if isinstance(value, ParseResult) else dict(value) for key, value, _, _ in items}
+    lines = b''.join(json.dumps([list(key), expected[key], stale_at, expires_at], ensure_ascii=False).encode('utf-8')
+                     + b'\n' for key, _, stale_at, expires_at in items)
+
+    started = time.perf_counter()
+    reader = cache_snapshot.SnapshotReader(path)
+    open_ms = (time.perf_counter() - started) * 1e3
+
+    started = time.perf_counter()
+    eager = ResultCache(max_entries=entries)
+    with open(path, 'rb') as f:
+        for key, value, _, _ in cache_snapshot.iter_snapshot(f):
+            eager.put(key, value)
+    eager_ms = (time.perf_counter() - started) * 1e3
+
+    lazy = ResultCache(max_entries=entries, snapshot=reader)
+    sample = random.Random(entries).sample(items, min(SAMPLE, len(items)))
+    started = time.perf_counter()
+    values = [lazy.get(key) for key, _, _, _ in sample]
+    first_us = (time.perf_counter() - started) / len(sample) * 1e6
+    started = time.perf_counter()
+    for key, _, _, _ in sample:
+        lazy.get(key)
+    hit_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    size = os.path.getsize(path)
+    return {
+        'entries': entries,
+        'bytes': size,
+        'bytes_per_entry': round(size / entries, 1),
+        'jsonl_bytes': len(lines),
+        'jsonl_gzip_bytes': len(gzip.compress(lines)),
+        'export_ms': round(export_ms, 1),
+        'open_ms': round(open_ms, 3),
+        'eager_ms': round(eager_ms, 1),
+        'first_lookup_us': round(first_us, 1),
+        'hit_lookup_us': round(hit_us, 1),
+        'roundtrip_ok': values == [expected[key] for key, _, _, _ in sample]
+    }
+
+
+def print_report(rows: List[Dict[str, Any]]):
+    print('\n🧊 结果缓存快照')
+    print(f'{"条目数":>10}{"快照(KB)":>11}{"字节/条目":>10}{"JSONL(KB)":>11}{"JSONL.gz(KB)":>14}{"导出(ms)":>10}'
+          f'{"打开(ms)":>10}{"全量读取(ms)":>14}{"首次查找(µs)":>14}{"命中(µs)":>10}{"一致":>6}')
+    print('-' * 122)
+    for row in rows:
+        print(f'{row["entries"]:>10}{row["bytes"] / 1024:>11.1f}{row["bytes_per_entry"]:>10}'
+              f'{row["jsonl_bytes"] / 1024:>11.1f}{row["jsonl_gzip_bytes"] / 1024:>14.1f}{row["export_ms"]:>10}'
+              f'{row["open_ms"]:>10}{row["eager_ms"]:>14}{row["first_lookup_us"]:>14}{row["hit_lookup_us"]:>10}'
+              f'{"✅" if row["roundtrip_ok"] else "❌":>6}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='结果缓存快照基准测试')
+    arg_parser.add_argument('--entries', default='1000,10000,100000', help='缓存条目数，逗号分隔')
+    arg_parser.add_argument('--check', action='store_true',
+                            help=f'读取结果不一致、快照不小于逐行JSON或打开超过 {MAX_OPEN_MS}ms 时返回非零状态')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.entries.split(',') if size.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [measure(size, tmp) for size in sizes]
+    print_report(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 结果已写入 {args.json}')
+
+    if args.check:
+        failed = [str(row['entries']) for row in rows
+                  if not row['roundtrip_ok'] or row['bytes'] >= row['jsonl_bytes'] or row['open_ms'] > MAX_OPEN_MS]
+        if failed:
+            print(f'\n❌ 未通过的规模: {", ".join(failed)}')
+            return 1
+        print('\n✅ 全部通过')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
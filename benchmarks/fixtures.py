@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试用的录制数据
+把 "域名/路径" 映射到 fixtures 目录下的脱敏页面和接口响应
+"""
+
+import datetime
+import os
+from urllib.parse import urlsplit
+from typing import Optional, Dict, Tuple
+
+import requests
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 页面中的填充位置，替身源站可以在这里插入无关内容，模拟真实页面大小
+PADDING_MARKER = b'<!--PADDING-->'
+
+HTML = 'text/html; charset=utf-8'
+JSON = 'application/json; charset=utf-8'
+
+# 域名+路径（不含查询参数） -> (数据文件, Content-Type)
+ROUTES = {
+    'v.qq.com/x/cover/mcv8hkc8zk8lnov/m4101qychtr.html': ('tencent_cover.html', HTML),
+    'vv.video.qq.com/getinfo': ('tencent_getinfo.jsonp', 'application/javascript; charset=utf-8'),
+    'www.iqiyi.com/v_1fbzh2w5p54.html': ('iqiyi_play.html', HTML),
+    'v.youku.com/v_show/id_XNTkxNjcwMjg0OA==.html': ('youku_show.html', HTML),
+    'v.youku.com/video': ('youku_show.html', HTML),
+    'api.bilibili.com/x/web-interface/view': ('bilibili_view.json', JSON),
+    'www.mgtv.com/b/332759/3567533.html': ('mgtv_play.html', HTML),
+    'pcweb.api.mgtv.com/episode/list': ('mgtv_episodes.json', JSON),
+}
+
+# 各平台的基准测试链接
+PLATFORM_URLS = {
+    'tencent': 'https://v.qq.com/x/cover/mcv8hkc8zk8lnov/m4101qychtr.html',
+    'iqiyi': 'https://www.iqiyi.com/v_1fbzh2w5p54.html',
+    'youku': 'https://v.youku.com/v_show/id_XNTkxNjcwMjg0OA==.html',
+    'bilibili': 'https://www.bilibili.com/video/BV1xx411c7mD',
+    'mgtv': 'https://www.mgtv.com/b/332759/3567533.html',
+}
+
+YOUKU_URLS = [
+    'https://v.youku.com/v_show/id_XNTkxNjcwMjg0OA==.html',
+    'https://v.youku.com/video?vid=XNTkxNjcwMjg0OA==&s=bdfb0949ae4c4ac39168',
+]
+
+_cache = {}
+
+
+def route_key(url: str) -> str:
+    """把请求地址转换为路由键"""
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def make_padding(size: int) -> bytes:
+    """生成指定大小的无关页面内容"""
+    if size <= 0:
+        return b''
+    block = (b'<div class="rec-item"><a href="/x/cover/abcdefghijklmno.html">'
+             b'<img src="https://puui.qpic.cn/placeholder.jpg" alt="recommend"></a></div>\n')
+    return (block * (size // len(block) + 1))[:size]
+
+
+def load_fixture(key: str, pad_bytes: int = 0) -> Optional[Tuple[bytes, str]]:
+    """读取路由对应的数据，返回 (内容, Content-Type)，没有对应数据时返回None"""
+    route = ROUTES.get(key)
+    if route is None:
+        return None
+
+    cache_key = (key, pad_bytes)
+    if cache_key not in _cache:
+        filename, content_type = route
+        with open(os.path.join(FIXTURE_DIR, filename), 'rb') as f:
+            body = f.read()
+        body = body.replace(PADDING_MARKER, make_padding(pad_bytes))
+        _cache[cache_key] = (body, content_type)
+    return _cache[cache_key]
+
+
+def make_response(url: str, pad_bytes: int = 0) -> requests.Response:
+    """构造一个内存中的响应对象"""
+    response = requests.Response()
+    response.url = url
+    response.elapsed = datetime.timedelta(0)
+
+    fixture = load_fixture(route_key(url), pad_bytes)
+    if fixture is None:
+        response.status_code = 404
+        response._content = b'not found'
+        response.headers['Content-Type'] = 'text/plain'
+        return response
+
+    body, content_type = fixture
+    response.status_code = 200
+    response._content = body
+    response.headers['Content-Type'] = content_type
+    response.encoding = 'utf-8'
+    return response
+
+
+class FixtureTransport:
+    """进程内传输：直接返回录制数据，不经过套接字，用于单独测量提取耗时"""
+
+    def __init__(self, pad_bytes: int = 0):
+        self.pad_bytes = pad_bytes
+        self.requests = 0
+
+    def __call__(self, url: str) -> requests.Response:
+        self.requests += 1
+        return make_response(url, self.pad_bytes)
+
+
+def fixture_sizes(pad_bytes: int = 0) -> Dict[str, int]:
+    """各路由数据的字节数"""
+    return {key: len(load_fixture(key, pad_bytes)[0]) for key in ROUTES}
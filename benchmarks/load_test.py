@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并发压力测试
+以设定的到达速率（开环，不等待上一个请求完成）模拟大量客户端，请求本地替身源站：
+
+    parser  直接调用 EnhancedVIPParser.parse_video
+    api     通过HTTP调用进程内启动的无界面解析服务
+    app     通过 streamlit AppTest 走一遍 app.py 的输入、点击、解析流程
+
+按时间窗口输出吞吐、排队延迟、p50/p95/p99、错误率、线程数和连接数，
+依次提高到达速率即可找到系统的饱和拐点
+
+用法:
+    python -m benchmarks.load_test --mode parser --rates 50,100,200,400 --duration 10 --workers 32
+    python -m benchmarks.load_test --mode app --rates 5,10,20 --duration 10 --workers 8
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Optional, Dict, Any, List, Callable
+
+import http_client
+from benchmarks.fixtures import PLATFORM_URLS
+from benchmarks.origin_server import StandInOrigin
+from benchmarks.stats import percentile
+from enhanced_parser import EnhancedVIPParser
+from result_cache import ResultCache, get_default_cache
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+def count_connections() -> Optional[int]:
+    """当前进程打开的套接字数量（仅Linux）"""
+    fd_dir = '/proc/self/fd'
+    if not os.path.isdir(fd_dir):
+        return None
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)).startswith('socket:'):
+                count += 1
+        except OSError:
+            pass
+    return count
+
+
+def make_parser_client(use_cache: bool) -> Callable[[str], bool]:
+    """直接调用解析器"""
+    local = threading.local()
+
+    def call(url: str) -> bool:
+        parser = getattr(local, 'parser', None)
+        if parser is None:
+            parser = EnhancedVIPParser(cache=None if use_cache else ResultCache(max_entries=0))
+            local.parser = parser
+        return bool(parser.parse_video(url).get('success'))
+
+    return call
+
+
+def make_api_client(base_url: str) -> Callable[[str], bool]:
+    """通过HTTP调用解析服务，429也计为错误"""
+
+    def call(url: str) -> bool:
+        query = urllib.parse.urlencode({'url': url})
+        try:
+            with urllib.request.urlopen(f'{base_url}/parse?{query}', timeout=30) as response:
+                return bool(json.loads(response.read()).get('success'))
+        except urllib.error.HTTPError:
+            return False
+
+    return call
+
+
+def make_app_client() -> Callable[[str], bool]:
+    """通过 AppTest 模拟一次完整的页面交互"""
+    from streamlit.testing.v1 import AppTest
+
+    def call(url: str) -> bool:
+        at = AppTest.from_file(APP_PATH, default_timeout=30)
+        at.run()
+        at.text_input[0].input(url)
+        next(button for button in at.button if button.label == '解析视频').click()
+        at.run()
+        return not at.exception and not at.error
+
+    return call
+
+
+class LoadGenerator:
+    """开环压力发生器"""
+
+    def __init__(self, client: Callable[[str], bool], urls: List[str], workers: int = 16,
+                 interval: float = 1.0, seed: int = 1):
+        self.client = client
+        self.urls = urls
+        self.workers = workers
+        self.interval = interval
+        self._random = random.Random(seed)
+        self._queue = queue.Queue()
+        self._records = []
+        self._lock = threading.Lock()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            arrival, url = item
+            start = time.perf_counter()
+            try:
+                ok = self.client(url)
+            except Exception:
+                ok = False
+            end = time.perf_counter()
+            with self._lock:
+                self._records.append((arrival, start, end, ok))
+
+    def run(self, rate: float, duration: float, poisson: bool = True) -> Dict[str, Any]:
+        """以 rate 次/秒 的到达速率运行 duration 秒"""
+        self._records = []
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        samples = []
+        begin = time.perf_counter()
+        next_arrival = begin
+        next_sample = begin + self.interval
+        while True:
+            now = time.perf_counter()
+            if now >= next_sample:
+                samples.append({'t': round(now - begin, 2), 'threads': threading.active_count(),
+                                'connections': count_connections(), 'queued': self._queue.qsize()})
+                next_sample += self.interval
+            if now - begin >= duration:
+                break
+            if now >= next_arrival:
+                self._queue.put((next_arrival, self._random.choice(self.urls)))
+                gap = self._random.expovariate(rate) if poisson else 1.0 / rate
+                next_arrival += gap
+                continue
+            time.sleep(min(next_arrival, next_sample) - now)
+
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+        total_time = time.perf_counter() - begin
+
+        return self._report(rate, begin, total_time, samples)
+
+    def _report(self, rate: float, begin: float, total_time: float,
+                samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """按时间窗口和整体汇总"""
+        windows = []
+        for sample in samples:
+            window_end = begin + sample['t']
+            records = [r for r in self._records if window_end - self.interval <= r[2] < window_end]
+            windows.append(dict(sample, **self._summarize(records, self.interval)))
+
+        overall = self._summarize(self._records, total_time)
+        overall['offered_rate'] = rate
+        overall['windows'] = windows
+        return overall
+
+    @staticmethod
+    def _summarize(records, elapsed: float) -> Dict[str, Any]:
+        if not records:
+            return {'completed': 0, 'throughput': 0.0, 'error_rate': 0.0}
+        latencies = sorted(end - arrival for arrival, _, end, _ in records)
+        queue_delays = sorted(start - arrival for arrival, start, _, _ in records)
+        errors = sum(1 for *_, ok in records if not ok)
+        return {
+            'completed': len(records),
+            'throughput': round(len(records) / elapsed, 2),
+            'error_rate': round(errors / len(records), 4),
+            'queue_p50_ms': round(percentile(queue_delays, 0.50) * 1e3, 2),
+            'queue_p99_ms': round(percentile(queue_delays, 0.99) * 1e3, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1e3, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1e3, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1e3, 2)
+        }
+
+
+def print_step(result: Dict[str, Any], verbose: bool = False):
+    """输出一个速率档位的结果"""
+    if verbose:
+        print(f'{"时间":>6}{"吞吐":>9}{"错误率":>9}{"排队p50":>10}{"p50":>9}{"p99":>10}{"线程":>7}{"连接":>7}{"积压":>7}')
+        for window in result['windows']:
+            print(f'{window["t"]:>6}{window["throughput"]:>9}{window["error_rate"]:>9}'
+                  f'{window.get("queue_p50_ms", "-"):>10}{window.get("p50_ms", "-"):>9}'
+                  f'{window.get("p99_ms", "-"):>10}{window["threads"]:>7}'
+                  f'{str(window["connections"]):>7}{window["queued"]:>7}')
+    print(f'🎯 到达 {result["offered_rate"]:>7}/s  完成 {result["throughput"]:>8}/s  '
+          f'错误率 {result["error_rate"]:.2%}  排队p50 {result.get("queue_p50_ms", 0)}ms  '
+          f'p50 {result.get("p50_ms", 0)}ms  p95 {result.get("p95_ms", 0)}ms  p99 {result.get("p99_ms", 0)}ms')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='并发压力测试')
+    arg_parser.add_argument('--mode', choices=['parser', 'api', 'app'], default='parser', help='压测对象')
+    arg_parser.add_argument('--rates', default='20,50,100', help='依次测试的到达速率（次/秒），逗号分隔')
+    arg_parser.add_argument('--duration', type=float, default=10, help='每个速率档位的持续时间（秒）')
+    arg_parser.add_argument('--workers', type=int, default=16, help='客户端并发数')
+    arg_parser.add_argument('--api-threads', type=int, default=16, help='api模式下解析服务的工作线程数')
+    arg_parser.add_argument('--latency-ms', type=float, default=30, help='替身源站固定延迟（毫秒）')
+    arg_parser.add_argument('--jitter-ms', type=float, default=10, help='替身源站延迟抖动（毫秒）')
+    arg_parser.add_argument('--cache', action='store_true', help='启用解析结果缓存（默认关闭，每次都请求源站）')
+    arg_parser.add_argument('--constant', action='store_true', help='匀速到达（默认泊松到达）')
+    arg_parser.add_argument('--verbose', action='store_true', help='输出每个时间窗口的明细')
+    arg_parser.add_argument('--json', help='把结果写入JSON文件')
+    args = arg_parser.parse_args(argv)
+
+    rates = [float(rate) for rate in args.rates.split(',') if rate.strip()]
+    urls = list(PLATFORM_URLS.values())
+    results = []
+
+    with StandInOrigin(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as origin:
+        http_client.set_origin_override(origin.base_url)
+        api_server = None
+        try:
+            if not args.cache:
+                # app.py 和解析服务使用进程内默认缓存，压测时让每次解析都真正请求源站
+                get_default_cache().max_entries = 0
+
+            if args.mode == 'parser':
+                client = make_parser_client(args.cache)
+            elif args.mode == 'api':
+                from api_server import ParseAPIServer
+                api_server = ParseAPIServer(('127.0.0.1', 0), threads=args.api_threads)
+                threading.Thread(target=api_server.serve_forever, daemon=True).start()
+                client = make_api_client(f'http://127.0.0.1:{api_server.server_address[1]}')
+            else:
+                client = make_app_client()
+
+            generator = LoadGenerator(client, urls, workers=args.workers)
+            print(f'🚀 压测模式: {args.mode}  客户端并发: {args.workers}  '
+                  f'源站延迟: {args.latency_ms}±{args.jitter_ms}ms')
+            for rate in rates:
+                result = generator.run(rate, args.duration, poisson=not args.constant)
+                print_step(result, args.verbose)
+                results.append(result)
+        finally:
+            http_client.set_origin_override(None)
+            if api_server is not None:
+                api_server.shutdown()
+                api_server.server_close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'mode': args.mode, 'workers': args.workers, 'steps': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f'💾 结果已写入 {args.json}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
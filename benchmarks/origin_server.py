@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地替身源站
+以 /<域名>/<路径> 的形式提供录制数据，可配置延迟和抖动
+
+用法:
+    python -m benchmarks.origin_server --port 8765 --latency-ms 30 --jitter-ms 10
+    VIDEO_ORIGIN_OVERRIDE=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List
+
+from benchmarks.fixtures import load_fixture
+
+
+class OriginRequestHandler(BaseHTTPRequestHandler):
+    """替身源站请求处理器"""
+
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，关闭Nagle避免与延迟确认叠加出约40ms的额外延迟
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].lstrip('/')
+        self.server.simulate_latency()
+
+        fixture = load_fixture(path, self.server.pad_bytes)
+        if fixture is None:
+            self._send(404, b'not found', 'text/plain')
+            return
+
+        body, content_type = fixture
+        self._send(200, body, content_type)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.requests += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInOrigin(ThreadingHTTPServer):
+    """带延迟和抖动的本地替身源站"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, pad_bytes: int = 0, seed: Optional[int] = None):
+        super().__init__((host, port), OriginRequestHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.pad_bytes = pad_bytes
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def simulate_latency(self):
+        """按配置的延迟和抖动等待"""
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def start(self) -> 'StandInOrigin':
+        """在后台线程中启动"""
+        self._thread = threading.Thread(target=self.serve_forever, name='stand-in-origin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'StandInOrigin':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='本地替身源站')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency-ms', type=float, default=0, help='固定延迟（毫秒）')
+    arg_parser.add_argument('--jitter-ms', type=float, default=0, help='延迟抖动范围（毫秒）')
+    arg_parser.add_argument('--pad-kb', type=int, default=0, help='在页面中填充的无关内容大小（KB）')
+    args = arg_parser.parse_args(argv)
+
+    server = StandInOrigin(args.host, args.port, args.latency_ms, args.jitter_ms, args.pad_kb * 1024)
+    print(f'🧪 替身源站已启动: {server.base_url}')
+    print(f'   设置 VIDEO_ORIGIN_OVERRIDE={server.base_url} 让解析器请求本地数据')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能回归门禁
+把关键指标记录到版本化的基线文件 benchmarks/baseline.json，之后每次运行与基线对比，
+超出噪声容差的退化会逐项列出并以非零状态码退出，可以直接用于构建流水线
+
+    detect_ops.<解析器>                    平台检测吞吐（次/秒，越高越好）
+    extract_us.<解析器>.<平台>.<页面大小>    内存数据解析耗时（微秒，越低越好）
+    alloc_peak_kb.<解析器>.<平台>          单次解析的内存分配峰值（KB，越低越好）
+    e2e_p50_ms / e2e_p99_ms.<解析器>       经本地替身源站完整解析的延迟（毫秒，越低越好）
+
+用法:
+    python -m benchmarks.regression record     # 记录新基线
+    python -m benchmarks.regression check      # 与基线对比，有退化时退出码为1
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tracemalloc
+from typing import Optional, Dict, Any, List, Tuple
+
+import http_client
+from benchmarks.bench_parsers import build_parsers
+from benchmarks.fixtures import FixtureTransport
+from benchmarks.origin_server import StandInOrigin
+from benchmarks.stats import percentile, time_calls
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# 测量提取耗时用的页面填充大小
+PAGE_SIZES_KB = (0, 256, 1024)
+
+HIGHER = 'higher'
+LOWER = 'lower'
+
+Measurement = Tuple[float, str, str]
+
+
+def measure_detect(parsers) -> Dict[str, Measurement]:
+    """平台检测吞吐"""
+    metrics = {}
+    for name, (parser, _, urls) in parsers.items():
+        detect = getattr(parser, 'detect_platform', None)
+        if detect is None:
+            continue
+        url_list = list(urls.values()) * 20
+        samples = time_calls(lambda: [detect(url) for url in url_list], 20)
+        ops = len(url_list) / statistics.median(samples)
+        metrics[f'detect_ops.{name}'] = (ops, 'ops/s', HIGHER)
+    return metrics
+
+
+def measure_extract(parsers, iterations: int) -> Dict[str, Measurement]:
+    """不同页面大小下的提取耗时"""
+    metrics = {}
+    try:
+        for size_kb in PAGE_SIZES_KB:
+            http_client.set_transport(FixtureTransport(size_kb * 1024))
+            for name, (parser, parse, urls) in parsers.items():
+                for platform_name, url in urls.items():
+                    samples = time_calls(lambda: parse(parser, url), iterations, warmup=1)
+                    metrics[f'extract_us.{name}.{platform_name}.{size_kb}kb'] = (
+                        statistics.median(samples) * 1e6, 'µs', LOWER)
+    finally:
+        http_client.set_transport(None)
+    return metrics
+
+
+def measure_allocations(parsers) -> Dict[str, Measurement]:
+    """单次解析的内存分配峰值"""
+    metrics = {}
+    http_client.set_transport(FixtureTransport(256 * 1024))
+    try:
+        for name, (parser, parse, urls) in parsers.items():
+            for platform_name, url in urls.items():
+                # 先解析一次，让页面数据和正则编译缓存就位
+                parse(parser, url)
+                tracemalloc.start()
+                try:
+                    baseline, _ = tracemalloc.get_traced_memory()
+                    parse(parser, url)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                metrics[f'alloc_peak_kb.{name}.{platform_name}'] = ((peak - baseline) / 1024, 'KB', LOWER)
+    finally:
+        http_client.set_transport(None)
+    return metrics
+
+
+def measure_e2e(parsers, iterations: int) -> Dict[str, Measurement]:
+    """经本地替身源站完整解析的延迟分位数"""
+    metrics = {}
+    with StandInOrigin(latency_ms=5, jitter_ms=1, seed=7) as origin:
+        http_client.set_origin_override(origin.base_url)
+        try:
+            for name, (parser, parse, urls) in parsers.items():
+                samples = []
+                for url in urls.values():
+                    samples.extend(time_calls(lambda: parse(parser, url), iterations, warmup=1))
+                samples.sort()
+                metrics[f'e2e_p50_ms.{name}'] = (percentile(samples, 0.50) * 1e3, 'ms', LOWER)
+                metrics[f'e2e_p99_ms.{name}'] = (percentile(samples, 0.99) * 1e3, 'ms', LOWER)
+        finally:
+            http_client.set_origin_override(None)
+    return metrics
+
+
+def collect(repeats: int = 5, iterations: int = 20) -> Dict[str, Any]:
+    """多次重复测量，每个指标取中位数，并记录相对离散度作为噪声估计"""
+    runs = []
+    for _ in range(repeats):
+        parsers = build_parsers()
+        run = {}
+        run.update(measure_detect(parsers))
+        run.update(measure_extract(parsers, iterations))
+        run.update(measure_allocations(parsers))
+        run.update(measure_e2e(parsers, iterations))
+        runs.append(run)
+
+    metrics = {}
+    for name in runs[0]:
+        values = [run[name][0] for run in runs]
+        median = statistics.median(values)
+        mad = statistics.median(abs(value - median) for value in values)
+        _, unit, better = runs[0][name]
+        metrics[name] = {
+            'value': round(median, 3),
+            'unit': unit,
+            'better': better,
+            # 中位数绝对偏差换算为相对标准差
+            'spread': round(1.4826 * mad / median, 4) if median else 0.0
+        }
+
+    return {
+        'version': BASELINE_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeats': repeats,
+        'metrics': metrics
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.10,
+            noise_factor: float = 3.0) -> List[Dict[str, Any]]:
+    """逐项对比；允许的变化幅度取固定容差和两次测量噪声的较大者"""
+    report = []
+    for name, base in sorted(baseline['metrics'].items()):
+        entry = {'name': name, 'baseline': base['value'], 'unit': base['unit']}
+        cur = current['metrics'].get(name)
+        if cur is None:
+            entry['status'] = 'missing'
+            report.append(entry)
+            continue
+
+        entry['current'] = cur['value']
+        allowed = max(tolerance, noise_factor * math.hypot(base['spread'], cur['spread']))
+        change = (cur['value'] - base['value']) / base['value'] if base['value'] else 0.0
+        worse = -change if base['better'] == HIGHER else change
+
+        entry['change'] = round(change, 4)
+        entry['allowed'] = round(allowed, 4)
+        if worse > allowed:
+            entry['status'] = 'regression'
+        elif worse < -allowed:
+            entry['status'] = 'improved'
+        else:
+            entry['status'] = 'ok'
+        report.append(entry)
+    return report
+
+
+def print_report(report: List[Dict[str, Any]], verbose: bool = False):
+    """输出对比结果"""
+    icons = {'ok': '✅', 'improved': '🚀', 'regression': '❌', 'missing': '⚠️'}
+    for entry in report:
+        if entry['status'] == 'ok' and not verbose:
+            continue
+        if entry['status'] == 'missing':
+            print(f"{icons['missing']} {entry['name']}: 本次运行没有该指标")
+            continue
+        print(f"{icons[entry['status']]} {entry['name']}: {entry['baseline']} -> {entry['current']} "
+              f"{entry['unit']} ({entry['change']:+.1%}, 容差 ±{entry['allowed']:.1%})")
+
+    counts = {}
+    for entry in report:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    print(f"\n📊 共 {len(report)} 项: 正常 {counts.get('ok', 0)}, 提升 {counts.get('improved', 0)}, "
+          f"退化 {counts.get('regression', 0)}, 缺失 {counts.get('missing', 0)}")
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """读取基线文件并检查版本"""
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f'基线文件版本 {baseline.get("version")} 与当前版本 {BASELINE_VERSION} 不一致，请重新记录')
+    return baseline
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='性能回归门禁')
+    arg_parser.add_argument('command', choices=['record', 'check'], help='record 记录基线，check 与基线对比')
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    arg_parser.add_argument('--repeats', type=int, default=5, help='重复测量次数')
+    arg_parser.add_argument('--iterations', type=int, default=20, help='每次测量的调用次数')
+    arg_parser.add_argument('--tolerance', type=float, default=0.10, help='固定容差（比例）')
+    arg_parser.add_argument('--noise-factor', type=float, default=3.0, help='噪声容差倍数')
+    arg_parser.add_argument('--json', help='把本次测量结果写入JSON文件')
+    arg_parser.add_argument('--verbose', action='store_true', help='输出所有指标，包括正常的')
+    args = arg_parser.parse_args(argv)
+
+    current = collect(max(1, args.repeats), max(1, args.iterations))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.command == 'record':
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'💾 已记录 {len(current["metrics"])} 项基线指标到 {args.baseline}')
+        return 0
+
+    report = compare(load_baseline(args.baseline), current, args.tolerance, args.noise_factor)
+    print_report(report, args.verbose)
+    return 1 if any(entry['status'] == 'regression' for entry in report) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
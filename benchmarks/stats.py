@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试统计工具
+"""
+
+import time
+from typing import Dict, Any, List, Callable
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """计算已排序样本的分位数（线性插值）"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    weight = position - lower
+    return sorted_samples[lower] * (1 - weight) + sorted_samples[upper] * weight
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """汇总耗时样本（秒），输出微秒为单位的统计值"""
+    if not samples:
+        return {'n': 0}
+
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'n': len(ordered),
+        'ops_per_s': round(len(ordered) / total, 1) if total > 0 else 0.0,
+        'mean_us': round(total / len(ordered) * 1e6, 2),
+        'p50_us': round(percentile(ordered, 0.50) * 1e6, 2),
+        'p95_us': round(percentile(ordered, 0.95) * 1e6, 2),
+        'p99_us': round(percentile(ordered, 0.99) * 1e6, 2),
+        'max_us': round(ordered[-1] * 1e6, 2)
+    }
+
+
+def time_calls(func: Callable[[], Any], iterations: int, warmup: int = 3) -> List[float]:
+    """重复调用函数并记录每次耗时（秒）"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    clock = time.perf_counter
+    for _ in range(iterations):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    return samples
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, Any]]):
+    """以表格形式输出统计结果"""
+    print(f'\n📊 {title}')
+    print(f'{"名称":<40}{"次数":>8}{"ops/s":>12}{"p50(µs)":>12}{"p95(µs)":>12}{"p99(µs)":>12}')
+    print('-' * 96)
+    for name, row in rows.items():
+        if not row.get('n'):
+            continue
+        print(f'{name:<40}{row["n"]:>8}{row["ops_per_s"]:>12}{row["p50_us"]:>12}'
+              f'{row["p95_us"]:>12}{row["p99_us"]:>12}')
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析结果缓存快照
+把结果缓存导出为一个紧凑的快照文件，新节点或重启后的服务按需从快照中读取，不需要把整个工作集重新向平台请求一遍：
+
+    导出     解析服务的 GET /snapshot（分发模式下按工作进程分别导出再合并），或从共享缓存文件导出
+    加载     VIDEO_CACHE_SNAPSHOT 指向快照文件时，默认缓存在进程内缓存和共享层都未命中后查快照；
+             打开快照只读取文件头和文件尾（mmap），条目在第一次被读取时才解压，之后放入进程内缓存
+    过期     导出时把剩余的软/硬过期时间换算成墙上时钟，加载时已硬过期的条目视为不存在，
+             已软过期的条目照常返回旧结果并在后台刷新
+
+文件格式（版本1，小端）:
+
+    文件头   MAGIC 版本 标志 创建时间 预设字典长度，预设字典
+    条目     键长度 值长度 软过期时刻 硬过期时刻，键（JSON数组），值（使用预设字典的raw deflate压缩的JSON）
+    ...      键长度为0的条目表示条目结束
+    索引     按键哈希排序的 (键哈希, 条目偏移)
+    文件尾   索引偏移 条目数 MAGIC
+
+写入时只顺序输出（索引在最后），可以直接写入管道或HTTP响应；顺序读取（iter_snapshot）不需要索引，
+按键查找（SnapshotReader）在 mmap 上二分查找索引。每个条目单独压缩以便随机读取，
+预设字典取自前面若干条目，同类结果中重复的字段名和取值只在字典中出现一次
+
+用法:
+    python -m cache_snapshot fetch http://127.0.0.1:8000 -o cache.vps
+    python -m cache_snapshot export-shared /var/tmp/video-cache.sqlite -o cache.vps
+    python -m cache_snapshot merge a.vps b.vps -o cache.vps
+    python -m cache_snapshot info cache.vps
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import Optional, Dict, Any, Tuple, Iterable, Iterator, List, BinaryIO
+
+import events
+from parse_result import ParseResult
+
+MAGIC = b'VPSNAP'
+VERSION = 1
+CONTENT_TYPE = 'application/vnd.video-parser.snapshot'
+
+_HEADER = struct.Struct('<6sHHdI')
+_RECORD = struct.Struct('<HIdd')
+_INDEX = struct.Struct('<QQ')
+_FOOTER = struct.Struct('<QI6s')
+
+# 用来构造预设字典的前若干个条目
+DICT_SAMPLE = 64
+# 预设字典长度上限（deflate 窗口为32KB）
+DICT_BYTES = 32 * 1024
+
+_log = events.get_logger('cache_snapshot')
+
+# (键, 结果, 软过期时刻, 硬过期时刻)，时刻为墙上时钟
+Entry = Tuple[Tuple[str, ...], Dict[str, Any], float, float]
+
+
+def _encode_key(key: Tuple[str, ...]) -> bytes:
+    return json.dumps(list(key), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _key_hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _encode_value(value: Dict[str, Any]) -> bytes:
+    if isinstance(value, ParseResult):
+        value = value.to_dict()
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class _CountingWriter:
+    """记录已写入字节数（输出可能是不能 tell() 的管道或套接字）"""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.offset = 0
+
+    def write(self, data: bytes):
+        self.out.write(data)
+        self.offset += len(data)
+
+
+def write_snapshot(entries: Iterable[Entry], out: BinaryIO) -> int:
+    """把条目按快照格式顺序写入 out，返回写入的条目数；已硬过期的条目跳过，同一个键只保留第一个"""
+    now = time.time()
+    entries = iter(entries)
+    sample = []
+    for key, value, stale_at, expires_at in entries:
+        if expires_at > now:
+            sample.append((key, _encode_value(value), stale_at, expires_at))
+            if len(sample) >= DICT_SAMPLE:
+                break
+    # 越靠后的字典内容在压缩时越容易被引用，最常见的放在最后
+    zdict = b''.join(reversed([data for _, data, _, _ in sample]))[-DICT_BYTES:]
+
+    writer = _CountingWriter(out)
+    writer.write(_HEADER.pack(MAGIC, VERSION, 0, now, len(zdict)) + zdict)
+    index = []
+    seen = set()
+
+    def write_record(key, data, stale_at, expires_at):
+        key_bytes = _encode_key(key)
+        if key_bytes in seen:
+            return
+        seen.add(key_bytes)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15, zdict=zdict) if zdict else \
+            zlib.compressobj(6, zlib.DEFLATED, -15)
+        blob = compressor.compress(data) + compressor.flush()
+        index.append((_key_hash(key_bytes), writer.offset))
+        writer.write(_RECORD.pack(len(key_bytes), len(blob), stale_at, expires_at) + key_bytes + blob)
+
+    for record in sample:
+        write_record(*record)
+    for key, value, stale_at, expires_at in entries:
+        if expires_at > now:
+            write_record(key, _encode_value(value), stale_at, expires_at)
+
+    writer.write(_RECORD.pack(0, 0, 0, 0))
+    index.sort()
+    index_offset = writer.offset
+    writer.write(b''.join(_INDEX.pack(key_hash, offset) for key_hash, offset in index))
+    writer.write(_FOOTER.pack(index_offset, len(index), MAGIC))
+    return len(index)
+
+
+def save_snapshot(entries: Iterable[Entry], path: str) -> int:
+    """写入快照文件（先写临时文件再替换，读取旧快照的进程不受影响）"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            count = write_snapshot(entries, f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return count
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('快照文件不完整')
+    return data
+
+
+def _check_header(data: bytes) -> Tuple[float, int]:
+    magic, version, _, created, dict_length = _HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError('不是结果缓存快照')
+    if version != VERSION:
+        raise ValueError(f'不支持的快照版本: {version}')
+    return created, dict_length
+
+
+def _decompress(blob: bytes, zdict: bytes) -> Dict[str, Any]:
+    decompressor = zlib.decompressobj(-15, zdict=zdict) if zdict else zlib.decompressobj(-15)
+    return json.loads(decompressor.decompress(blob) + decompressor.flush())
+
+
+def iter_snapshot(stream: BinaryIO) -> Iterator[Entry]:
+    """顺序读取快照中的条目（不需要索引，可以读取管道或HTTP响应）"""
+    _, dict_length = _check_header(_read_exact(stream, _HEADER.size))
+    zdict = _read_exact(stream, dict_length)
+    while True:
+        key_length, value_length, stale_at, expires_at = _RECORD.unpack(_read_exact(stream, _RECORD.size))
+        if not key_length:
+            return
+        key = tuple(json.loads(_read_exact(stream, key_length)))
+        yield key, _decompress(_read_exact(stream, value_length), zdict), stale_at, expires_at
+
+
+def _platform_of(key: Tuple[str, ...]) -> str:
+    return key[1] if key[0] == 'series' and len(key) > 1 else key[0]
+
+
+class SnapshotReader:
+    """基于 mmap 的快照只读查找：打开时只读取文件头、字典和文件尾，条目在读取时才解压"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size + _FOOTER.size:
+            raise ValueError('快照文件不完整')
+        self.created, dict_length = _check_header(self._map[:_HEADER.size])
+        self._zdict = self._map[_HEADER.size:_HEADER.size + dict_length]
+        self._index_offset, self._count, magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+        if magic != MAGIC or self._index_offset + self._count * _INDEX.size + _FOOTER.size != len(self._map):
+            raise ValueError('快照文件不完整')
+        # 导入后被覆盖或删除的键、平台，之后不再从快照中读取
+        self._discarded = set()
+        self._discarded_platforms = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _find(self, key: Tuple[str, ...]) -> Optional[int]:
+        """二分查找索引，返回条目偏移"""
+        key_bytes = _encode_key(key)
+        key_hash = _key_hash(key_bytes)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if _INDEX.unpack_from(self._map, self._index_offset + middle * _INDEX.size)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+        # 哈希相同的条目相邻，逐个比较键
+        while low < self._count:
+            found_hash, offset = _INDEX.unpack_from(self._map, self._index_offset + low * _INDEX.size)
+            if found_hash != key_hash:
+                return None
+            key_length = _RECORD.unpack_from(self._map, offset)[0]
+            start = offset + _RECORD.size
+            if self._map[start:start + key_length] == key_bytes:
+                return offset
+            low += 1
+        return None
+
+    def _visible(self, key: Tuple[str, ...]) -> bool:
+        return key not in self._discarded and _platform_of(key) not in self._discarded_platforms
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Tuple[Dict[str, Any], float, float]]:
+        """读取条目，返回 (结果, 软过期时刻, 硬过期时刻)（墙上时钟），不存在、已硬过期或已丢弃时返回None"""
+        offset = self._find(key) if self._visible(key) else None
+        if offset is not None:
+            key_length, value_length, stale_at, expires_at = _RECORD.unpack_from(self._map, offset)
+            if expires_at > time.time():
+                start = offset + _RECORD.size + key_length
+                self.hits += 1
+                return _decompress(self._map[start:start + value_length], self._zdict), stale_at, expires_at
+        self.misses += 1
+        return None
+
+    def contains(self, key: Tuple[str, ...]) -> bool:
+        """是否有未硬过期的条目（不解压）"""
+        offset = self._find(key) if self._visible(key) else None
+        return offset is not None and _RECORD.unpack_from(self._map, offset)[3] > time.time()
+
+    def discard(self, key: Tuple[str, ...]):
+        """之后不再从快照中读取这个键（缓存中已有更新的结果或已删除）"""
+        self._discarded.add(key)
+
+    def discard_platform(self, platform: str):
+        self._discarded_platforms.add(platform)
+
+    def items(self) -> Iterator[Entry]:
+        """按文件顺序读取全部未硬过期、未丢弃的条目（用于再次导出）"""
+        now = time.time()
+        offset = _HEADER.size + len(self._zdict)
+        while True:
+            key_length, value_length, stale_at, expires_at = _RECORD.unpack_from(self._map, offset)
+            if not key_length:
+                return
+            start = offset + _RECORD.size
+            offset = start + key_length + value_length
+            key = tuple(json.loads(self._map[start:start + key_length]))
+            if expires_at > now and self._visible(key):
+                yield key, _decompress(self._map[start + key_length:offset], self._zdict), stale_at, expires_at
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, Any]:
+        return {'path': self.path, 'entries': self._count, 'bytes': len(self._map),
+                'created': self.created, 'hits': self.hits, 'misses': self.misses}
+
+
+def open_snapshot(path: str) -> Optional[SnapshotReader]:
+    """打开快照文件，文件不存在或格式不对时记录事件并返回None（不影响启动）"""
+    try:
+        reader = SnapshotReader(path)
+    except (OSError, ValueError) as e:
+        _log.warning('snapshot_load_failed', path=path, error=str(e))
+        return None
+    _log.info('snapshot_loaded', path=path, entries=len(reader), bytes=reader.stats()['bytes'],
+              age_s=round(time.time() - reader.created, 1))
+    return reader
+
+
+def fetch_entries(base_url: str) -> Iterator[Entry]:
+    """从运行中的解析服务读取结果缓存；分发模式下逐个读取各工作进程"""
+    import urllib.error
+    import urllib.request
+    base_url = base_url.rstrip('/')
+    try:
+        with urllib.request.urlopen(f'{base_url}/workers', timeout=10) as response:
+            workers = [worker['name'] for worker in json.loads(response.read())['workers'] if worker['up']]
+    except urllib.error.HTTPError:
+        workers = [None]
+    for worker in workers:
+        request = urllib.request.Request(f'{base_url}/snapshot',
+                                         headers={'X-Video-Worker': worker} if worker else {})
+        with urllib.request.urlopen(request, timeout=300) as response:
+            yield from iter_snapshot(response)
+
+
+def shared_entries(path: str) -> Iterator[Entry]:
+    """读取共享缓存文件（shared_cache.py）中的全部条目"""
+    from shared_cache import SharedCache
+    yield from SharedCache(path).items()
+
+
+def _merged(sources: List[Iterable[Entry]]) -> Iterator[Entry]:
+    for source in sources:
+        yield from source
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='解析结果缓存快照')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    fetch = commands.add_parser('fetch', help='从运行中的解析服务导出')
+    fetch.add_argument('url', help='解析服务地址，如 http://127.0.0.1:8000')
+    fetch.add_argument('-o', '--output', required=True, help='快照文件')
+    shared = commands.add_parser('export-shared', help='从共享缓存文件导出')
+    shared.add_argument('path', help='共享缓存文件（VIDEO_SHARED_CACHE）')
+    shared.add_argument('-o', '--output', required=True, help='快照文件')
+    merge = commands.add_parser('merge', help='合并多个快照（同一个键保留先出现的）')
+    merge.add_argument('inputs', nargs='+', help='快照文件')
+    merge.add_argument('-o', '--output', required=True, help='快照文件')
+    info = commands.add_parser('info', help='查看快照信息')
+    info.add_argument('path', help='快照文件')
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'info':
+        reader = SnapshotReader(args.path)
+        stats = reader.stats()
+        raw = sum(len(_encode_key(key)) + len(_encode_value(value)) for key, value, _, _ in reader.items())
+        stats['json_bytes'] = raw
+        stats['ratio'] = round(raw / stats['bytes'], 2) if stats['bytes'] else 0
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+
+    started = time.perf_counter()
+    if args.command == 'fetch':
+        entries = fetch_entries(args.url)
+    elif args.command == 'export-shared':
+        entries = shared_entries(args.path)
+    else:
+        entries = _merged([SnapshotReader(path).items() for path in args.inputs])
+    count = save_snapshot(entries, args.output)
+    print(f'💾 {count} 个条目已写入 {args.output}（{os.path.getsize(args.output)} 字节，'
+          f'{time.perf_counter() - started:.2f} 秒）')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,111 +6,108 @@
 专门用于解析VIP视频内容，包含多个备用解析接口
 """
 
-import requests
 import re
-import json
 import random
-import time
-from urllib.parse import urlparse, parse_qs, unquote, quote
-from typing import Optional, Dict, Any, List
-import base64
+from urllib.parse import quote
+from typing import Optional, Dict, Any, List, Tuple, Iterable, TYPE_CHECKING
+
+import platforms
+from http_client import fetch
+from lazy_result import LazyParseResult
+from parse_result import ParseResult
+from result_cache import ResultCache, CacheKey, get_default_cache
+from profiling import profiled
+from timings import timed_parse, timed_stage
+
+if TYPE_CHECKING:
+    import requests
+
+# 多个用户代理，随机轮换避免被识别
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15'
+)
+
+# 真实可用的第三方解析接口（按优先级排序）
+PARSE_APIS = (
+    {
+        'name': '线路1-高清稳定',
+        'url': 'https://jx.xmflv.com/?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路2-快速解析',
+        'url': 'https://api.bb3.buzz/jiexi/?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路3-通用解析',
+        'url': 'https://jx.618g.com/?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路4-备用解析',
+        'url': 'https://okjx.cc/?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路5-VIP专用',
+        'url': 'https://www.1717yun.com/jx/ty.php?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路6-无广告',
+        'url': 'https://vip.gaotian.love/api/?key=8CNrwNGWumgOHNK5r3H7jsDJb1XhPp&url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路7-超清画质',
+        'url': 'https://jx.jsonplayer.com/player/?url={}',
+        'type': 'iframe'
+    },
+    {
+        'name': '线路8-极速播放',
+        'url': 'https://jx.bozrc.com:4433/player/?url={}',
+        'type': 'iframe'
+    }
+)
+
+# 优酷专用解析接口
+YOUKU_PARSE_API = {
+    'name': '优酷专用解析器',
+    'url': 'https://jx.xymp4.cc/?url={}',
+    'type': 'iframe'
+}
 
 class EnhancedVIPParser:
-    """强化版VIP视频解析器"""
+    """强化版VIP视频解析器，各平台的解析规则在 platforms 包中"""
     
-    def __init__(self):
-        # 多个用户代理，随机轮换避免被识别
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15'
-        ]
-        
-        # 真实可用的第三方解析接口（按优先级排序）
-        self.parse_apis = [
-            {
-                'name': '线路1-高清稳定',
-                'url': 'https://jx.xmflv.com/?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路2-快速解析',  
-                'url': 'https://api.bb3.buzz/jiexi/?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路3-通用解析',
-                'url': 'https://jx.618g.com/?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路4-备用解析',
-                'url': 'https://okjx.cc/?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路5-VIP专用',
-                'url': 'https://www.1717yun.com/jx/ty.php?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路6-无广告',
-                'url': 'https://vip.gaotian.love/api/?key=8CNrwNGWumgOHNK5r3H7jsDJb1XhPp&url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路7-超清画质',
-                'url': 'https://jx.jsonplayer.com/player/?url={}',
-                'type': 'iframe'
-            },
-            {
-                'name': '线路8-极速播放',
-                'url': 'https://jx.bozrc.com:4433/player/?url={}',
-                'type': 'iframe'
-            }
-        ]
-        
-        # 优酷专用解析接口
-        self.youku_parse_api = {
-            'name': '优酷专用解析器',
-            'url': 'https://jx.xymp4.cc/?url={}',
-            'type': 'iframe'
-        }
-        
-        # 支持的视频平台
-        self.platforms = {
-            'v.qq.com': {
-                'name': '腾讯视频',
-                'parser': self._parse_tencent,
-                'patterns': [r'v\.qq\.com', r'video\.qq\.com']
-            },
-            'iqiyi.com': {
-                'name': '爱奇艺',
-                'parser': self._parse_iqiyi,
-                'patterns': [r'iqiyi\.com', r'www\.iqiyi\.com']
-            },
-            'youku.com': {
-                'name': '优酷',
-                'parser': self._parse_youku,
-                'patterns': [r'youku\.com', r'v\.youku\.com']
-            },
-            'bilibili.com': {
-                'name': 'B站',
-                'parser': self._parse_bilibili,
-                'patterns': [r'bilibili\.com', r'www\.bilibili\.com']
-            },
-            'mgtv.com': {
-                'name': '芒果TV',
-                'parser': self._parse_mgtv,
-                'patterns': [r'mgtv\.com', r'www\.mgtv\.com']
-            }
-        }
-        
-        # 请求会话，保持连接
-        self.session = requests.Session()
+    user_agents = USER_AGENTS
+    parse_apis = PARSE_APIS
+    youku_parse_api = YOUKU_PARSE_API
+    
+    def __init__(self, cache: Optional[ResultCache] = None):
+        # 请求会话在第一次请求时创建
+        self._session = None
         
+        # 解析结果缓存，默认在进程内所有实例间共享
+        self.cache = cache if cache is not None else get_default_cache()
+    
+    @property
+    def session(self) -> 'requests.Session':
+        """请求会话，保持连接（第一次请求时才导入 requests）"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+    
+    def _fetch(self, url: str) -> 'requests.Response':
+        """以随机请求头通过会话请求，供平台插件的抓取计划使用"""
+        return fetch(url, headers=self.get_random_headers(), timeout=10, session=self.session)
+    
     def get_random_headers(self) -> Dict[str, str]:
         """获取随机请求头"""
         return {
@@ -124,17 +121,16 @@ class EnhancedVIPParser:
             'Cache-Control': 'max-age=0'
         }
     
+    @timed_stage('detect')
     def detect_platform(self, url: str) -> Optional[Dict[str, Any]]:
         """检测视频平台"""
-        for platform_key, platform_config in self.platforms.items():
-            for pattern in platform_config['patterns']:
-                if re.search(pattern, url):
-                    return {
-                        'key': platform_key,
-                        'name': platform_config['name'],
-                        'parser': platform_config['parser']
-                    }
-        return None
+        platform = platforms.detect(url)
+        if platform is None:
+            return None
+        return {
+            'key': platform.key,
+            'name': platform.name
+        }
     
     def test_parse_api(self, api_config: Dict[str, str], test_url: str) -> Dict[str, Any]:
         """测试解析接口可用性"""
@@ -142,7 +138,7 @@ class EnhancedVIPParser:
             parse_url = api_config['url'].format(quote(test_url, safe=':/?#[]@!$&\'()*+,;='))
             headers = self.get_random_headers()
             
-            response = self.session.get(parse_url, headers=headers, timeout=10)
+            response = fetch(parse_url, headers=headers, timeout=10, session=self.session)
             
             if response.status_code == 200:
                 # 简单检测是否包含视频相关内容
@@ -193,8 +189,68 @@ class EnhancedVIPParser:
         
         return parse_urls
     
-    def parse_video(self, url: str) -> Dict[str, Any]:
-        """解析视频信息"""
+    def extract_vid_from_url(self, url: str) -> Optional[str]:
+        """不请求网络，仅从URL中提取视频ID，提取不到返回None"""
+        platform_info = self.detect_platform(url)
+        if not platform_info:
+            return None
+        return platforms.extract_id(platform_info['key'], url)
+    
+    def get_cache_key(self, url: str) -> Optional[CacheKey]:
+        """仅根据URL计算缓存键 (平台, 视频ID)，无法从URL得到视频ID时返回None"""
+        vid = self.extract_vid_from_url(url)
+        if not vid:
+            return None
+        
+        key = self.detect_platform(url)['key']
+        if key == 'bilibili.com':
+            # 多P视频的每一P单独缓存
+            page_match = re.search(r'[?&]p=(\d+)', url)
+            if page_match and page_match.group(1) != '1':
+                vid += '?p=' + page_match.group(1)
+        return (key, vid)
+    
+    def parse_lazy(self, url: str) -> LazyParseResult:
+        """返回按需加载的解析结果：能从URL得到的字段立即可用，标题等字段首次访问时才请求网络"""
+        platform_info = self.detect_platform(url)
+        
+        if not platform_info:
+            return LazyParseResult.failed('不支持的视频平台')
+        
+        # 缓存键使用的链接ID，不一定等于解析结果中的 vid（如爱奇艺的页面tvid、B站av号链接的bvid）
+        url_id = self.extract_vid_from_url(url)
+        cache_key = self.get_cache_key(url)
+        if cache_key and self.cache.contains(cache_key):
+            result = self.parse_video(url)
+            if url_id:
+                result['url_id'] = url_id
+            return LazyParseResult.loaded(result)
+        
+        parse_urls = self.get_all_parse_urls(url)
+        cheap = {
+            'success': True,
+            'platform': platform_info['name'],
+            'original_url': url,
+            'vip_content': platforms.get(platform_info['key']).vip_content,
+            'parse_urls': parse_urls,
+            'best_parse_url': parse_urls[0]['url'] if parse_urls else None
+        }
+        if url_id:
+            cheap['url_id'] = url_id
+        # 只有平台从链接直接得到 vid 时（解析时不会被页面中的值覆盖）才不需要请求网络
+        vid = platforms.url_fields(platform_info['key'], url).get('vid')
+        if vid:
+            cheap['vid'] = vid
+        
+        return LazyParseResult(cheap, lambda: self.parse_video(url))
+    
+    @profiled
+    @timed_parse
+    def parse_video(self, url: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """解析视频信息，指定fields时只返回这些字段，并跳过不需要的网络请求；timings=True 时附带分阶段耗时，profile=True 时剖析本次解析"""
+        if fields is not None:
+            return self.parse_lazy(url).project(fields)
+        
         platform_info = self.detect_platform(url)
         
         if not platform_info:
@@ -203,15 +259,73 @@ class EnhancedVIPParser:
                 'error': '不支持的视频平台'
             }
         
+        cache_key = self.get_cache_key(url)
+        if cache_key:
+            found = self.cache.lookup(cache_key)
+            if found:
+                cached, stale = found
+                if stale:
+                    # 已软过期：立即返回旧结果，后台重新解析一次
+                    cached['cache_stale'] = True
+                    self.cache.refresh(cache_key, lambda: self._refresher()._refresh(platform_info, url, cache_key))
+                return self._cached_result(cached, url)
+            return self._parse_and_fill(platform_info, url, cache_key)
+        
+        return self._parse_fresh(platform_info, url, cache_key)
+    
+    def _cached_result(self, cached: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """缓存命中的结果：补上不保存在缓存中的字段"""
+        cached['cache_hit'] = True
+        cached['original_url'] = url
+        cached['parse_urls'] = self.get_all_parse_urls(url)
+        cached['best_parse_url'] = cached['parse_urls'][0]['url'] if cached['parse_urls'] else None
+        return cached
+    
+    def _parse_and_fill(self, platform_info: Dict[str, Any], url: str, cache_key: CacheKey) -> Dict[str, Any]:
+        """缓存未命中时解析；其他进程正在解析同一个视频时等它写入共享缓存，不重复请求源站"""
+        token = self.cache.claim(cache_key)
+        if token is None:
+            cached = self.cache.wait_filled(cache_key)
+            if cached is not None:
+                return self._cached_result(cached, url)
+            # 对方解析失败或超时，自己解析
+            token = self.cache.claim(cache_key)
         try:
-            # 调用对应平台的解析函数
-            result = platform_info['parser'](url)
+            return self._parse_fresh(platform_info, url, cache_key)
+        finally:
+            self.cache.release(cache_key, token)
+    
+    def _refresh(self, platform_info: Dict[str, Any], url: str, cache_key: CacheKey) -> Optional[bool]:
+        """后台刷新，返回是否成功；其他进程已在刷新同一个键时不重复解析，等它写入共享缓存后读回，返回None"""
+        token = self.cache.claim(cache_key)
+        if token is None:
+            self.cache.wait_released(cache_key)
+            return None
+        try:
+            return self._parse_fresh(platform_info, url, cache_key)['success']
+        finally:
+            self.cache.release(cache_key, token)
+    
+    def _refresher(self) -> 'EnhancedVIPParser':
+        """后台刷新使用的解析器：共用缓存，使用自己的请求会话（会话不在线程间共享）"""
+        return type(self)(cache=self.cache)
+    
+    def _parse_fresh(self, platform_info: Dict[str, Any], url: str,
+                     cache_key: Optional[CacheKey]) -> Dict[str, Any]:
+        """不读缓存，按抓取计划解析并写入缓存"""
+        try:
+            # 按平台插件的抓取计划解析
+            result = self._parse_platform(platform_info, url)
             result['platform'] = platform_info['name']
             
             # 添加所有可用的解析链接
             if result['success']:
                 result['parse_urls'] = self.get_all_parse_urls(url)
                 result['best_parse_url'] = result['parse_urls'][0]['url'] if result['parse_urls'] else None
+                
+                if cache_key:
+                    # 解析链接等字段命中时重新生成，缓存中只保留紧凑的结果
+                    self.cache.put(cache_key, ParseResult.compact(result, cache_key))
             
             return result
         except Exception as e:
@@ -220,290 +334,103 @@ class EnhancedVIPParser:
                 'error': f'解析失败: {str(e)}'
             }
     
-    def _parse_tencent(self, url: str) -> Dict[str, Any]:
-        """解析腾讯视频（增强版）"""
-        try:
-            # 多种方式提取视频ID
-            vid = None
-            title = '腾讯视频'
-            
-            # 方式1: 从URL直接提取
-            patterns = [
-                r'vid=([a-zA-Z0-9]+)',
-                r'/([a-zA-Z0-9]+)\.html',
-                r'/cover/[^/]+/([a-zA-Z0-9]+)\.html'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    vid = match.group(1)
-                    break
-            
-            # 方式2: 从页面HTML提取
-            if not vid:
-                try:
-                    headers = self.get_random_headers()
-                    response = self.session.get(url, headers=headers, timeout=10)
-                    if response.status_code == 200:
-                        html = response.text
-                        
-                        # 提取标题
-                        title_match = re.search(r'<title>(.*?)</title>', html)
-                        if title_match:
-                            title = title_match.group(1).replace(' - 腾讯视频', '').strip()
-                        
-                        # 提取vid
-                        vid_patterns = [
-                            r'"vid"\s*:\s*"([^"]+)"',
-                            r'vid=([a-zA-Z0-9]+)',
-                            r'data-vid="([^"]+)"',
-                            r'"id"\s*:\s*"([^"]+)"'
-                        ]
-                        
-                        for pattern in vid_patterns:
-                            match = re.search(pattern, html)
-                            if match:
-                                vid = match.group(1)
-                                break
-                except:
-                    pass
-            
-            if not vid:
-                return {
-                    'success': False,
-                    'error': '无法提取视频ID，请检查链接是否正确'
-                }
-            
-            return {
-                'success': True,
-                'title': title,
-                'duration': '未知',
-                'thumbnail': '',
-                'vid': vid,
-                'original_url': url,
-                'vip_content': True  # 标记为VIP内容
-            }
-            
-        except Exception as e:
+    def parse_series(self, url: str) -> Dict[str, Any]:
+        """解析剧集列表，一次请求获取全部分集，并预先写入每一集的解析结果缓存"""
+        platform_info = self.detect_platform(url)
+        
+        if not platform_info:
             return {
                 'success': False,
-                'error': f'腾讯视频解析错误: {str(e)}'
+                'error': '不支持的视频平台'
             }
-    
-    def _parse_iqiyi(self, url: str) -> Dict[str, Any]:
-        """解析爱奇艺视频（增强版）"""
+        
         try:
-            headers = self.get_random_headers()
-            response = self.session.get(url, headers=headers, timeout=10)
-            
-            title = '爱奇艺视频'
-            vid = ''
-            
-            if response.status_code == 200:
-                html = response.text
-                
-                # 提取标题
-                title_patterns = [
-                    r'<title>(.*?)</title>',
-                    r'"albumName"\s*:\s*"([^"]+)"',
-                    r'data-share-title="([^"]+)"'
-                ]
-                
-                for pattern in title_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        title = match.group(1).replace(' - 爱奇艺', '').strip()
-                        break
-                
-                # 提取视频ID
-                vid_patterns = [
-                    r'data-player-videoid="([^"]+)"',
-                    r'"vid"\s*:\s*"([^"]+)"',
-                    r'albumId[=:](\d+)',
-                    r'"tvId"\s*:\s*(\d+)'
-                ]
-                
-                for pattern in vid_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        vid = match.group(1)
-                        break
-            
-            return {
-                'success': True,
-                'title': title,
-                'duration': '未知',
-                'thumbnail': '',
-                'vid': vid,
-                'original_url': url,
-                'vip_content': True
-            }
-            
+            result = platforms.parse_series(platform_info['key'], url, self._fetch)
         except Exception as e:
             return {
                 'success': False,
-                'error': f'爱奇艺解析错误: {str(e)}'
+                'error': f'剧集解析失败: {str(e)}'
             }
-    
-    def _parse_youku(self, url: str) -> Dict[str, Any]:
-        """解析优酷视频（增强版）"""
-        try:
-            headers = self.get_random_headers()
-            response = self.session.get(url, headers=headers, timeout=10)
-            
-            title = '优酷视频'
-            vid = ''
-            
-            if response.status_code == 200:
-                html = response.text
-                
-                # 提取标题
-                title_match = re.search(r'<title>(.*?)</title>', html)
-                if title_match:
-                    title = title_match.group(1).replace(' - 优酷视频', '').strip()
-                
-                # 提取视频ID
-                vid_patterns = [
-                    r'videoId["\']?\s*:\s*["\']([^"\']+)["\']',
-                    r'vid["\']?\s*:\s*["\']([^"\']+)["\']',
-                    r'/id_([^.]+)\.html'
-                ]
-                
-                for pattern in vid_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        vid = match.group(1)
-                        break
-            
-            return {
-                'success': True,
-                'title': title,
-                'duration': '未知',
-                'thumbnail': '',
-                'vid': vid,
-                'original_url': url,
-                'vip_content': True
-            }
-            
-        except Exception as e:
+        
+        if result is None:
             return {
                 'success': False,
-                'error': f'优酷解析错误: {str(e)}'
+                'error': f'{platform_info["name"]}暂不支持剧集解析'
             }
+        
+        if result['success']:
+            result['platform'] = platform_info['name']
+            self._cache_episode_results(platform_info, result)
+            self.cache.put(('series', platform_info['key'], result['series_id']), result)
+        
+        return result
     
-    def _parse_bilibili(self, url: str) -> Dict[str, Any]:
-        """解析B站视频（增强版）"""
-        try:
-            # B站相对开放，但也有部分VIP内容
-            bv_match = re.search(r'BV([a-zA-Z0-9]+)', url)
-            av_match = re.search(r'av(\d+)', url)
-            
-            if bv_match:
-                bvid = 'BV' + bv_match.group(1)
-                api_url = f'https://api.bilibili.com/x/web-interface/view?bvid={bvid}'
-            elif av_match:
-                aid = av_match.group(1)
-                api_url = f'https://api.bilibili.com/x/web-interface/view?aid={aid}'
-            else:
-                return {
-                    'success': False,
-                    'error': '无法提取B站视频ID'
-                }
-            
-            headers = self.get_random_headers()
-            response = self.session.get(api_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('code') == 0:
-                    video_info = data['data']
-                    
-                    return {
-                        'success': True,
-                        'title': video_info.get('title', 'B站视频'),
-                        'duration': self._format_duration(video_info.get('duration', 0)),
-                        'thumbnail': video_info.get('pic', ''),
-                        'vid': video_info.get('bvid', video_info.get('aid', '')),
-                        'original_url': url,
-                        'vip_content': False  # B站大部分内容免费
-                    }
-            
-            return {
-                'success': False,
-                'error': 'B站API调用失败'
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'B站解析错误: {str(e)}'
-            }
+    def get_series_key(self, url: str) -> Optional[Tuple[str, str, str]]:
+        """仅根据URL计算剧集列表的缓存键"""
+        platform_info = self.detect_platform(url)
+        if not platform_info:
+            return None
+        
+        series_id = platforms.series_id(platform_info['key'], url)
+        if not series_id:
+            return None
+        return ('series', platform_info['key'], series_id)
     
-    def _parse_mgtv(self, url: str) -> Dict[str, Any]:
-        """解析芒果TV（增强版）"""
-        try:
-            headers = self.get_random_headers()
-            response = self.session.get(url, headers=headers, timeout=10)
-            
-            title = '芒果TV'
-            vid = ''
-            
-            if response.status_code == 200:
-                html = response.text
-                
-                # 提取标题
-                title_match = re.search(r'<title>(.*?)</title>', html)
-                if title_match:
-                    title = title_match.group(1).replace(' - 芒果TV', '').strip()
-                
-                # 提取视频ID
-                vid_patterns = [
-                    r'"vid"\s*:\s*"([^"]+)"',
-                    r'vid=([^&]+)',
-                    r'/b/\d+/(\d+)\.html'
-                ]
-                
-                for pattern in vid_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        vid = match.group(1)
-                        break
+    def get_series(self, url: str) -> Dict[str, Any]:
+        """获取剧集列表，优先使用缓存"""
+        series_key = self.get_series_key(url)
+        if series_key:
+            found = self.cache.lookup(series_key)
+            if found:
+                cached, stale = found
+                if stale:
+                    self.cache.refresh(series_key, lambda: self._refresher().parse_series(url)['success'])
+                return cached
+        return self.parse_series(url)
+    
+    def _cache_episode_results(self, platform_info: Dict[str, Any], series: Dict[str, Any]):
+        """把剧集列表中每一集的信息写入解析结果缓存"""
+        vip_content = platforms.get(platform_info['key']).vip_content
+        
+        for episode in series['episodes']:
+            cache_key = self.get_cache_key(episode['url'])
+            if not cache_key:
+                continue
             
-            return {
+            # 原始链接和解析链接在命中时按请求的链接重新生成
+            self.cache.put(cache_key, ParseResult.compact({
                 'success': True,
-                'title': title,
-                'duration': '未知',
-                'thumbnail': '',
-                'vid': vid,
-                'original_url': url,
-                'vip_content': True
-            }
-            
+                'title': episode['title'] or series['title'],
+                'duration': episode.get('duration', '未知'),
+                'thumbnail': episode.get('thumbnail', ''),
+                'vid': episode['vid'],
+                'vip_content': vip_content,
+                'platform': platform_info['name'],
+                'episode': episode['index'],
+                'series_id': series['series_id']
+            }, cache_key))
+    
+    def _parse_platform(self, platform_info: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """执行平台插件的抓取计划（不请求详细信息接口）"""
+        try:
+            result = platforms.run_plan(platform_info['key'], url, self._fetch)
         except Exception as e:
             return {
                 'success': False,
-                'error': f'芒果TV解析错误: {str(e)}'
+                'error': f'{platform_info["name"]}解析错误: {str(e)}'
             }
+        
+        if result['success']:
+            result['original_url'] = url
+        return result
     
     def _format_duration(self, seconds: int) -> str:
         """格式化时长"""
-        if seconds == 0:
-            return "未知"
-        
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        seconds = seconds % 60
-        
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        else:
-            return f"{minutes:02d}:{seconds:02d}"
+        return platforms.format_duration(seconds)
     
     def get_supported_platforms(self) -> List[str]:
         """获取支持的平台列表"""
-        return [config['name'] for config in self.platforms.values()]
+        return platforms.names()
     
     def get_parse_apis_info(self) -> List[Dict[str, str]]:
         """获取解析接口信息"""
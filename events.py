@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结构化事件日志
+解析核心在关键步骤记录事件，每个事件输出一行JSON，包含事件名、级别、视频标识（cid）、
+当前解析已用时间以及开启分阶段计时时各阶段的耗时：
+
+    {"ts": 1700000000.123, "level": "DEBUG", "logger": "youku", "event": "vid_extracted",
+     "cid": "youku:XNjQ4...", "elapsed_ms": 0.41, "source": "url"}
+
+写日志只是把记录放入队列，由后台线程写出，不会阻塞解析；
+调试级别关闭时，热路径上的调用先判断 logger.debug_enabled，不构造任何记录
+
+配置（环境变量）:
+    VIDEO_LOG_LEVEL=DEBUG                       日志级别，默认 WARNING
+    VIDEO_LOG_FILE=/var/log/video-events.jsonl  输出文件，默认标准错误
+    VIDEO_LOG_SAMPLING=youku.vid_extracted=0.01  按事件采样，逗号分隔
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, TextIO
+
+import timings
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# 当前解析的上下文：cid 等公共字段和开始时间
+_scope = contextvars.ContextVar('event_scope', default=None)
+
+
+def _parse_level(value, default: int = WARNING) -> int:
+    if isinstance(value, int):
+        return value
+    return LEVELS.get(str(value or '').upper(), default)
+
+
+def _parse_sampling(value: str) -> Dict[str, float]:
+    """解析 事件=比例,事件=比例 格式的采样配置"""
+    sampling = {}
+    for item in (value or '').split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            try:
+                sampling[name.strip()] = max(0.0, min(1.0, float(rate)))
+            except ValueError:
+                pass
+    return sampling
+
+
+class AsyncJsonHandler:
+    """后台线程把事件写成JSON行，调用方只做一次入队"""
+
+    def __init__(self, stream: Optional[TextIO] = None, path: Optional[str] = None):
+        self._stream = stream
+        self._path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._drained = threading.Condition(self._lock)
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-log-writer', daemon=True)
+                self._thread.start()
+        self._queue.put(record)
+
+    def _open(self) -> TextIO:
+        if self._stream is None:
+            self._stream = open(self._path, 'a', encoding='utf-8') if self._path else sys.stderr
+        return self._stream
+
+    def _run(self):
+        stream = self._open()
+        while True:
+            record = self._queue.get()
+            try:
+                stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                # 队列空了再刷新，突发时合并写入
+                if self._queue.empty():
+                    stream.flush()
+            except Exception:
+                pass
+            with self._lock:
+                self._pending -= 1
+                if not self._pending:
+                    self._drained.notify_all()
+
+    def flush(self, timeout: float = 5.0):
+        """等待已入队的事件全部写出"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._drained.wait(remaining)
+
+
+class EventLogger:
+    """按名称区分的事件记录器"""
+
+    def __init__(self, name: str, manager: 'EventManager'):
+        self.name = name
+        self._manager = manager
+        self.level = manager.level
+        self.debug_enabled = self.level <= DEBUG
+
+    def _refresh(self):
+        self.level = self._manager.level
+        self.debug_enabled = self.level <= DEBUG
+
+    def log(self, level: int, event: str, **fields):
+        if level < self.level:
+            return
+        name = f'{self.name}.{event}'
+        rate = self._manager.sampling.get(name)
+        if rate is not None and random.random() >= rate:
+            return
+
+        record = {
+            'ts': round(time.time(), 6),
+            'level': LEVEL_NAMES.get(level, str(level)),
+            'logger': self.name,
+            'event': event
+        }
+        scope = _scope.get()
+        if scope is not None:
+            fields_in_scope, started = scope
+            record.update(fields_in_scope)
+            record['elapsed_ms'] = round((time.perf_counter() - started) * 1e3, 3)
+        parse_timings = timings.current()
+        if parse_timings is not None:
+            stages = {f'{stage}_ms': round(seconds * 1e3, 3)
+                      for stage, seconds in parse_timings.stages.items() if seconds}
+            if stages:
+                record['timings'] = stages
+        if rate is not None:
+            record['sample_rate'] = rate
+        record.update(fields)
+        self._manager.handler.emit(record)
+
+    def debug(self, event: str, **fields):
+        if self.debug_enabled:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(ERROR, event, **fields)
+
+
+class EventManager:
+    """全局配置：级别、采样和输出"""
+
+    def __init__(self):
+        self.level = _parse_level(os.environ.get('VIDEO_LOG_LEVEL'))
+        self.sampling = _parse_sampling(os.environ.get('VIDEO_LOG_SAMPLING', ''))
+        self.handler = AsyncJsonHandler(path=os.environ.get('VIDEO_LOG_FILE') or None)
+        self._loggers = {}
+        self._lock = threading.Lock()
+
+    def get_logger(self, name: str) -> EventLogger:
+        with self._lock:
+            logger = self._loggers.get(name)
+            if logger is None:
+                logger = self._loggers[name] = EventLogger(name, self)
+        return logger
+
+    def configure(self, level=None, sampling: Optional[Dict[str, float]] = None,
+                  stream: Optional[TextIO] = None, path: Optional[str] = None):
+        if level is not None:
+            self.level = _parse_level(level, self.level)
+        if sampling is not None:
+            self.sampling = dict(sampling)
+        if stream is not None or path is not None:
+            self.handler.flush()
+            self.handler = AsyncJsonHandler(stream=stream, path=path)
+        with self._lock:
+            for logger in self._loggers.values():
+                logger._refresh()
+
+
+_manager = EventManager()
+atexit.register(lambda: _manager.handler.flush())
+
+
+def get_logger(name: str) -> EventLogger:
+    """获取事件记录器"""
+    return _manager.get_logger(name)
+
+
+def configure(level=None, sampling: Optional[Dict[str, float]] = None,
+              stream: Optional[TextIO] = None, path: Optional[str] = None):
+    """修改日志级别、按事件采样比例（{'youku.vid_extracted': 0.01}）或输出位置"""
+    _manager.configure(level, sampling, stream, path)
+
+
+def flush(timeout: float = 5.0):
+    """等待已记录的事件全部写出"""
+    _manager.handler.flush(timeout)
+
+
+@contextlib.contextmanager
+def scope(**fields):
+    """一次解析的日志上下文：期间记录的事件都带上这些字段和已用时间"""
+    token = _scope.set((dict(fields), time.perf_counter()))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def annotate(**fields):
+    """向当前上下文补充字段（如解析出视频ID后补充 cid）"""
+    scope_value = _scope.get()
+    if scope_value is not None:
+        scope_value[0].update(fields)
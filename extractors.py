@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面数据提取
+纯函数：输入响应的原始字节（bytes 或共享内存的 memoryview），返回提取出的字段；
+不请求网络、不依赖解析器实例，既可以在当前线程执行，也可以由 offload 交给子进程执行
+
+正则直接在字节上匹配，只把命中的片段解码为文本，不为整个页面生成一份字符串
+
+上游页面不可信，提取的耗时必须有上限：
+
+    线性模式   正则中没有上限的量词（* + {n,}）改写为最多重复 MAX_REPEAT 次，
+               <title>(.*?)</title> 这类正则在构造的页面上不会退化为平方复杂度，捕获的内容也不会有几MB
+    扫描窗口   每个字段只在页面的前 window 字节中查找（默认 SCAN_WINDOW），如标题只需要看页面开头
+    CPU预算    每个页面按 CHUNK 分段查找，每段之前检查本线程已用的CPU时间，超过 BUDGET 后停止提取，
+               返回已经得到的字段
+
+分段查找时相邻两段重叠一个最长匹配的长度，得到的结果与整体查找相同；
+含 $、\\b、\\B、\\Z 或反向引用的正则在分段边界上可能得到不同的结果，这类正则不分段，整体查找。
+
+线性模式下值比量词上限长的字段（如超过512字节的标题）第一遍不会命中。字段的所有正则都没有命中时，
+对页面中含有其必需字面量的正则把上限放宽 LONG_FACTOR 倍再试一次（分段相应缩小，预算照常检查）；
+比放宽后的上限还长的值仍然提取不到，按默认值处理。剧集列表（extract_tencent_episodes）同样分段查找并受预算限制
+
+配置（环境变量）:
+    VIDEO_EXTRACT_LINEAR=0          关闭线性模式（也不再分段，只在字段之间检查预算）
+    VIDEO_EXTRACT_MAX_REPEAT=256    线性模式下量词的重复上限
+    VIDEO_EXTRACT_LONG_FACTOR=8     字段没有命中时放宽上限重试的倍数，0 表示不重试
+    VIDEO_EXTRACT_WINDOW=8388608    默认扫描窗口（字节）
+    VIDEO_EXTRACT_BUDGET_MS=200     每个页面的CPU时间预算（毫秒），0 表示不限制
+"""
+
+import json
+import os
+import re
+import time
+from typing import Optional, Dict, Any, Tuple, NamedTuple, Sequence, Union, Callable
+
+Body = Union[bytes, bytearray, memoryview]
+
+TITLE_TAG = rb'<title>(.*?)</title>'
+
+LINEAR = os.environ.get('VIDEO_EXTRACT_LINEAR', '1') != '0'
+MAX_REPEAT = int(os.environ.get('VIDEO_EXTRACT_MAX_REPEAT', '256'))
+LONG_FACTOR = int(os.environ.get('VIDEO_EXTRACT_LONG_FACTOR', '8'))
+SCAN_WINDOW = int(os.environ.get('VIDEO_EXTRACT_WINDOW', str(8 * 1024 * 1024)))
+BUDGET = float(os.environ.get('VIDEO_EXTRACT_BUDGET_MS', '200')) / 1000
+CHUNK = 32 * 1024
+
+_JSONP_PREFIX = re.compile(rb'^\s*[\w.$]+\s*=\s*')
+_JSONP_SUFFIX = re.compile(rb';\s*$')
+_TENCENT_EPISODE = rb'\{[^{}]*?"vid"\s*:\s*"([a-zA-Z0-9]{11})"[^{}]*\}'
+# 分集对象的长度上限：[^{}] 不会越过下一个括号，上限只影响单个对象，不影响整体的线性复杂度
+_EPISODE_REPEAT = 4096
+_TENCENT_EPISODE_TITLES = (rb'"playTitle"\s*:\s*"([^"]+)"', rb'"title"\s*:\s*"([^"]+)"')
+_REPEAT = re.compile(rb'\{(\d*)(,?)(\d*)\}')
+
+_compiled = {}
+# 字段的正则组 -> 各正则需要查找的字面量（见 _literal_probes）
+_probes = {}
+# 字面量 -> 只匹配它的正则：sre 查找短字面量比 bytes.find 快，也能直接查找共享内存的 memoryview
+_literals = {}
+
+
+class Field(NamedTuple):
+    """要提取的一个字段：依次尝试各个正则，取第一个命中的第一个分组"""
+    name: str
+    patterns: Tuple[bytes, ...]
+    # 从结果中去掉的后缀，如 ' - 优酷视频'
+    suffix: str = ''
+    strip: bool = False
+    # 只在页面的前 window 字节中查找，0 表示使用 SCAN_WINDOW
+    window: int = 0
+    # 线性模式下量词的重复上限，0 表示使用 MAX_REPEAT
+    max_repeat: int = 0
+    # 最近几乎不命中的正则的序号（见 platforms/ordering.py）：先确认页面中有其必需的字面量才执行正则
+    rare: Tuple[int, ...] = ()
+
+
+class Compiled(NamedTuple):
+    """编译后的正则；span 为最长匹配的长度，无法确定时为None（不分段查找）"""
+    regex: re.Pattern
+    span: Optional[int]
+
+
+def bound_pattern(pattern: bytes, limit: int) -> Tuple[bytes, Optional[int]]:
+    """把没有上限的量词改写为最多重复 limit 次，返回 (改写后的正则, 最长匹配的长度)
+
+    最长匹配的长度为None时不能分段查找：分组重复、前后断言，以及 $、\\b、\\B、\\Z、反向引用
+    （分段的结束位置会被当作页面结尾，这些写法在那里可能匹配）
+    """
+    out = bytearray()
+    span = 0
+    grouped = False
+    anchored = b'(?P=' in pattern
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i:i + 1]
+        if char == b'\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped and (escaped in b'bBZ' or escaped in b'123456789'):
+                anchored = True
+            out += pattern[i:i + 2]
+            span += 1
+            i += 2
+            continue
+        if in_class:
+            if char == b']':
+                in_class = False
+            out += char
+            i += 1
+            continue
+        if char == b'[':
+            in_class = True
+            out += char
+            i += 1
+            # 开头的 ] 是普通字符
+            if pattern[i:i + 1] == b'^':
+                out += b'^'
+                i += 1
+            if pattern[i:i + 1] == b']':
+                out += b']'
+                i += 1
+            span += 1
+            continue
+
+        repeat = None
+        if char in (b'*', b'+'):
+            repeat = (0 if char == b'*' else 1, limit)
+            i += 1
+        elif char == b'{':
+            match = _REPEAT.match(pattern, i)
+            if match and (match.group(1) or match.group(3)):
+                low = int(match.group(1) or 0)
+                high = int(match.group(3)) if match.group(3) else (low if not match.group(2) else max(low, limit))
+                repeat = (low, high)
+                i = match.end()
+        if repeat is None:
+            if char in b'()|?^$':
+                grouped = grouped or (char == b')' and pattern[i + 1:i + 2] in (b'*', b'+', b'{'))
+                anchored = anchored or char == b'$'
+            else:
+                span += 1
+            out += char
+            i += 1
+            continue
+
+        low, high = repeat
+        out += b'{%d,%d}' % (low, high) if low != high else b'{%d}' % low
+        span += high
+        # 惰性（?）和占有（+）后缀原样保留
+        if pattern[i:i + 1] in (b'?', b'+'):
+            out += pattern[i:i + 1]
+            i += 1
+    if (grouped or anchored or b'(?=' in pattern or b'(?!' in pattern
+            or b'(?<' in pattern.replace(b'(?P<', b'')):
+        # 对分组重复或前后断言无法可靠估计匹配长度，结尾断言在分段边界上不可靠，整体查找
+        return bytes(out), None
+    return bytes(out), span
+
+
+_FLAGS = re.compile(rb'\(\?[aiLmsux]')
+
+
+def required_literal(pattern: bytes) -> bytes:
+    """任何匹配中都必然出现的一段字面量（顶层最长的连续普通字符），确定不了时返回 b''
+
+    只看分组之外的部分；有顶层 | 或内联标志（如 (?i)）时返回 b''。结果只用于“页面中没有它就不可能匹配”的判断，
+    宁可短一些也不能多算
+    """
+    if _FLAGS.search(pattern):
+        return b''
+    best = b''
+    run = bytearray()
+    depth = 0
+    literal = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i:i + 1]
+        token = None
+        if char == b'\\':
+            escaped = pattern[i + 1:i + 2]
+            # \d \s \b \1 等不是字面量，转义的标点是
+            if escaped and not escaped.isalnum():
+                token = escaped
+            i += 2
+        elif char == b'[':
+            i += 1
+            if pattern[i:i + 1] == b'^':
+                i += 1
+            if pattern[i:i + 1] == b']':
+                i += 1
+            while i < len(pattern) and pattern[i:i + 1] != b']':
+                i += 2 if pattern[i:i + 1] == b'\\' else 1
+            i += 1
+        elif char in (b'*', b'+', b'?', b'{'):
+            # 量词：作用于字面量字符时，可以出现零次的去掉该字符；无论如何连续的字面量到此为止
+            if char == b'{':
+                match = _REPEAT.match(pattern, i)
+                optional = not match or not match.group(1) or int(match.group(1)) == 0
+                i = match.end() if match else i + 1
+            else:
+                optional = char != b'+'
+                i += 1
+            if literal and depth == 0 and optional:
+                del run[-1:]
+            if len(run) > len(best):
+                best = bytes(run)
+            run.clear()
+            literal = False
+            continue
+        else:
+            if char == b'|' and depth == 0:
+                return b''
+            depth += char == b'('
+            depth -= char == b')'
+            if char not in b'()|.^$':
+                token = char
+            i += 1
+
+        literal = token is not None and depth == 0
+        if literal:
+            run += token
+        else:
+            if len(run) > len(best):
+                best = bytes(run)
+            run.clear()
+    if len(run) > len(best):
+        best = bytes(run)
+    return best
+
+
+def _literal_probes(patterns: Tuple[bytes, ...]) -> Tuple[Tuple[bytes, ...], ...]:
+    """各正则的必需字面量，连同同一字段其他正则中被它包含的（更短的）字面量，短的在前；没有字面量的为空。
+    短的不在页面中时长的也不可能在，如 "vid" 不在页面中时 data-vid=" 和 videoId 都不用再查"""
+    literals = [required_literal(pattern) for pattern in patterns]
+    probes = []
+    for literal in literals:
+        contained = {other for other in literals if other and other in literal} if literal else set()
+        probes.append(tuple(sorted(contained, key=lambda other: (len(other), other))))
+    return tuple(probes)
+
+
+def _compile(pattern: bytes, limit: int = 0) -> Compiled:
+    key = (pattern, limit)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        if LINEAR:
+            rewritten, span = bound_pattern(pattern, limit or MAX_REPEAT)
+            compiled = Compiled(re.compile(rewritten), span)
+        else:
+            compiled = Compiled(re.compile(pattern), None)
+        _compiled[key] = compiled
+    return compiled
+
+
+def compile_fields(fields: Sequence[Field]):
+    """预编译字段中的正则（如加载平台配置时），正则有误时抛出 re.error"""
+    for field in fields:
+        for pattern in field.patterns:
+            _compile(pattern, field.max_repeat)
+
+
+class BudgetExceeded(Exception):
+    """页面的CPU时间预算已用完"""
+
+
+def _deadline(budget: Optional[float]) -> Optional[float]:
+    budget = BUDGET if budget is None else budget
+    return time.thread_time() + budget if budget > 0 else None
+
+
+def _scan(body: Body, compiled: Compiled, window: int = 0, deadline: Optional[float] = None,
+          start: int = 0, chunk: int = CHUNK) -> Optional[re.Match]:
+    """在页面前 window 字节中从 start 开始查找第一个匹配；能确定最长匹配长度时分段查找，每段之前检查预算"""
+    end = min(len(body), window or SCAN_WINDOW)
+    if deadline is not None and time.thread_time() > deadline:
+        raise BudgetExceeded()
+    if compiled.span is None or end - start <= chunk:
+        return compiled.regex.search(body, start, end)
+
+    while start < end:
+        stop = start + chunk
+        match = compiled.regex.search(body, start, min(end, stop + compiled.span))
+        # 从重叠部分开始的匹配留给下一段，保证与整体查找的结果相同
+        if match and match.start() < stop:
+            return match
+        if match is None and stop + compiled.span >= end:
+            return None
+        start = stop
+        if deadline is not None and time.thread_time() > deadline:
+            raise BudgetExceeded()
+    return None
+
+
+def _decode(value: bytes, encoding: str) -> str:
+    return value.decode(encoding or 'utf-8', errors='replace')
+
+
+def search(body: Body, patterns: Sequence[bytes], encoding: str = 'utf-8') -> Optional[str]:
+    """依次尝试各个正则，返回第一个命中的第一个分组，都没有命中返回None"""
+    for pattern in patterns:
+        match = _scan(body, _compile(pattern))
+        if match:
+            return _decode(match.group(1), encoding)
+    return None
+
+
+def _finish(field: Field, value: str) -> str:
+    if field.suffix:
+        value = value.replace(field.suffix, '')
+    if field.strip:
+        value = value.strip()
+    return value
+
+
+def extract_fields(body: Body, fields: Sequence[Field], encoding: str = 'utf-8',
+                   budget: Optional[float] = None) -> Dict[str, str]:
+    """按字段定义提取页面数据，只返回命中的字段；超过CPU时间预算时返回已经提取到的字段"""
+    return extract_fields_tracked(body, fields, encoding, budget=budget)[0]
+
+
+def extract_fields_tracked(body: Body, fields: Sequence[Field], encoding: str = 'utf-8', full: bool = False,
+                           budget: Optional[float] = None
+                           ) -> Tuple[Dict[str, str], Dict[str, Tuple[bool, ...]], bool]:
+    """与 extract_fields 相同，另外返回每个字段依次尝试的正则是否命中（未尝试的不包含在内）
+    和是否因超过预算而提前停止；full=True 时命中后继续尝试其余正则，只用于统计，字段值仍取第一个命中的。
+
+    field.rare 中的正则先在扫描窗口中查找其必需的字面量，没有时记为未命中而不执行正则（不可能匹配），
+    结果与全部执行相同。
+
+    读取线程CPU时间每次约0.3微秒，比在几百字节的页面上查找一次还慢，预算从累计扫描满一段（CHUNK）后才开始计算；
+    预算本来就是每段检查一次，最多晚一段的时间"""
+    budget = BUDGET if budget is None else budget
+    deadline = None
+    scanned = 0
+    size = len(body)
+    result = {}
+    tried = {}
+    # (字面量, 查找范围) -> 是否在页面中，同一页面上每个字面量只查一次
+    found = {}
+
+    def contains_literal(field: Field, index: int) -> Optional[bool]:
+        """页面窗口中是否有字段第 index 个正则必需的字面量，正则没有可用的字面量时返回None"""
+        probes = _probes.get(field.patterns)
+        if probes is None:
+            probes = _probes[field.patterns] = _literal_probes(field.patterns)
+        if not probes[index]:
+            return None
+        end = min(size, field.window or SCAN_WINDOW)
+        for literal in probes[index]:
+            present = found.get((literal, end))
+            if present is None:
+                regex = _literals.get(literal)
+                if regex is None:
+                    regex = _literals[literal] = re.compile(re.escape(literal))
+                present = found[(literal, end)] = regex.search(body, 0, end) is not None
+            if not present:
+                return False
+        return True
+
+    try:
+        for field in fields:
+            name = field.name
+            # 只有全量尝试时逐个记录；否则命中的正则之前都是未命中，最后统一生成
+            flags = [] if full else None
+            rare = () if full else field.rare
+            window = field.window
+            end = window or SCAN_WINDOW
+            if end > size:
+                end = size
+            index = 0
+            for index, pattern in enumerate(field.patterns):
+                if rare and index in rare and contains_literal(field, index) is False:
+                    continue
+                compiled = _compiled.get((pattern, field.max_repeat)) or _compile(pattern, field.max_repeat)
+                if deadline is None and scanned >= CHUNK and budget > 0:
+                    deadline = time.thread_time() + budget
+                if deadline is None and end <= CHUNK:
+                    # 不超过一段时与 _scan 相同，只查找一次，小页面上省去一次函数调用
+                    match = compiled.regex.search(body, 0, end)
+                else:
+                    match = _scan(body, compiled, window, deadline)
+                scanned += end
+                if flags is not None:
+                    flags.append(match is not None)
+                    if match and name not in result:
+                        result[name] = _finish(field, _decode(match.group(1), encoding))
+                elif match:
+                    result[name] = _finish(field, _decode(match.group(1), encoding))
+                    break
+            if flags is not None:
+                tried[name] = tuple(flags)
+            elif name in result:
+                tried[name] = (False,) * index + (True,)
+            else:
+                tried[name] = (False,) * len(field.patterns)
+            if name not in result and LINEAR and LONG_FACTOR > 1:
+                if deadline is None and budget > 0:
+                    deadline = time.thread_time() + budget
+                value = _extract_long(body, field, deadline, contains_literal)
+                if value is not None:
+                    result[name] = _finish(field, _decode(value, encoding))
+        exceeded = False
+    except BudgetExceeded:
+        # 提前停止的字段记录已经尝试过的正则（正在查找的一个不算）
+        if name not in tried:
+            tried[name] = tuple(flags) if flags is not None else (False,) * index
+        exceeded = True
+    return result, tried, exceeded
+
+
+def _extract_long(body: Body, field: Field, deadline: Optional[float],
+                  contains_literal: Callable[[Field, int], Optional[bool]]) -> Optional[bytes]:
+    """字段的所有正则都没有命中时，把改写过的正则的量词上限放宽 LONG_FACTOR 倍再试一次；
+    只试页面中有其必需字面量的正则，分段相应缩小，每段的耗时与第一遍相当"""
+    limit = (field.max_repeat or MAX_REPEAT) * LONG_FACTOR
+    for index, pattern in enumerate(field.patterns):
+        if _compile(pattern, field.max_repeat).regex.pattern == pattern or not contains_literal(field, index):
+            continue
+        match = _scan(body, _compile(pattern, limit), field.window, deadline, chunk=max(1024, CHUNK // LONG_FACTOR))
+        if match:
+            return match.group(1)
+    return None
+
+
+def load_json(body: Body, encoding: str = 'utf-8', select: Sequence[str] = ()) -> Any:
+    """解析JSON或JSONP响应；select 指定只返回其中的某一部分（如 ('data',)），减少跨进程传回的数据"""
+    raw = bytes(body)
+    if raw[:1] not in (b'{', b'['):
+        raw = _JSONP_SUFFIX.sub(b'', _JSONP_PREFIX.sub(b'', raw, count=1), count=1)
+    data = json.loads(raw.decode(encoding or 'utf-8'))
+    for key in select:
+        data = data.get(key) if isinstance(data, dict) else None
+        if data is None:
+            break
+    return data
+
+
+def extract_tencent_episodes(body: Body, cid: str, encoding: str = 'utf-8',
+                             budget: Optional[float] = None) -> Dict[str, Any]:
+    """从腾讯视频cover页面提取剧集标题和分集列表（分集数据以JSON对象形式内嵌在页面中）；
+    与页面字段一样只查找扫描窗口并分段检查CPU预算，超过预算时返回已经得到的分集，exceeded 为True"""
+    deadline = _deadline(budget)
+    title = search(body, (TITLE_TAG,), encoding)
+    compiled = _compile(_TENCENT_EPISODE, _EPISODE_REPEAT)
+    episodes = []
+    seen = set()
+    position = 0
+    exceeded = False
+    try:
+        while True:
+            item = _scan(body, compiled, 0, deadline, start=position)
+            if item is None:
+                break
+            position = item.end()
+            vid = _decode(item.group(1), encoding)
+            if vid in seen:
+                continue
+            seen.add(vid)
+
+            episode_title = search(item.group(0), _TENCENT_EPISODE_TITLES, encoding)
+            episodes.append({
+                'index': len(episodes) + 1,
+                'vid': vid,
+                'title': episode_title or '',
+                'url': f'https://v.qq.com/x/cover/{cid}/{vid}.html'
+            })
+    except BudgetExceeded:
+        exceeded = True
+    return {
+        'title': title.replace(' - 腾讯视频', '').strip() if title is not None else None,
+        'episodes': episodes,
+        'exceeded': exceeded
+    }
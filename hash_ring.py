@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+一致性哈希环
+把缓存键映射到工作进程：每个节点在环上放 replicas 个虚拟节点，键顺时针找到的第一个虚拟节点即为归属节点。
+增删一个节点时只有约 1/N 的键改变归属，其余键仍落在原来的节点上（进程内缓存继续有效）
+
+哈希使用 blake2b 而不是内置 hash()（后者每个进程随机化），同一组节点在不同进程、重启前后得到相同的映射。
+环按“复制后整体替换”更新，查找不加锁
+"""
+
+import bisect
+import hashlib
+import threading
+from typing import Optional, List, Iterable, Tuple
+
+# 每个节点的虚拟节点数，越多负载越均匀，环越大
+DEFAULT_REPLICAS = 160
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """带虚拟节点的一致性哈希环"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = DEFAULT_REPLICAS):
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        # (各虚拟节点的哈希值（升序）, 对应的节点)
+        self._ring: Tuple[List[int], List[str]] = ([], [])
+        self._nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        """加入节点（已在环上时不做任何事）"""
+        with self._lock:
+            if node in self._nodes:
+                return
+            self._nodes.add(node)
+            self._rebuild()
+
+    def remove(self, node: str):
+        """移除节点，原来归属它的键顺延到环上的下一个节点"""
+        with self._lock:
+            if node not in self._nodes:
+                return
+            self._nodes.discard(node)
+            self._rebuild()
+
+    def _rebuild(self):
+        points = sorted((_hash(f'{node}#{index}'), node)
+                        for node in self._nodes for index in range(self.replicas))
+        self._ring = ([point for point, _ in points], [node for _, node in points])
+
+    def get(self, key: str) -> Optional[str]:
+        """键的归属节点，环为空时返回None"""
+        hashes, owners = self._ring
+        if not hashes:
+            return None
+        index = bisect.bisect(hashes, _hash(key))
+        return owners[index if index < len(owners) else 0]
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._nodes
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+统一的HTTP请求入口
+所有解析器都通过 fetch() 请求平台页面和接口，便于把源站整体替换为本地替身服务（离线基准测试）
+
+设置环境变量 VIDEO_ORIGIN_OVERRIDE=http://127.0.0.1:8765 后，
+https://v.qq.com/x/cover/xxx.html 会被改写为 http://127.0.0.1:8765/v.qq.com/x/cover/xxx.html
+
+requests 在第一次请求时才导入（导入本身要几十毫秒），只使用解析器、缓存或进程内传输的进程不需要它
+"""
+
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+from typing import Optional, Dict, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+from metrics import UPSTREAM_REQUESTS, UPSTREAM_SECONDS, UPSTREAM_IN_FLIGHT
+from timings import current as current_timings
+
+_origin_override = os.environ.get('VIDEO_ORIGIN_OVERRIDE', '').rstrip('/') or None
+_transport = None
+
+
+def set_origin_override(base_url: Optional[str]):
+    """设置替身源站地址，传入None恢复直连"""
+    global _origin_override
+    _origin_override = base_url.rstrip('/') if base_url else None
+
+
+def set_transport(transport: Optional[Callable[[str], 'requests.Response']]):
+    """设置进程内传输函数（不经过网络直接返回响应），传入None恢复正常请求"""
+    global _transport
+    _transport = transport
+
+
+def rewrite_url(url: str) -> str:
+    """按替身源站设置改写请求地址"""
+    if not _origin_override:
+        return url
+
+    parts = urlsplit(url)
+    target = f'{_origin_override}/{parts.netloc}{parts.path or "/"}'
+    if parts.query:
+        target += '?' + parts.query
+    return target
+
+
+_TimedResponse = None
+
+
+def _timed_response_class() -> type:
+    """开启分阶段计时时使用的响应类（requests.Response 的子类，第一次使用时创建）"""
+    global _TimedResponse
+    if _TimedResponse is not None:
+        return _TimedResponse
+    import requests
+
+    class TimedResponse(requests.Response):
+        """记录解码和JSON解析耗时，解码结果只计算一次"""
+
+        @property
+        def text(self) -> str:
+            text = self.__dict__.get('_decoded_text')
+            if text is None:
+                start = time.perf_counter()
+                text = self._decoded_text = super().text
+                self._timings.add('decode', time.perf_counter() - start)
+            return text
+
+        def json(self, **kwargs):
+            text = self.text
+            start = time.perf_counter()
+            try:
+                return json.loads(text, **kwargs)
+            except json.JSONDecodeError as e:
+                raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
+            finally:
+                self._timings.add('json', time.perf_counter() - start)
+
+    _TimedResponse = TimedResponse
+    return TimedResponse
+
+
+def _get(session: Optional['requests.Session']) -> Callable:
+    if session is not None:
+        return session.get
+    import requests
+    return requests.get
+
+
+def _timed_fetch(timings, url: str, headers: Optional[Dict[str, str]], timeout: float,
+                 session: Optional['requests.Session']) -> 'requests.Response':
+    """带分阶段计时的请求：收到响应头之前计入 connect，读取响应体计入 transfer"""
+    start = time.perf_counter()
+    if _transport is not None:
+        response = _transport(url)
+        headers_received = start
+    else:
+        response = _get(session)(rewrite_url(url), headers=headers, timeout=timeout, stream=True)
+        headers_received = time.perf_counter()
+    content = response.content
+    finished = time.perf_counter()
+
+    timings.add('connect', headers_received - start)
+    timings.add('transfer', finished - headers_received)
+    timings.bytes_received += len(content or b'')
+    timings.requests += 1
+
+    response.__class__ = _timed_response_class()
+    response._timings = timings
+    return response
+
+
+def _send(url: str, headers: Optional[Dict[str, str]], timeout: float,
+          session: Optional['requests.Session']) -> 'requests.Response':
+    timings = current_timings()
+    if timings is not None:
+        return _timed_fetch(timings, url, headers, timeout, session)
+
+    if _transport is not None:
+        return _transport(url)
+
+    return _get(session)(rewrite_url(url), headers=headers, timeout=timeout)
+
+
+def _is_timeout(error: Exception) -> bool:
+    # 请求失败时 requests 一定已经导入
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(error, requests.Timeout)
+
+
+def fetch(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10,
+          session: Optional['requests.Session'] = None) -> 'requests.Response':
+    """发起GET请求，按域名和状态码记入请求指标"""
+    host = urlsplit(url).netloc
+    status = 'error'
+    UPSTREAM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        response = _send(url, headers, timeout, session)
+        status = str(response.status_code)
+        return response
+    except Exception as e:
+        if _is_timeout(e):
+            status = 'timeout'
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        UPSTREAM_REQUESTS.labels(host, status).inc()
+        UPSTREAM_SECONDS.labels(host).observe(time.perf_counter() - start)
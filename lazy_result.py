@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按需加载的解析结果
+平台、链接ID（url_id，即缓存键使用的视频ID）、解析链接等字段直接从URL得到；标题、时长、缩略图等
+需要请求网络的字段在首次访问时才加载，并且只加载一次。
+vid 只有在平台能从链接直接得到时才不需要加载，否则以解析结果为准
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, Callable, Iterable
+
+# 需要请求网络才能得到的字段
+EXPENSIVE_FIELDS = ('title', 'duration', 'thumbnail')
+
+
+class LazyParseResult(Mapping):
+    """按需加载的解析结果，可以像dict一样访问"""
+
+    def __init__(self, data: Dict[str, Any],
+                 loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        self._data = dict(data)
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    @classmethod
+    def failed(cls, error: str) -> 'LazyParseResult':
+        """构造一个失败的结果"""
+        return cls({'success': False, 'error': error})
+
+    @classmethod
+    def loaded(cls, result: Dict[str, Any]) -> 'LazyParseResult':
+        """用完整的解析结果构造，不再需要加载"""
+        return cls(result)
+
+    @property
+    def is_loaded(self) -> bool:
+        """是否已经完成完整解析"""
+        return self._loader is None
+
+    def load(self):
+        """执行完整解析，补全所有字段"""
+        with self._lock:
+            if self._loader is None:
+                return
+
+            result = self._loader()
+            self._loader = None
+            if result.get('success'):
+                # 已经返回过的字段保持不变
+                for key, value in result.items():
+                    self._data.setdefault(key, value)
+            else:
+                self._data['success'] = False
+                self._data['error'] = result.get('error', '解析失败')
+
+    def project(self, fields: Iterable[str]) -> Dict[str, Any]:
+        """只取出指定字段；全部字段都能从URL得到时不会请求网络"""
+        projected = {}
+        for field in fields:
+            if field in self:
+                value = self.get(field)
+                if value is not None:
+                    projected[field] = value
+
+        projected['success'] = self._data['success']
+        if 'error' in self._data:
+            projected['error'] = self._data['error']
+        return projected
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._data and self._loader is not None:
+            self.load()
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._data:
+            return True
+        return self._loader is not None and (key in EXPENSIVE_FIELDS or key == 'vid')
+
+    def __iter__(self):
+        keys = list(self._data)
+        if self._loader is not None:
+            keys.extend(field for field in EXPENSIVE_FIELDS + ('vid',) if field not in self._data)
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def __repr__(self) -> str:
+        state = '已加载' if self.is_loaded else '未加载'
+        return f'<LazyParseResult {state} {self._data!r}>'
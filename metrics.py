@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程内指标注册表
+解析器、请求层和缓存把计数和耗时上报到这里，由解析服务的 GET /metrics
+或应用进程的独立端口（环境变量 VIDEO_METRICS_PORT）以Prometheus文本格式导出
+
+计数器和直方图按线程分片累加，写入时不加锁，只在导出时汇总；
+已结束线程的分片在有新线程第一次写入时和导出时合并，
+不导出指标的进程（如没有设置 VIDEO_METRICS_PORT 的Streamlit应用）中分片数也不会随线程数增长。
+独立指标端口用到的 http.server 在 start_http_server() 中才导入
+"""
+
+import bisect
+import os
+import threading
+from typing import Optional, List, Tuple, Callable, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 默认延迟直方图桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _ShardedCells:
+    """按线程分片的累加单元，每个线程只写自己的分片"""
+
+    __slots__ = ('_size', '_local', '_cells', '_retired', '_lock')
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells = []
+        self._retired = [0] * size
+        self._lock = threading.Lock()
+
+    def cell(self) -> list:
+        """当前线程的分片；新线程登记时顺带合并已结束线程的分片"""
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self._size
+            with self._lock:
+                self._retire_dead()
+                self._cells.append((threading.current_thread(), cell))
+            return cell
+
+    def _retire_dead(self):
+        """把已结束线程的分片累加到 _retired 并移除（调用方持有锁）"""
+        alive = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                alive.append((thread, cell))
+            else:
+                for index, value in enumerate(cell):
+                    self._retired[index] += value
+        self._cells = alive
+
+    def totals(self) -> list:
+        """汇总所有分片，顺带把已结束线程的分片合并掉"""
+        with self._lock:
+            self._retire_dead()
+            totals = list(self._retired)
+            for _, cell in self._cells:
+                for index, value in enumerate(cell):
+                    totals[index] += value
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ('_cells',)
+
+    def __init__(self):
+        self._cells = _ShardedCells(1)
+
+    def inc(self, amount: float = 1):
+        self._cells.cell()[0] += amount
+
+    def get(self) -> float:
+        return self._cells.totals()[0]
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_function', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """导出时调用函数取值"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception:
+                return float('nan')
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_cells')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        # 各桶计数 + 总和
+        self._cells = _ShardedCells(len(bounds) + 2)
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    def get(self) -> Tuple[List[int], int, float]:
+        """返回 (累计桶计数, 总次数, 总和)"""
+        totals = self._cells.totals()
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Metric:
+    """带标签的指标族"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """取指定标签值的子指标；热路径上可以保存返回值重复使用"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} 需要标签 {self.labelnames}')
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def collect(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._collect_child(values, child))
+        return lines
+
+    def _collect_child(self, values, child) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}']
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def get(self) -> float:
+        return self._default.get()
+
+
+class Histogram(_Metric):
+    """分桶统计的耗时分布"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _collect_child(self, values, child) -> List[str]:
+        cumulative, count, total = child.get()
+        names = self.labelnames + ('le',)
+        lines = []
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), cumulative):
+            labels = _format_labels(names, values + (_format_value(float(bound)),))
+            lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_count{labels} {count}')
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表：按名称获取或创建指标，导出为Prometheus文本格式"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f'指标 {name} 已注册为 {metric.kind}')
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """导出全部指标"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _count_open_sockets() -> float:
+    """当前进程打开的套接字数量（仅Linux）"""
+    fd_dir = '/proc/self/fd'
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)).startswith('socket:'):
+                count += 1
+        except OSError:
+            pass
+    return count
+
+
+# 解析器、请求层和缓存共用的指标
+PARSES = REGISTRY.counter('video_parses_total', '解析次数', ('platform', 'outcome'))
+PARSE_SECONDS = REGISTRY.histogram('video_parse_duration_seconds', '解析耗时', ('platform',))
+UPSTREAM_REQUESTS = REGISTRY.counter('video_upstream_requests_total', '请求平台页面和接口的次数',
+                                     ('host', 'status'))
+UPSTREAM_SECONDS = REGISTRY.histogram('video_upstream_request_duration_seconds', '请求平台页面和接口的耗时',
+                                      ('host',))
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge('video_upstream_requests_in_flight', '正在进行的上游请求数')
+CACHE_REQUESTS = REGISTRY.counter('video_cache_requests_total', '结果缓存读取次数', ('cache', 'result'))
+CACHE_EVICTIONS = REGISTRY.counter('video_cache_evictions_total', '结果缓存因容量淘汰的条目数', ('cache',))
+CACHE_ENTRIES = REGISTRY.gauge('video_cache_entries', '结果缓存当前条目数', ('cache',))
+CACHE_REFRESHES = REGISTRY.counter('video_cache_refreshes_total', '结果缓存软过期后的后台刷新次数', ('cache', 'result'))
+OPEN_SOCKETS = REGISTRY.gauge('process_open_sockets', '进程打开的套接字数量')
+
+if os.path.isdir('/proc/self/fd'):
+    OPEN_SOCKETS.set_function(_count_open_sockets)
+
+
+def start_http_server(port: int, host: str = '0.0.0.0',
+                      registry: MetricsRegistry = REGISTRY) -> 'ThreadingHTTPServer':
+    """在后台线程中启动独立的指标端口（供没有自己HTTP接口的进程使用，如Streamlit应用）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        """只提供 /metrics 的请求处理器"""
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
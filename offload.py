@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大页面提取放到子进程执行
+多MB的页面做正则和JSON解析会长时间持有GIL，同一进程里的其他解析线程和Streamlit/API线程都要等待。
+页面超过阈值时，把响应字节写入一块共享内存，由进程池中的进程映射同一块内存执行 extractors 中的提取函数，
+只把提取出的字段传回；较小的页面直接在当前线程提取，省掉跨进程的开销
+（提取直接在字节上进行，1MB页面通常不到1毫秒，跨进程一次的固定开销反而更大）
+
+解析线程等待子进程结果时不持有GIL，其他线程的网络请求照常进行。
+子进程由forkserver派生，启动时会按multiprocessing的规则导入主模块，
+直接运行的脚本需要用 if __name__ == '__main__' 保护入口代码。
+multiprocessing 和 concurrent.futures 在第一次遇到大页面时才导入
+
+配置（环境变量）:
+    VIDEO_OFFLOAD_BYTES=4194304   超过该大小（默认4MB）的页面交给子进程，0 表示全部在当前线程提取
+    VIDEO_OFFLOAD_WORKERS=2       进程数，默认 CPU 核数（最多4个）
+"""
+
+import os
+import threading
+from typing import Optional, Callable, Any, TYPE_CHECKING
+
+from metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    import requests
+
+EXTRACTIONS = REGISTRY.counter('video_extractions_total', '页面数据提取次数', ('mode',))
+EXTRACTED_BYTES = REGISTRY.counter('video_extracted_bytes_total', '页面数据提取处理的字节数', ('mode',))
+
+_threshold = int(os.environ.get('VIDEO_OFFLOAD_BYTES', str(4 * 1024 * 1024)) or 0)
+_workers = int(os.environ.get('VIDEO_OFFLOAD_WORKERS', '0') or 0) or min(4, os.cpu_count() or 1)
+_pool = None
+_pool_lock = threading.Lock()
+# 进程池连续损坏的次数，达到上限后不再使用子进程（例如主模块无法在子进程中导入）
+_broken = 0
+MAX_BROKEN = 3
+_inline = (EXTRACTIONS.labels('inline'), EXTRACTED_BYTES.labels('inline'))
+_process = (EXTRACTIONS.labels('process'), EXTRACTED_BYTES.labels('process'))
+
+
+def configure(threshold: Optional[int] = None, workers: Optional[int] = None):
+    """修改交给子进程的页面大小阈值（0 关闭）和进程数，修改进程数会重建进程池"""
+    global _threshold, _workers
+    if threshold is not None:
+        _threshold = max(0, int(threshold))
+    if workers is not None and max(1, int(workers)) != _workers:
+        _workers = max(1, int(workers))
+        shutdown()
+
+
+def _mp_context():
+    import multiprocessing
+    # 多线程进程里直接fork不安全，优先用forkserver，由一个干净的进程派生工作进程
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['extractors'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool() -> 'ProcessPoolExecutor':
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=_mp_context())
+    return _pool
+
+
+def shutdown():
+    """关闭进程池，下次需要时重新创建"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_shared(func: Callable, name: str, size: int, args: tuple, kwargs: dict) -> Any:
+    """在子进程中映射共享内存并执行提取函数"""
+    from multiprocessing.shared_memory import SharedMemory
+    shm = SharedMemory(name=name)
+    try:
+        view = shm.buf[:size]
+        try:
+            return func(view, *args, **kwargs)
+        finally:
+            view.release()
+    finally:
+        shm.close()
+
+
+def run(func: Callable, body: bytes, *args, **kwargs) -> Any:
+    """执行 func(body, *args, **kwargs)：大页面在子进程中执行，其余在当前线程执行"""
+    global _broken
+    size = len(body)
+    if not _threshold or size < _threshold or _broken >= MAX_BROKEN:
+        _inline[0].inc()
+        _inline[1].inc(size)
+        return func(body, *args, **kwargs)
+
+    from concurrent.futures.process import BrokenProcessPool
+    from multiprocessing.shared_memory import SharedMemory
+    shm = SharedMemory(create=True, size=size)
+    try:
+        shm.buf[:size] = body
+        try:
+            result = _get_pool().submit(_run_shared, func, shm.name, size, args, kwargs).result()
+        except BrokenProcessPool:
+            # 工作进程异常退出（如被OOM杀掉），重建进程池，这一次在当前线程完成
+            _broken += 1
+            shutdown()
+            _inline[0].inc()
+            _inline[1].inc(size)
+            return func(body, *args, **kwargs)
+    finally:
+        shm.close()
+        shm.unlink()
+    _broken = 0
+    _process[0].inc()
+    _process[1].inc(size)
+    return result
+
+
+def extract(response: 'requests.Response', func: Callable, *args, **kwargs) -> Any:
+    """对响应体执行提取函数，按响应声明的编码解码提取出的文本"""
+    kwargs.setdefault('encoding', response.encoding or 'utf-8')
+    return run(func, response.content, *args, **kwargs)
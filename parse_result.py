@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的解析结果
+结果缓存里长期保存的条目用 ParseResult 存放：常用字段放在 __slots__ 中，不为每条结果建dict；
+平台名、时长、清晰度列表这类重复取值会被驻留，所有条目共用同一个对象；
+解析链接可以由原始链接随时生成，缓存中不保存，命中后由解析器重新计算
+
+ParseResult 支持 result['title']、result.get('thumbnail')、'vid' in result 等dict式访问，
+需要普通dict时（写JSON、交给页面）调用 to_dict()
+"""
+
+import sys
+import threading
+from collections.abc import MutableMapping
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+# 缓存条目中常见的字段放在 __slots__ 中（每个槽位即使为空也占8字节），其余字段放在 _extra 中
+FIELDS = (
+    'success', 'error', 'title', 'duration', 'thumbnail', 'vid', 'platform', 'vip_content',
+    'episode', 'series_id'
+)
+
+# 可以由原始链接重新生成、不需要进入缓存的字段
+DERIVED_FIELDS = ('parse_urls', 'best_parse_url', 'original_url', 'cache_hit', 'timings', 'profile')
+
+# 取值集合很小、值得驻留的字符串字段
+_INTERNED_FIELDS = frozenset(('platform', 'platform_special', 'duration', 'thumbnail'))
+
+_FIELD_SET = frozenset(FIELDS)
+
+_MISSING = object()
+
+_quality_options = {}
+_quality_lock = threading.Lock()
+
+
+def intern_options(options: Iterable[str]) -> tuple:
+    """把清晰度列表转换为共享的元组，相同的列表只保存一份"""
+    key = tuple(sys.intern(str(option)) for option in options)
+    shared = _quality_options.get(key)
+    if shared is None:
+        with _quality_lock:
+            shared = _quality_options.setdefault(key, key)
+    return shared
+
+
+def _compact_value(field: str, value: Any) -> Any:
+    if field in _INTERNED_FIELDS and type(value) is str:
+        return sys.intern(value)
+    if field == 'quality_options' and isinstance(value, (list, tuple)):
+        return intern_options(value)
+    return value
+
+
+class ParseResult(MutableMapping):
+    """按字段存放的解析结果，可以像dict一样读写"""
+
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **fields):
+        self._extra = None
+        if data:
+            self.update(data)
+        if fields:
+            self.update(fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], exclude: Iterable[str] = ()) -> 'ParseResult':
+        """由解析结果dict构造，exclude 中的字段不保存"""
+        result = cls()
+        exclude = frozenset(exclude)
+        for key, value in data.items():
+            if key not in exclude:
+                result[key] = value
+        return result
+
+    @classmethod
+    def compact(cls, data: Dict[str, Any], key: Optional[tuple] = None) -> 'ParseResult':
+        """构造用于缓存的结果：去掉可以重新生成的字段；视频ID与缓存键中的相同时共用键里的字符串"""
+        result = cls.from_dict(data, DERIVED_FIELDS)
+        if key and getattr(result, 'vid', None) == key[-1]:
+            result.vid = key[-1]
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通dict，清晰度列表还原为list"""
+        data = {}
+        for key, value in self.items():
+            data[key] = list(value) if key == 'quality_options' and isinstance(value, tuple) else value
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        value = _compact_value(key, value)
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+                return
+            except AttributeError:
+                pass
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+            return
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra is not None:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        count = sum(1 for field in FIELDS if hasattr(self, field))
+        return count + (len(self._extra) if self._extra is not None else 0)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ParseResult, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'ParseResult({dict(self.items())!r})'
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频平台插件
+平台的声明式规则在配置文件中（见 platforms/config.py，默认 platforms/platforms.json）：
+
+    hosts          域名规则（注册顺序即检测顺序）
+    url_fields     从链接中直接得到的字段（如视频ID），不需要请求网络
+    id_patterns    缓存键使用的视频ID规则
+    page           页面字段的提取规则
+    defaults       提取不到时使用的默认值
+    vip_content    是否为VIP内容
+    series_pattern 剧集ID规则（可选）
+
+配置中的 module 指向本包中的一个模块，模块声明需要代码的部分：
+
+    FETCH_PLAN     按顺序执行的抓取步骤（页面、接口），每一步说明请求哪个地址、用哪个提取函数
+    REQUIRED       解析成功必须得到的字段，缺少时返回 ERROR
+    parse_series   剧集解析（可选）
+
+平台模块在第一次遇到该平台的链接时才导入；
+VideoParser、EnhancedVIPParser、YoukuFixer、YoukuPreferredParser 都通过这里检测平台和执行抓取，
+创建解析器实例不再需要为每个平台构造配置
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional, Dict, Any, Callable, List, NamedTuple, Tuple
+from urllib.parse import unquote
+
+import events
+import offload
+from extractors import extract_fields_tracked
+from metrics import REGISTRY
+from platforms.config import ConfigStore, PlatformConfig, PlatformSpec
+from platforms.ordering import STATS
+
+# 抓取函数：输入请求地址，返回响应，由解析器提供（各自的请求头、会话）
+Fetch = Callable[[str], Any]
+
+
+class Step(NamedTuple):
+    """抓取计划中的一步"""
+    # 请求地址模板，{url} 为原始链接，其余占位符为已得到的字段；缺少字段时跳过这一步
+    url: str
+    # 提取函数 func(响应字节, *args, encoding=...)，返回字段dict；为None时按配置中的 page 规则提取页面字段
+    extract: Optional[Callable[..., Dict[str, Any]]] = None
+    args: tuple = ()
+    # 这些字段都已得到时跳过这一步
+    skip_if: Tuple[str, ...] = ()
+    # 补充详细信息（时长、缩略图）的步骤，只在解析器要求时执行
+    detail: bool = False
+    # 请求出错时忽略这一步，而不是让整个解析失败
+    optional: bool = False
+
+
+BUDGET_EXCEEDED = REGISTRY.counter('video_extract_budget_exceeded_total', '超过CPU时间预算而提前停止的页面提取次数',
+                                   ('platform',))
+
+_log = events.get_logger('platforms')
+
+# page_required 时播放页返回非200的错误信息
+PAGE_ERROR = '获取页面失败'
+
+STORE = ConfigStore()
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+def current() -> PlatformConfig:
+    """当前生效的平台配置；一次解析中应只取一次，保证前后使用同一版本"""
+    return STORE.current()
+
+
+def registry() -> Tuple[PlatformSpec, ...]:
+    """按检测顺序排列的全部平台"""
+    return current().platforms
+
+
+def detect(url: str) -> Optional[PlatformSpec]:
+    """检测链接所属的平台，不支持的链接返回None"""
+    return current().detect(url)
+
+
+def get(key: str) -> PlatformSpec:
+    """按平台键获取配置"""
+    return current().by_key[key]
+
+
+def names() -> List[str]:
+    """支持的平台名称"""
+    return [spec.name for spec in registry()]
+
+
+def load(key: str) -> ModuleType:
+    """导入平台的抓取计划模块，只在第一次使用该平台时导入"""
+    module_name = get(key).module
+    module = _modules.get(module_name)
+    if module is None:
+        with _modules_lock:
+            module = _modules.get(module_name)
+            if module is None:
+                module = _modules[module_name] = importlib.import_module(f'{__name__}.{module_name}')
+    return module
+
+
+def on_change(callback: Callable[[List[str]], None]):
+    """注册配置重新加载的回调，参数为规则变化了的平台键"""
+    STORE.on_change(callback)
+
+
+def _invalidate_default_cache(keys: List[str]):
+    # 只删除规则变化了的平台的条目，其他平台的缓存和连接不受影响
+    from result_cache import get_default_cache
+    cache = get_default_cache()
+    for key in keys:
+        cache.invalidate_platform(key)
+
+
+on_change(_invalidate_default_cache)
+on_change(STATS.reset)
+
+
+def format_duration(seconds: int) -> str:
+    """格式化时长"""
+    if not seconds:
+        return "未知"
+
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    seconds = seconds % 60
+
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes:02d}:{seconds:02d}"
+
+
+def _search_url(url: str, patterns) -> Optional[str]:
+    for pattern in patterns:
+        match = pattern.search(url)
+        if match:
+            return unquote(match.group(1))
+    return None
+
+
+def url_fields(key: str, url: str, spec: Optional[PlatformSpec] = None) -> Dict[str, str]:
+    """不请求网络，从链接中提取平台声明的字段"""
+    spec = spec or get(key)
+    fields = {}
+    for name, patterns in spec.url_fields:
+        value = _search_url(url, patterns)
+        if value:
+            fields[name] = value
+    return fields
+
+
+def extract_id(key: str, url: str) -> Optional[str]:
+    """不请求网络，仅从URL中提取缓存键使用的视频ID，提取不到返回None"""
+    return _search_url(url, get(key).id_patterns)
+
+
+def series_id(key: str, url: str) -> Optional[str]:
+    """仅从URL中提取剧集ID，平台不支持剧集解析或提取不到时返回None"""
+    pattern = get(key).series_pattern
+    match = pattern.search(url) if pattern else None
+    return match.group(1) if match else None
+
+
+def extract_page(key: str, response, spec: Optional[PlatformSpec] = None) -> Dict[str, str]:
+    """按配置中的 page 规则提取页面字段，最近失效的正则先查找字面量再执行（见 platforms/ordering.py）"""
+    spec = spec or get(key)
+    page, full, sampled = STATS.arrange(key, spec.page)
+    values, tried, exceeded = offload.extract(response, extract_fields_tracked, page, full=full)
+    if sampled:
+        STATS.record(key, spec.page, tried)
+    if exceeded:
+        record_budget_exceeded(key, response, fields=sorted(values))
+    return values
+
+
+def record_budget_exceeded(key: str, response, **details):
+    """记录一次超过CPU时间预算而提前停止的提取（指标和事件）"""
+    BUDGET_EXCEEDED.labels(key).inc()
+    _log.warning('extract_budget_exceeded', platform=key, bytes=len(response.content), **details)
+
+
+def pattern_stats() -> Dict[str, Any]:
+    """各平台页面正则最近的命中率，用来观察平台页面改版"""
+    return STATS.snapshot(registry())
+
+
+def run_plan(key: str, url: str, fetch: Fetch, detail: bool = False,
+             required_steps: bool = True, page_required: bool = False) -> Dict[str, Any]:
+    """按平台的抓取计划解析链接，返回 success、配置中 defaults 列出的字段和 vip_content
+
+    从链接得到的字段不会被页面中的值覆盖；后面步骤提取的字段覆盖前面的（接口比页面更准确）。
+    required_steps=False 时每一步都按可选步骤处理：请求出错时忽略，按已得到的字段和默认值返回；
+    page_required=True 时播放页（非可选的页面步骤）返回非200即解析失败，返回 PAGE_ERROR
+    """
+    spec = get(key)
+    plugin = load(key)
+    from_url = url_fields(key, url, spec)
+    fields = dict(from_url)
+
+    for step in plugin.FETCH_PLAN:
+        if step.detail and not detail:
+            continue
+        if step.skip_if and all(fields.get(name) for name in step.skip_if):
+            continue
+        try:
+            target = step.url.format(url=url, **fields)
+        except KeyError:
+            continue
+
+        try:
+            response = fetch(target)
+            if response.status_code != 200:
+                if page_required and step.extract is None and not step.optional:
+                    return {
+                        'success': False,
+                        'error': PAGE_ERROR
+                    }
+                continue
+            if step.extract is None:
+                extracted = extract_page(key, response, spec)
+            else:
+                extracted = offload.extract(response, step.extract, *step.args)
+        except Exception:
+            if step.optional or not required_steps:
+                continue
+            raise
+
+        for name, value in extracted.items():
+            if name not in from_url:
+                fields[name] = value
+
+    if any(not fields.get(name) for name in plugin.REQUIRED):
+        return {
+            'success': False,
+            'error': plugin.ERROR
+        }
+
+    result = {'success': True}
+    for name, default in spec.defaults.items():
+        result[name] = fields.get(name, default)
+    result['vip_content'] = spec.vip_content
+    return result
+
+
+def parse_series(key: str, url: str, fetch: Fetch) -> Optional[Dict[str, Any]]:
+    """解析剧集列表，平台不支持剧集解析时返回None"""
+    series_parser = getattr(load(key), 'parse_series', None)
+    if series_parser is None:
+        return None
+    return series_parser(url, fetch)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+B站
+视频信息接口返回标题、时长、缩略图和全部分P，不需要请求页面
+"""
+
+import re
+from typing import Dict, Any
+
+import offload
+from extractors import Body, load_json
+from platforms import Fetch, Step, format_duration
+
+VIEW_API = 'https://api.bilibili.com/x/web-interface/view'
+
+
+def extract_view(body: Body, encoding: str = 'utf-8') -> Dict[str, Any]:
+    """从视频信息接口提取标题、时长、缩略图和视频ID，接口返回错误时返回空dict"""
+    data = load_json(body, encoding)
+    if data.get('code') != 0:
+        return {}
+
+    video_info = data['data']
+    return {
+        'title': video_info.get('title', 'B站视频'),
+        'duration': format_duration(video_info.get('duration', 0)),
+        'thumbnail': video_info.get('pic', ''),
+        'vid': video_info.get('bvid', video_info.get('aid', ''))
+    }
+
+
+FETCH_PLAN = (
+    Step(VIEW_API + '?bvid={bvid}', extract_view),
+    # 链接中只有av号时
+    Step(VIEW_API + '?aid={aid}', extract_view, skip_if=('title',)),
+)
+
+REQUIRED = ('title',)
+ERROR = 'B站API调用失败'
+
+
+def parse_series(url: str, fetch: Fetch) -> Dict[str, Any]:
+    """解析B站多P视频（视频信息接口返回全部分P）"""
+    bv_match = re.search(r'BV([a-zA-Z0-9]+)', url)
+    av_match = re.search(r'av(\d+)', url)
+
+    if bv_match:
+        api_url = f'{VIEW_API}?bvid=BV{bv_match.group(1)}'
+    elif av_match:
+        api_url = f'{VIEW_API}?aid={av_match.group(1)}'
+    else:
+        return {
+            'success': False,
+            'error': '无法提取B站视频ID'
+        }
+
+    response = fetch(api_url)
+    data = offload.extract(response, load_json) if response.status_code == 200 else {}
+    if data.get('code') != 0:
+        return {
+            'success': False,
+            'error': 'B站API调用失败'
+        }
+
+    video_info = data['data']
+    bvid = video_info.get('bvid', '')
+    episodes = []
+    for page in video_info.get('pages') or []:
+        index = page.get('page', len(episodes) + 1)
+        episodes.append({
+            'index': index,
+            'vid': bvid,
+            'title': page.get('part', ''),
+            'duration': format_duration(page.get('duration', 0)),
+            'thumbnail': page.get('first_frame') or video_info.get('pic', ''),
+            'url': f'https://www.bilibili.com/video/{bvid}?p={index}'
+        })
+
+    return {
+        'success': True,
+        'series_id': bvid,
+        'title': video_info.get('title', 'B站视频'),
+        'episodes': episodes
+    }
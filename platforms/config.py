@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+平台配置
+平台名称、域名规则、链接中的字段、缓存键规则、页面提取规则、默认值等声明式内容
+放在配置文件中（默认 platforms/platforms.json，也可以是 .toml），读取后一次编译为：
+
+    检测索引   按顺序排列的 (平台, 域名正则)
+    提取规则   链接字段的正则、页面字段的 Field（页面正则同时在 extractors 中预编译）
+
+配置文件修改后由后台线程发现并重新编译，编译成功后整体替换当前配置（一次引用赋值），
+正在进行的解析继续使用旧配置；只有规则变化了的平台的缓存条目会被删除。
+编译失败（JSON格式错误、正则错误）时保留旧配置并记录 config_reload_failed 事件
+
+配置（环境变量）:
+    VIDEO_PLATFORM_CONFIG=/etc/video/platforms.toml   配置文件路径
+    VIDEO_PLATFORM_CONFIG_POLL=2                      检查文件修改的间隔（秒），0 表示不监视
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, NamedTuple, Pattern, Tuple
+
+import events
+from extractors import Field, compile_fields
+from metrics import REGISTRY
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'platforms.json')
+
+RELOADS = REGISTRY.counter('video_platform_config_reloads_total', '平台配置重新加载次数', ('result',))
+
+_log = events.get_logger('platforms')
+
+
+class PlatformSpec(NamedTuple):
+    """编译后的一个平台"""
+    key: str
+    name: str
+    # platforms 包中实现抓取计划的模块
+    module: str
+    hosts: Pattern
+    url_fields: Tuple[Tuple[str, Tuple[Pattern, ...]], ...]
+    id_patterns: Tuple[Pattern, ...]
+    series_pattern: Optional[Pattern]
+    page: Tuple[Field, ...]
+    defaults: Dict[str, Any]
+    vip_content: bool
+    # 配置文件中的原始内容，重新加载时用来判断哪些平台变化了
+    source: Dict[str, Any]
+
+
+class PlatformConfig(NamedTuple):
+    """编译后的全部平台配置"""
+    path: str
+    mtime: float
+    platforms: Tuple[PlatformSpec, ...]
+    by_key: Dict[str, PlatformSpec]
+
+    def detect(self, url: str) -> Optional[PlatformSpec]:
+        for spec in self.platforms:
+            if spec.hosts.search(url):
+                return spec
+        return None
+
+
+def _compile_spec(item: Dict[str, Any]) -> PlatformSpec:
+    key = item['key']
+    series_pattern = item.get('series_pattern')
+    page = tuple(
+        Field(field['name'], tuple(pattern.encode('utf-8') for pattern in field['patterns']),
+              field.get('suffix', ''), bool(field.get('strip', False)),
+              int(field.get('window', 0)), int(field.get('max_repeat', 0)))
+        for field in item.get('page', ())
+    )
+    compile_fields(page)
+    return PlatformSpec(
+        key=key,
+        name=item['name'],
+        module=item['module'],
+        hosts=re.compile('|'.join(item['hosts'])),
+        url_fields=tuple((name, tuple(re.compile(pattern) for pattern in patterns))
+                         for name, patterns in item.get('url_fields', {}).items()),
+        id_patterns=tuple(re.compile(pattern) for pattern in item.get('id_patterns', ())),
+        series_pattern=re.compile(series_pattern) if series_pattern else None,
+        page=page,
+        defaults=dict(item.get('defaults', {})),
+        vip_content=bool(item.get('vip_content', True)),
+        source=item
+    )
+
+
+def _read(path: str) -> Dict[str, Any]:
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compile_config(path: str) -> PlatformConfig:
+    """读取并编译配置文件，格式或正则有误时抛出异常"""
+    mtime = os.stat(path).st_mtime
+    specs = tuple(_compile_spec(item) for item in _read(path)['platforms'])
+    by_key = {spec.key: spec for spec in specs}
+    if len(by_key) != len(specs):
+        raise ValueError('平台配置中有重复的 key')
+    return PlatformConfig(path, mtime, specs, by_key)
+
+
+def changed_keys(old: PlatformConfig, new: PlatformConfig) -> List[str]:
+    """两份配置中规则不同（含新增、删除）的平台"""
+    keys = set(old.by_key) | set(new.by_key)
+    return sorted(
+        key for key in keys
+        if key not in old.by_key or key not in new.by_key
+        or old.by_key[key].source != new.by_key[key].source
+    )
+
+
+class ConfigStore:
+    """当前生效的平台配置，首次使用时编译，文件修改后在后台重新编译并整体替换"""
+
+    def __init__(self, path: Optional[str] = None, poll: Optional[float] = None):
+        self.path = path or os.environ.get('VIDEO_PLATFORM_CONFIG') or DEFAULT_PATH
+        self.poll = float(os.environ.get('VIDEO_PLATFORM_CONFIG_POLL', '2') if poll is None else poll)
+        self._config = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._listeners = []
+
+    def current(self) -> PlatformConfig:
+        config = self._config
+        if config is None:
+            with self._lock:
+                if self._config is None:
+                    self._config = compile_config(self.path)
+                    self._start_watcher()
+                config = self._config
+        return config
+
+    def on_change(self, callback: Callable[[List[str]], None]):
+        """注册配置变化的回调，参数为规则变化了的平台键"""
+        self._listeners.append(callback)
+
+    def reload(self) -> List[str]:
+        """重新编译配置文件，返回规则变化了的平台；编译失败时保留当前配置并抛出异常"""
+        with self._lock:
+            old = self._config
+            try:
+                new = compile_config(self.path)
+            except Exception:
+                RELOADS.labels('failed').inc()
+                raise
+            self._config = new
+        RELOADS.labels('ok').inc()
+
+        keys = changed_keys(old, new) if old is not None else []
+        if keys:
+            _log.info('config_reloaded', path=self.path, platforms=keys)
+            for callback in list(self._listeners):
+                callback(keys)
+        return keys
+
+    def _start_watcher(self):
+        if self.poll <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='platform-config-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll)
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                continue
+            if mtime == self._config.mtime:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                _log.warning('config_reload_failed', path=self.path, error=str(e))
+                # 同一个有问题的版本不再反复尝试，等文件下一次修改
+                with self._lock:
+                    self._config = self._config._replace(mtime=mtime)
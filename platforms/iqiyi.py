@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爱奇艺
+标题和视频ID都从播放页提取
+"""
+
+from platforms import Step
+
+FETCH_PLAN = (
+    Step('{url}'),
+)
+
+REQUIRED = ()
+ERROR = '爱奇艺页面解析失败'
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+芒果TV
+标题和视频ID从播放页提取，剧集列表来自分集接口
+"""
+
+import re
+from typing import Dict, Any
+
+import offload
+from extractors import load_json
+from platforms import Fetch, Step
+
+EPISODE_API = 'https://pcweb.api.mgtv.com/episode/list?video_id={vid}&page=0&size=200'
+
+FETCH_PLAN = (
+    Step('{url}'),
+)
+
+REQUIRED = ()
+ERROR = '芒果TV页面解析失败'
+
+
+def parse_series(url: str, fetch: Fetch) -> Dict[str, Any]:
+    """解析芒果TV剧集列表（分集接口一次返回全部分集）"""
+    match = re.search(r'/b/(\d+)/(\d+)\.html', url)
+    if not match:
+        return {
+            'success': False,
+            'error': '无法从链接中提取剧集ID'
+        }
+
+    cid, vid = match.group(1), match.group(2)
+    response = fetch(EPISODE_API.format(vid=vid))
+    if response.status_code != 200:
+        return {
+            'success': False,
+            'error': f'芒果TV分集接口调用失败: HTTP {response.status_code}'
+        }
+
+    data = offload.extract(response, load_json, select=('data',)) or {}
+    episodes = []
+    for item in data.get('list') or []:
+        video_id = str(item.get('video_id', ''))
+        if not video_id:
+            continue
+        episodes.append({
+            'index': len(episodes) + 1,
+            'vid': video_id,
+            'title': item.get('t2') or item.get('t1') or '',
+            'duration': item.get('time') or '未知',
+            'thumbnail': item.get('img', ''),
+            'url': f'https://www.mgtv.com/b/{item.get("clip_id") or cid}/{video_id}.html'
+        })
+
+    if not episodes:
+        return {
+            'success': False,
+            'error': '芒果TV分集接口没有返回分集信息'
+        }
+
+    return {
+        'success': True,
+        'series_id': cid,
+        'title': (data.get('info') or {}).get('title', '芒果TV'),
+        'episodes': episodes
+    }
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面正则的命中统计
+配置中每个页面字段有一组依次尝试的正则，平台改版后排在前面的正则往往不再命中，
+每次提取都要先把这些失效的正则在整个页面上扫一遍。这里按平台记录每个正则最近的尝试和命中次数：
+
+    失效   最近至少 MIN_ATTEMPTS 次尝试中命中率低于 DEAD_RATE
+    处理   失效的正则仍按配置中的位置尝试，但先在页面中查找它必然包含的字面量（extractors.required_literal），
+           找不到时直接记为未命中，不执行正则
+
+尝试顺序始终是配置中的顺序：调整顺序会让同一页面上多个正则都能命中时取到别的值，
+失效的正则只要命中仍然优先。同一字段的字面量互相包含时先查短的，每个页面每个字面量只查一次，结果完全相同。
+每个平台每 SAMPLE_EVERY 次提取只记录一次（抽样），其余提取只取一次计数、读一次缓存的字段规则，不加锁：
+小页面本身只要十几微秒，逐次记录（加锁、更新每个正则的计数和指标）的开销比跳过失效正则省下的还多。
+抽样的计数超过 WINDOW 次后减半，统计反映的是最近的页面；每个平台每 EXPLORE_EVERY 次提取做一次全量尝试
+（命中后继续尝试其余正则，也不做字面量查找，且总是被记录），排在命中正则之后的正则也有统计，
+平台改回原来的写法时能及时恢复
+
+统计可以通过 snapshot()、解析服务的 GET /patterns 和 video_extract_patterns_total 指标查看；
+snapshot() 中是抽样的次数，指标按抽样比例换算为全部提取的估计值
+
+配置（环境变量）:
+    VIDEO_ADAPTIVE_PATTERNS=0   只统计，失效的正则也直接执行
+"""
+
+import itertools
+import os
+import threading
+from typing import Dict, Any, List, Tuple
+
+from extractors import Field
+from metrics import REGISTRY
+
+WINDOW = 256
+MIN_ATTEMPTS = 32
+DEAD_RATE = 0.02
+SAMPLE_EVERY = 8
+# 必须是 SAMPLE_EVERY 的倍数，全量尝试的提取总是被记录
+EXPLORE_EVERY = 32
+
+PATTERN_RESULTS = REGISTRY.counter(
+    'video_extract_patterns_total', '页面字段各正则的尝试结果（pattern 为配置中的序号）',
+    ('platform', 'field', 'pattern', 'result')
+)
+
+
+class PatternStats:
+    """按 (平台, 字段, 正则) 统计最近的命中率，并据此安排正则的尝试顺序"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        # (平台, 字段, 正则) -> [抽样的尝试次数, 命中次数]
+        self._counts = {}
+        # 平台 -> 提取次数计数器（next() 在GIL下是原子的，不需要加锁）
+        self._documents = {}
+        # 平台 -> (配置中的字段规则, 计算时的 _generation, 标记了失效正则的字段规则)
+        self._arranged = {}
+        # 有正则变为失效或恢复、或统计被清除时加一，缓存的字段规则随之失效
+        self._generation = 0
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _is_dead(self, platform: str, field: str, pattern: bytes) -> bool:
+        counts = self._counts.get((platform, field, pattern))
+        return (counts is not None and counts[0] >= MIN_ATTEMPTS
+                and counts[1] < counts[0] * DEAD_RATE)
+
+    def arrange(self, platform: str, page: Tuple[Field, ...]) -> Tuple[Tuple[Field, ...], bool, bool]:
+        """返回本次提取使用的字段规则（顺序不变，标记失效的正则）、是否全量尝试和是否需要 record()；不加锁"""
+        counter = self._documents.get(platform)
+        if counter is None:
+            with self._lock:
+                counter = self._documents.setdefault(platform, itertools.count(1))
+        documents = next(counter)
+        sampled = documents % SAMPLE_EVERY == 0
+        full = documents % EXPLORE_EVERY == 0
+        if not self.enabled:
+            return page, full, sampled
+
+        generation = self._generation
+        cached = self._arranged.get(platform)
+        if cached is not None and cached[0] is page and cached[1] == generation:
+            return cached[2], full, sampled
+
+        arranged = []
+        for field in page:
+            rare = tuple(index for index, pattern in enumerate(field.patterns)
+                         if self._is_dead(platform, field.name, pattern))
+            arranged.append(field._replace(rare=rare) if rare else field)
+        arranged = tuple(arranged)
+        # 计算期间统计有变化时 _generation 已经不同，下次提取会重新计算
+        self._arranged[platform] = (page, generation, arranged)
+        return arranged, full, sampled
+
+    def _metric(self, platform: str, field: str, index: int, hit: bool):
+        key = (platform, field, index, hit)
+        child = self._metrics.get(key)
+        if child is None:
+            child = self._metrics[key] = PATTERN_RESULTS.labels(platform, field, str(index), 'hit' if hit else 'miss')
+        return child
+
+    def record(self, platform: str, page: Tuple[Field, ...], tried: Dict[str, Tuple[bool, ...]]):
+        """记录一次被抽中的提取（arrange() 返回需要记录时）中各正则是否命中，正则的序号即配置中的序号"""
+        updates = []
+        with self._lock:
+            for field in page:
+                for index, (pattern, hit) in enumerate(zip(field.patterns, tried.get(field.name, ()))):
+                    key = (platform, field.name, pattern)
+                    dead = self._is_dead(*key)
+                    counts = self._counts.setdefault(key, [0, 0])
+                    counts[0] += 1
+                    counts[1] += hit
+                    if counts[0] > WINDOW:
+                        counts[0] //= 2
+                        counts[1] //= 2
+                    if self._is_dead(*key) != dead:
+                        self._generation += 1
+                    updates.append(self._metric(platform, field.name, index, hit))
+        for metric in updates:
+            metric.inc(SAMPLE_EVERY)
+
+    def reset(self, platforms: List[str]):
+        """清除这些平台的统计（配置中的规则变化后）"""
+        with self._lock:
+            for key in [key for key in self._counts if key[0] in platforms]:
+                del self._counts[key]
+            for platform in platforms:
+                self._documents.pop(platform, None)
+                self._arranged.pop(platform, None)
+            self._generation += 1
+
+    def snapshot(self, specs) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """按配置顺序列出各平台各字段的正则及其最近的命中率"""
+        snapshot = {}
+        with self._lock:
+            for spec in specs:
+                fields = {}
+                for field in spec.page:
+                    rows = []
+                    for pattern in field.patterns:
+                        attempts, hits = self._counts.get((spec.key, field.name, pattern), (0, 0))
+                        rows.append({
+                            'pattern': pattern.decode('utf-8', errors='replace'),
+                            'attempts': attempts,
+                            'hits': hits,
+                            'hit_rate': round(hits / attempts, 4) if attempts else None,
+                            'dead': self._is_dead(spec.key, field.name, pattern)
+                        })
+                    fields[field.name] = rows
+                snapshot[spec.key] = fields
+        return snapshot
+
+
+STATS = PatternStats(enabled=os.environ.get('VIDEO_ADAPTIVE_PATTERNS', '1') != '0')
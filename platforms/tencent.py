@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+腾讯视频
+视频ID通常在链接中；链接中没有时从页面提取。详细信息（时长、缩略图）来自 getinfo 接口
+"""
+
+from typing import Dict, Any
+
+import offload
+import platforms
+from extractors import Body, extract_tencent_episodes, load_json
+from platforms import Fetch, Step, format_duration
+
+GETINFO_API = 'https://vv.video.qq.com/getinfo?vids={vid}&platform=101001&charge=0&otype=json'
+
+
+def extract_getinfo(body: Body, encoding: str = 'utf-8') -> Dict[str, Any]:
+    """从 getinfo 接口（JSONP）提取标题、时长和缩略图"""
+    data = load_json(body, encoding)
+    videolist = (data.get('pl') or {}).get('videolist') or []
+    if not videolist:
+        return {}
+
+    video_info = videolist[0]
+    info = {
+        'duration': format_duration(video_info.get('td', 0)),
+        'thumbnail': video_info.get('pic', '')
+    }
+    if video_info.get('ti'):
+        info['title'] = video_info['ti']
+    return info
+
+
+FETCH_PLAN = (
+    # 链接中没有视频ID时才请求页面
+    Step('{url}', skip_if=('vid',), optional=True),
+    Step(GETINFO_API, extract_getinfo, detail=True, optional=True),
+)
+
+REQUIRED = ('vid',)
+ERROR = '无法提取视频ID，请检查链接是否正确'
+
+
+def parse_series(url: str, fetch: Fetch) -> Dict[str, Any]:
+    """解析腾讯视频剧集列表（cover页面内嵌全部分集）"""
+    cid = platforms.series_id('v.qq.com', url)
+    if not cid:
+        return {
+            'success': False,
+            'error': '无法从链接中提取剧集ID'
+        }
+
+    response = fetch(url)
+    if response.status_code != 200:
+        return {
+            'success': False,
+            'error': f'获取剧集页面失败: HTTP {response.status_code}'
+        }
+
+    page = offload.extract(response, extract_tencent_episodes, cid)
+    episodes = page['episodes']
+    if page['exceeded']:
+        platforms.record_budget_exceeded('v.qq.com', response, episodes=len(episodes))
+    if not episodes:
+        return {
+            'success': False,
+            'error': '页面中没有找到分集信息'
+        }
+
+    return {
+        'success': True,
+        'series_id': cid,
+        'title': page['title'] or '腾讯视频',
+        'episodes': episodes
+    }
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+优酷
+视频ID优先取链接中的 vid 参数或 /id_xxx.html 路径，标题和链接中没有的视频ID从页面提取。
+请求页面出错时解析失败（页面返回非200时仍按默认值返回）；
+YoukuFixer、YoukuPreferredParser 忽略页面请求错误，按链接中的视频ID和默认标题返回
+"""
+
+from platforms import Step
+
+FETCH_PLAN = (
+    Step('{url}'),
+)
+
+REQUIRED = ()
+ERROR = '优酷页面解析失败'
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下一集元数据预取
+解析成功后，在后台低优先级地预取后续几集的解析结果，
+用户接着看下一集时可以直接命中缓存
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable
+
+from enhanced_parser import EnhancedVIPParser
+from metrics import REGISTRY
+
+PREFETCH_EPISODES = REGISTRY.counter('video_prefetch_episodes_total', '下一集预取的处理结果', ('result',))
+PREFETCH_PENDING = REGISTRY.gauge('video_prefetch_pending', '下一集预取排队中的任务数')
+
+
+class RateLimiter:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """获取一个令牌，超时未获取到返回False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_time = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+
+class EpisodePrefetcher:
+    """下一集元数据预取器（需要显式启用）"""
+
+    def __init__(self, parser_factory: Callable[[], EnhancedVIPParser] = EnhancedVIPParser,
+                 lookahead: int = 2, max_pending: int = 32, rate: float = 2.0,
+                 enabled: bool = True):
+        self.parser_factory = parser_factory
+        self.lookahead = lookahead
+        self.enabled = enabled
+        # 全局预取预算：排队任务数上限，超出的预取请求直接丢弃
+        self.max_pending = max_pending
+        self.limiter = RateLimiter(rate, burst=max(1, int(rate)))
+
+        self._queue = queue.PriorityQueue(maxsize=max_pending)
+        self._order = itertools.count()
+        self._worker = None
+        self._parser = None
+        self._lock = threading.Lock()
+        # 预取过的缓存键，用于统计之后有多少次解析因此命中缓存
+        self._prefetched = OrderedDict()
+        self._max_tracked = 4096
+        self._queued_urls = set()
+
+        self.stats = {
+            'scheduled': 0,
+            'fetched': 0,
+            'already_cached': 0,
+            'dropped': 0,
+            'failed': 0,
+            'hits': 0
+        }
+
+    def on_parsed(self, url: str, result: Dict[str, Any], prefetch: Optional[bool] = None):
+        """每次解析完成后调用：统计预取命中，并为后续剧集安排预取"""
+        if result.get('cache_hit'):
+            self._record_hit(url)
+
+        if prefetch is None:
+            prefetch = self.enabled
+        if not prefetch or not result.get('success'):
+            return
+
+        self._submit(0, 'series', url)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        stats = dict(self.stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+    def _count(self, result: str):
+        """本实例的统计（界面侧栏显示）和进程级指标同时计数"""
+        self.stats[result] += 1
+        PREFETCH_EPISODES.labels(result).inc()
+
+    def _get_parser(self) -> EnhancedVIPParser:
+        if self._parser is None:
+            self._parser = self.parser_factory()
+        return self._parser
+
+    def _record_hit(self, url: str):
+        key = self._get_parser().get_cache_key(url)
+        with self._lock:
+            if key in self._prefetched:
+                del self._prefetched[key]
+                self._count('hits')
+
+    def _track(self, key):
+        with self._lock:
+            self._prefetched[key] = True
+            while len(self._prefetched) > self._max_tracked:
+                self._prefetched.popitem(last=False)
+
+    def _submit(self, priority: int, kind: str, url: str):
+        """加入预取队列，预算用尽时丢弃"""
+        with self._lock:
+            if (kind, url) in self._queued_urls:
+                return
+            try:
+                self._queue.put_nowait((priority, next(self._order), kind, url))
+            except queue.Full:
+                self._count('dropped')
+                return
+            PREFETCH_PENDING.inc()
+            self._queued_urls.add((kind, url))
+            self._count('scheduled')
+            self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='episode-prefetch', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            priority, _, kind, url = self._queue.get()
+            try:
+                if kind == 'series':
+                    self._schedule_next_episodes(url)
+                else:
+                    self._prefetch_episode(url)
+            except Exception:
+                self._count('failed')
+            finally:
+                PREFETCH_PENDING.dec()
+                with self._lock:
+                    self._queued_urls.discard((kind, url))
+                self._queue.task_done()
+
+    def _schedule_next_episodes(self, url: str):
+        """找到当前集在剧集列表中的位置，安排后续几集的预取"""
+        parser = self._get_parser()
+        series_key = parser.get_series_key(url)
+        if not series_key:
+            return
+
+        if not parser.cache.contains(series_key):
+            self.limiter.acquire()
+        series = parser.get_series(url)
+        if not series.get('success'):
+            self._count('failed')
+            return
+
+        current_key = parser.get_cache_key(url)
+        episodes = series['episodes']
+        position = next(
+            (i for i, episode in enumerate(episodes)
+             if parser.get_cache_key(episode['url']) == current_key),
+            None
+        )
+        if position is None:
+            return
+
+        for distance, episode in enumerate(episodes[position + 1:position + 1 + self.lookahead], 1):
+            self._submit(distance, 'episode', episode['url'])
+
+    def _prefetch_episode(self, url: str):
+        """预取单集解析结果，已在缓存中的只记录不请求"""
+        parser = self._get_parser()
+        key = parser.get_cache_key(url)
+        if key is None:
+            return
+
+        self._track(key)
+        if parser.cache.contains(key):
+            self._count('already_cached')
+            return
+
+        self.limiter.acquire()
+        result = parser.parse_video(url)
+        if result.get('success'):
+            self._count('fetched')
+        else:
+            self._count('failed')
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析性能剖析
+在 cProfile 和 tracemalloc 下运行单次解析或一批解析，把结果写入剖析目录：
+
+    <名称>.pstats      cProfile统计，可用 python -m pstats 或 snakeviz 查看
+    <名称>.collapsed   折叠调用栈（按调用关系分摊的自身耗时，微秒），可直接交给 flamegraph.pl / speedscope
+    <名称>.alloc.txt   内存分配最多的代码位置
+
+开启方式：
+    VIDEO_PROFILE=1             每次解析都剖析
+    VIDEO_PROFILE_EVERY=100     采样模式，每100次解析剖析一次；同一时间只剖析一个请求
+    parse_video(url, profile=True)、API的 &profile=1、批量工具的 --profile
+    VIDEO_PROFILE_DIR           剖析目录，默认 ./profiles，只保留最近 VIDEO_PROFILE_KEEP（默认50）份
+"""
+
+import cProfile
+import datetime
+import functools
+import glob
+import itertools
+import os
+import threading
+import tracemalloc
+from typing import Optional, Dict, List, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pstats
+
+DEFAULT_DIR = os.environ.get('VIDEO_PROFILE_DIR', 'profiles')
+# 折叠调用栈的最大深度
+MAX_STACK_DEPTH = 64
+# 内存分配报告中的条目数
+TOP_ALLOCATIONS = 25
+
+_always = os.environ.get('VIDEO_PROFILE', '').lower() in ('1', 'true', 'yes')
+_every = int(os.environ.get('VIDEO_PROFILE_EVERY', '0') or 0)
+_keep = int(os.environ.get('VIDEO_PROFILE_KEEP', '50') or 50)
+_calls = itertools.count(1)
+# 采样模式下同一时间只剖析一个请求，限制对线上请求的影响
+_sample_lock = threading.Lock()
+_local = threading.local()
+_sequence = itertools.count(1)
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def configure(always: Optional[bool] = None, every: Optional[int] = None, keep: Optional[int] = None):
+    """修改剖析开关：always 每次都剖析，every 每N次剖析一次（0关闭），keep 保留的剖析份数"""
+    global _always, _every, _keep
+    if always is not None:
+        _always = bool(always)
+    if every is not None:
+        _every = max(0, int(every))
+    if keep is not None:
+        _keep = max(1, int(keep))
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_users = 1
+        elif _tracemalloc_users:
+            _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+
+
+def _func_name(func) -> str:
+    filename, line, name = func
+    if filename == '~':
+        # 内置函数
+        return name.strip('<>').replace(' ', '_')
+    return f'{os.path.basename(filename)}:{name}:{line}'
+
+
+def collapse_stacks(stats: 'pstats.Stats') -> List[str]:
+    """把cProfile的调用关系展开为折叠调用栈
+
+    cProfile只记录调用者到被调用者的边，这里按每条边的累计耗时占比，
+    把函数的自身耗时分摊到各条调用路径上
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    totals = {}
+
+    def visit(func, path, fraction):
+        _, _, tottime, cumtime, _ = entries[func]
+        path = path + (func,)
+        self_time = tottime * fraction
+        if self_time > 0:
+            totals[path] = totals.get(path, 0.0) + self_time
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee in callees.get(func, ()):
+            if callee in path:
+                continue
+            callee_cumtime = entries[callee][3]
+            edge_cumtime = entries[callee][4][func][3]
+            if callee_cumtime > 0 and edge_cumtime > 0:
+                visit(callee, path, fraction * edge_cumtime / callee_cumtime)
+
+    for root in roots:
+        visit(root, (), 1.0)
+
+    lines = []
+    for path, seconds in totals.items():
+        micros = int(seconds * 1e6)
+        if micros:
+            lines.append(';'.join(_func_name(func) for func in path) + f' {micros}')
+    lines.sort()
+    return lines
+
+
+class ProfileSession:
+    """一次剖析：可以在多个线程中分别剖析调用，最后合并写出"""
+
+    def __init__(self, label: str = 'parse', output_dir: Optional[str] = None,
+                 trace_memory: bool = True):
+        self.label = label
+        self.output_dir = output_dir or DEFAULT_DIR
+        self.trace_memory = trace_memory
+        self._profiles = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._allocations = None
+        self._peak_bytes = 0
+
+    def __enter__(self) -> 'ProfileSession':
+        if self.trace_memory:
+            _start_tracemalloc()
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+                self._snapshot = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace_memory:
+            if self._snapshot is not None and tracemalloc.is_tracing():
+                after = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__)])
+                self._allocations = after.compare_to(self._snapshot, 'lineno')[:TOP_ALLOCATIONS]
+                self._peak_bytes = tracemalloc.get_traced_memory()[1]
+            _stop_tracemalloc()
+
+    def call(self, func: Callable, *args, **kwargs):
+        """在当前线程的剖析器下调用函数，期间解析入口不再单独剖析"""
+        if getattr(_local, 'active', False):
+            return func(*args, **kwargs)
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12起同一时间只能有一个cProfile处于开启状态，其余调用不剖析
+            return func(*args, **kwargs)
+        _local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            _local.active = False
+
+    def write(self) -> Dict[str, str]:
+        """合并各线程的统计并写出文件，返回文件路径"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.output_dir, f'{stamp}-{self.label}-{os.getpid()}-{next(_sequence)}')
+        paths = {}
+
+        with self._lock:
+            profiles = list(self._profiles)
+        if profiles:
+            import pstats
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            paths['pstats'] = base + '.pstats'
+            stats.dump_stats(paths['pstats'])
+            paths['collapsed'] = base + '.collapsed'
+            with open(paths['collapsed'], 'w', encoding='utf-8') as f:
+                f.write('\n'.join(collapse_stacks(stats)) + '\n')
+
+        allocations = self._allocations
+        if allocations is not None:
+            paths['allocations'] = base + '.alloc.txt'
+            with open(paths['allocations'], 'w', encoding='utf-8') as f:
+                f.write(f'# {self.label}: 剖析期间内存峰值 {self._peak_bytes / 1024:.1f} KB\n')
+                f.write(f'# 结束时仍占用、增量最多的 {len(allocations)} 处代码\n')
+                for stat in allocations:
+                    f.write(f'{stat}\n')
+
+        _prune(self.output_dir)
+        return paths
+
+
+def _prune(output_dir: str):
+    """只保留最近的若干份剖析结果"""
+    runs = {}
+    for path in glob.glob(os.path.join(output_dir, '*.pstats')) + glob.glob(os.path.join(output_dir, '*.alloc.txt')):
+        base = path[:-len('.pstats')] if path.endswith('.pstats') else path[:-len('.alloc.txt')]
+        runs.setdefault(base, os.path.getmtime(path))
+    for base in sorted(runs, key=runs.get)[:-_keep]:
+        for suffix in ('.pstats', '.collapsed', '.alloc.txt'):
+            try:
+                os.remove(base + suffix)
+            except OSError:
+                pass
+
+
+def profile_call(label: str, func: Callable, *args, **kwargs):
+    """剖析单次调用，返回 (结果, 剖析文件路径)"""
+    with ProfileSession(label) as session:
+        result = session.call(func, *args, **kwargs)
+    return result, session.write()
+
+
+def profiled(func: Callable) -> Callable:
+    """装饰解析入口：按 profile 参数或全局开关决定是否剖析本次解析，剖析文件路径放在结果的 profile 字段"""
+
+    @functools.wraps(func)
+    def wrapper(self, url, *args, profile: Optional[bool] = None, **kwargs):
+        if getattr(_local, 'active', False):
+            return func(self, url, *args, **kwargs)
+
+        sampled = False
+        if profile is None:
+            if _always:
+                profile = True
+            elif _every and next(_calls) % _every == 0:
+                sampled = profile = _sample_lock.acquire(blocking=False)
+        if not profile:
+            return func(self, url, *args, **kwargs)
+
+        try:
+            result, paths = profile_call(type(self).__name__, func, self, url, *args, **kwargs)
+        finally:
+            if sampled:
+                _sample_lock.release()
+
+        if isinstance(result, dict):
+            result['profile'] = paths
+        return result
+
+    return wrapper
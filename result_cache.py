@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析结果缓存
+按 (平台, 视频ID) 缓存解析结果，进程内所有解析器实例共享同一份缓存；
+写入 ParseResult 时按紧凑形式保存，读取时仍然返回普通dict
+
+每个条目有两个过期时间：
+
+    软过期 ttl        之后的读取仍然立即返回旧结果（标记为 stale），由调用方安排一次后台刷新
+    硬过期 hard_ttl   之后条目删除，读取未命中，调用方同步重新解析
+
+同一个键同时只有一个后台刷新；刷新失败（或由其他进程刷新、但没有读回新结果）时继续提供旧结果，
+REFRESH_RETRY 秒后才再次尝试
+
+可以挂一个跨进程的共享层（shared_cache.SharedCache）：进程内未命中或已软过期时查共享层，
+写入和删除同时作用于两层；claim()/release() 让多个进程中同一个键同时只有一个解析。
+共享层出错时只记录事件，按未命中处理
+
+还可以挂一个只读的快照（cache_snapshot.SnapshotReader）：两层都未命中时查快照，命中的条目放入进程内缓存；
+之后写入或删除的键不再从快照中读取。items() 导出全部条目（含尚未读取的快照条目），用于生成新的快照
+
+配置（环境变量，只影响进程内共享的默认缓存）:
+    VIDEO_CACHE_TTL=1800        软过期时间（秒）
+    VIDEO_CACHE_HARD_TTL=7200   硬过期时间（秒），不大于软过期时间时不提供过期结果
+    VIDEO_SHARED_CACHE=...      共享层文件，见 shared_cache.py
+    VIDEO_CACHE_SNAPSHOT=...    启动时按需加载的快照文件，见 cache_snapshot.py
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Callable, List, TYPE_CHECKING
+
+import events
+from metrics import CACHE_REQUESTS, CACHE_EVICTIONS, CACHE_ENTRIES, CACHE_REFRESHES
+from parse_result import ParseResult
+
+if TYPE_CHECKING:
+    from cache_snapshot import SnapshotReader
+    from shared_cache import SharedCache
+
+CacheKey = Tuple[str, ...]
+
+# 后台刷新失败后，再次尝试刷新前继续提供旧结果的时间（秒）
+REFRESH_RETRY = 30
+# 解析租约的有效期（秒），持有者崩溃时其他进程最多等这么久
+FILL_LEASE = 15
+# 没有共享层时 claim() 返回的令牌（进程内的单飞由调用方自己负责）
+LOCAL_TOKEN = 'local'
+
+_log = events.get_logger('result_cache')
+
+
+class ResultCache:
+    """线程安全的解析结果缓存（LRU淘汰 + 软/硬过期时间）"""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 1800, name: str = 'results',
+                 hard_ttl: Optional[float] = None, max_refreshes: int = 4,
+                 shared: Optional['SharedCache'] = None, snapshot: Optional['SnapshotReader'] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # 未指定时与软过期相同，即不提供过期结果
+        self.hard_ttl = ttl if hard_ttl is None else max(ttl, hard_ttl)
+        # 同时进行的后台刷新数上限，超出时本次只返回旧结果
+        self.max_refreshes = max_refreshes
+        self.name = name
+        # 跨进程共享层，None 表示只使用进程内缓存
+        self.shared = shared
+        # 只读快照，None 表示没有
+        self.snapshot = snapshot
+        # 键 -> (软过期时刻, 硬过期时刻, 结果)
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._hit_metric = CACHE_REQUESTS.labels(name, 'hit')
+        self._stale_metric = CACHE_REQUESTS.labels(name, 'stale')
+        self._miss_metric = CACHE_REQUESTS.labels(name, 'miss')
+        self._eviction_metric = CACHE_EVICTIONS.labels(name)
+
+    def lookup(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """读取缓存，返回 (结果, 是否已软过期)，未命中或已硬过期返回None；
+        进程内未命中或已软过期时再查共享层（其他进程可能已经解析或刷新过）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+        if self.shared is not None and (entry is None or entry[0] <= now):
+            entry = self._lookup_shared(key, entry)
+        if entry is None and self.snapshot is not None:
+            entry = self._lookup_snapshot(key)
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            self._miss_metric.inc()
+            return None
+
+        stale_at, _, value = entry
+        stale = stale_at <= now
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            if stale:
+                self.stale_hits += 1
+        (self._stale_metric if stale else self._hit_metric).inc()
+        if isinstance(value, ParseResult):
+            return value.to_dict(), stale
+        return dict(value), stale
+
+    def _lookup_shared(self, key: CacheKey, entry: Optional[tuple]) -> Optional[tuple]:
+        """从共享层读取，比进程内的条目新时放回进程内缓存；返回两者中较新的条目"""
+        found = self._call_shared('lookup', key)
+        if found is None:
+            return entry
+        value, stale_at, expires_at = found
+        if entry is not None and stale_at + time.monotonic() - time.time() <= entry[0]:
+            return entry
+        return self._store_external(key, value, stale_at, expires_at)
+
+    def _lookup_snapshot(self, key: CacheKey) -> Optional[tuple]:
+        """从快照读取并放入进程内缓存"""
+        try:
+            found = self.snapshot.get(key)
+        except Exception as e:
+            _log.warning('snapshot_read_failed', error=str(e))
+            return None
+        return self._store_external(key, *found) if found is not None else None
+
+    def _store_external(self, key: CacheKey, value: Dict[str, Any], stale_at: float, expires_at: float) -> tuple:
+        """把共享层或快照中的条目（墙上时钟）换算为本进程的单调时钟，放入进程内缓存"""
+        offset = time.monotonic() - time.time()
+        if key[0] != 'series':
+            value = ParseResult.compact(value, key)
+        entry = (stale_at + offset, expires_at + offset, value)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: CacheKey, entry: tuple):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._eviction_metric.inc()
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """读取缓存（含已软过期的结果），未命中或已硬过期返回None"""
+        found = self.lookup(key)
+        return found[0] if found is not None else None
+
+    def put(self, key: CacheKey, value: Dict[str, Any], ttl: Optional[float] = None,
+            hard_ttl: Optional[float] = None):
+        """写入缓存，ParseResult 原样保存（调用方不应再修改），其余结果保存一份副本；
+        只指定 ttl 时，硬过期时间按缓存的默认差值顺延"""
+        ttl = self.ttl if ttl is None else ttl
+        hard_ttl = ttl + (self.hard_ttl - self.ttl) if hard_ttl is None else max(ttl, hard_ttl)
+        now = time.monotonic()
+        if not isinstance(value, ParseResult):
+            value = dict(value)
+        self._store(key, (now + ttl, now + hard_ttl, value))
+        if self.snapshot is not None:
+            self.snapshot.discard(key)
+        if self.shared is not None:
+            self._call_shared('put', key, value, ttl, hard_ttl)
+
+    def _call_shared(self, operation: str, *args, default: Any = None) -> Any:
+        """调用共享层，出错时记录事件并返回 default"""
+        try:
+            return getattr(self.shared, operation)(*args)
+        except Exception as e:
+            _log.warning('shared_cache_failed', operation=operation, error=str(e))
+            return default
+
+    def contains(self, key: CacheKey) -> bool:
+        """检查缓存（含共享层）中是否有未硬过期的条目（不计入命中统计）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return True
+        if self.shared is not None and self._call_shared('contains', key, default=False):
+            return True
+        return self.snapshot is not None and self.snapshot.contains(key)
+
+    def claim(self, key: CacheKey) -> Optional[str]:
+        """声明由当前调用方解析这个键，返回租约令牌；其他进程正在解析时返回None。
+        没有共享层（或共享层出错）时总是成功"""
+        if self.shared is None:
+            return LOCAL_TOKEN
+        return self._call_shared('claim', key, FILL_LEASE, default=LOCAL_TOKEN)
+
+    def release(self, key: CacheKey, token: Optional[str]):
+        """释放 claim() 得到的租约"""
+        if self.shared is not None and token and token != LOCAL_TOKEN:
+            self._call_shared('release', key, token)
+
+    def wait_filled(self, key: CacheKey, timeout: float = FILL_LEASE) -> Optional[Dict[str, Any]]:
+        """等待其他进程解析完成并写入共享层，超时或对方放弃（租约已释放但没有结果）时返回None"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.contains(key) or not self._call_shared('leased', key, default=False):
+                break
+            time.sleep(0.05)
+        return self.get(key) if self.contains(key) else None
+
+    def wait_released(self, key: CacheKey, timeout: float = FILL_LEASE) -> bool:
+        """等待其他进程释放这个键的租约（它正在解析或刷新），再从共享层读回比本进程新的条目；
+        返回进程内的条目是否已不再软过期"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self._call_shared('leased', key, default=False):
+            time.sleep(0.05)
+        with self._lock:
+            entry = self._entries.get(key)
+        if self.shared is not None:
+            entry = self._lookup_shared(key, entry)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def refresh(self, key: CacheKey, func: Callable[[], Optional[bool]]) -> bool:
+        """在后台线程中执行 func（重新解析并写入缓存，返回是否成功；由其他进程刷新时返回None）
+        刷新已软过期的条目；同一个键已在刷新或同时刷新数已满时不做任何事，返回是否开始了刷新"""
+        with self._lock:
+            if key in self._refreshing or len(self._refreshing) >= self.max_refreshes:
+                skipped = True
+            else:
+                self._refreshing.add(key)
+                skipped = False
+        if skipped:
+            CACHE_REFRESHES.labels(self.name, 'skipped').inc()
+            return False
+        threading.Thread(target=self._run_refresh, args=(key, func), name='cache-refresh', daemon=True).start()
+        return True
+
+    def _run_refresh(self, key: CacheKey, func: Callable[[], Optional[bool]]):
+        outcome = 'failed'
+        try:
+            result = func()
+            outcome = 'skipped' if result is None else 'ok' if result else 'failed'
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+                entry = self._entries.get(key)
+                now = time.monotonic()
+                if outcome != 'ok' and entry is not None and entry[0] <= now:
+                    # 没有得到新结果：继续提供旧结果，一段时间内不再重试
+                    self._entries[key] = (now + min(self.ttl, REFRESH_RETRY), entry[1], entry[2])
+        CACHE_REFRESHES.labels(self.name, outcome).inc()
+
+    def refreshing(self) -> int:
+        """正在后台刷新的条目数"""
+        with self._lock:
+            return len(self._refreshing)
+
+    def invalidate(self, key: CacheKey):
+        """删除指定条目"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.snapshot is not None:
+            self.snapshot.discard(key)
+        if self.shared is not None:
+            self._call_shared('delete', key)
+
+    def invalidate_platform(self, platform: str) -> int:
+        """删除某个平台的全部条目（含剧集列表），返回删除的条数"""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if key[0] == platform or (key[0] == 'series' and key[1] == platform)]
+            for key in keys:
+                del self._entries[key]
+        if self.snapshot is not None:
+            self.snapshot.discard_platform(platform)
+        if self.shared is not None:
+            return max(len(keys), self._call_shared('delete_platform', platform, default=0))
+        return len(keys)
+
+    def items(self) -> List[Tuple[CacheKey, Dict[str, Any], float, float]]:
+        """全部未硬过期的条目 (键, 结果, 软过期时刻, 硬过期时刻)，时刻为墙上时钟，用于导出快照；
+        包括快照中尚未读取的条目，不包括只在共享层中的条目"""
+        now = time.monotonic()
+        offset = time.time() - now
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._entries.items() if entry[1] > now]
+        items = [(key, value, stale_at + offset, expires_at + offset)
+                 for key, (stale_at, expires_at, value) in entries]
+        if self.snapshot is not None:
+            local = {key for key, _ in entries}
+            items.extend(item for item in self.snapshot.items() if item[0] not in local)
+        return items
+
+    def clear(self):
+        """清空进程内缓存（共享层由其他进程共用，不清空）"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        stats = {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+        if self.shared is not None:
+            stats['shared'] = self._call_shared('stats')
+        if self.snapshot is not None:
+            stats['snapshot'] = self.snapshot.stats()
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResultCache:
+    """获取进程内共享的默认缓存"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                ttl = float(os.environ.get('VIDEO_CACHE_TTL', '1800'))
+                shared = None
+                if os.environ.get('VIDEO_SHARED_CACHE'):
+                    # 只在配置了共享层时才导入 sqlite3
+                    import shared_cache
+                    shared = shared_cache.from_environment()
+                snapshot = None
+                if os.environ.get('VIDEO_CACHE_SNAPSHOT'):
+                    import cache_snapshot
+                    snapshot = cache_snapshot.open_snapshot(os.environ['VIDEO_CACHE_SNAPSHOT'])
+                _default_cache = ResultCache(ttl=ttl, hard_ttl=float(os.environ.get('VIDEO_CACHE_HARD_TTL', str(ttl * 4))),
+                                             shared=shared, snapshot=snapshot)
+                CACHE_ENTRIES.labels(_default_cache.name).set_function(_default_cache.__len__)
+    return _default_cache
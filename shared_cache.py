@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+跨进程共享的解析结果缓存
+同一台机器上的多个Streamlit进程、解析服务的多个工作进程各自有进程内缓存，
+N 个进程要为同一个视频各解析一次、各保存一份。这里用一个 SQLite 文件（WAL模式）作为所有进程共用的第二层缓存，
+不需要额外的服务：
+
+    读取       进程内缓存未命中时查共享层，命中后放回进程内缓存
+    写入       解析结果同时写入两层（UPSERT，一条语句完成）
+    单飞       claim() 以 put-if-absent 的方式原子地声明“由我解析这个键”，
+               其他进程在租约有效期内等待结果写入共享层，而不是同时请求源站
+    淘汰       触发器维护全部条目的总字节数，超过上限时按最近访问时间淘汰（LRU），已硬过期的条目先删除
+
+过期时间使用墙上时钟（进程之间单调时钟不可比）。最近访问时间每个条目最多每 TOUCH_INTERVAL 秒更新一次，
+读多写少时不会把每次读取都变成一次写事务。连接按线程创建，fork 出的子进程会重新打开连接
+
+配置（环境变量）:
+    VIDEO_SHARED_CACHE=/var/tmp/video-cache.sqlite   共享缓存文件，未设置时只使用进程内缓存
+    VIDEO_SHARED_CACHE_BYTES=67108864                 条目总字节数上限（默认64MB）
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Dict, Any, Tuple, Iterator
+
+from metrics import CACHE_REQUESTS, CACHE_EVICTIONS, REGISTRY
+from parse_result import ParseResult
+
+SHARED_BYTES = REGISTRY.gauge('video_shared_cache_bytes', '共享结果缓存中条目的总字节数', ('cache',))
+
+# 最近访问时间的更新间隔（秒）
+TOUCH_INTERVAL = 5
+# 超过上限时淘汰到上限的这个比例，之后的若干次写入不需要再淘汰
+LOW_WATER = 0.9
+# 一次淘汰语句最多考察的条目数
+EVICT_BATCH = 256
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stale_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('bytes', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'bytes';
+END;
+'''
+
+
+def encode_key(key: Tuple[str, ...]) -> str:
+    """缓存键编码为文本，前缀可用于按平台删除"""
+    return json.dumps(list(key), ensure_ascii=False)
+
+
+def _encode_value(value: Dict[str, Any]) -> bytes:
+    if isinstance(value, ParseResult):
+        value = value.to_dict()
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class SharedCache:
+    """基于 SQLite WAL 的跨进程结果缓存"""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, name: str = 'shared'):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.name = name
+        self._local = threading.local()
+        self._hit_metric = CACHE_REQUESTS.labels(name, 'hit')
+        self._stale_metric = CACHE_REQUESTS.labels(name, 'stale')
+        self._miss_metric = CACHE_REQUESTS.labels(name, 'miss')
+        self._eviction_metric = CACHE_EVICTIONS.labels(name)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            local.db = db
+            local.pid = os.getpid()
+        return local.db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT：写事务一开始就取得写锁，避免多个进程同时升级锁时互相等待"""
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def lookup(self, key: Tuple[str, ...]) -> Optional[Tuple[Dict[str, Any], float, float]]:
+        """读取条目，返回 (结果, 软过期时刻, 硬过期时刻)（墙上时钟），未命中或已硬过期返回None"""
+        now = time.time()
+        text = encode_key(key)
+        db = self._connect()
+        row = db.execute('SELECT value, stale_at, expires_at, accessed FROM entries WHERE key = ?',
+                         (text,)).fetchone()
+        if row is None or row[2] <= now:
+            self._miss_metric.inc()
+            return None
+        value, stale_at, expires_at, accessed = row
+        if accessed < now - TOUCH_INTERVAL:
+            db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, text))
+        (self._stale_metric if stale_at <= now else self._hit_metric).inc()
+        return json.loads(value), stale_at, expires_at
+
+    def contains(self, key: Tuple[str, ...]) -> bool:
+        """是否有未硬过期的条目（不更新访问时间，不计入命中统计）"""
+        row = self._connect().execute('SELECT expires_at FROM entries WHERE key = ?', (encode_key(key),)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def put(self, key: Tuple[str, ...], value: Dict[str, Any], ttl: float, hard_ttl: float):
+        """写入或覆盖条目"""
+        self._write(key, value, ttl, hard_ttl, only_if_absent=False)
+
+    def put_if_absent(self, key: Tuple[str, ...], value: Dict[str, Any], ttl: float, hard_ttl: float) -> bool:
+        """只有不存在未硬过期的条目时才写入，返回是否写入（多个进程同时写入时恰好一个成功）"""
+        return self._write(key, value, ttl, hard_ttl, only_if_absent=True)
+
+    def _write(self, key, value, ttl: float, hard_ttl: float, only_if_absent: bool) -> bool:
+        blob = _encode_value(value)
+        now = time.time()
+        condition = 'WHERE entries.expires_at <= excluded.accessed' if only_if_absent else ''
+        with self._transaction() as db:
+            cursor = db.execute(
+                'INSERT INTO entries (key, value, size, stale_at, expires_at, accessed) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'stale_at = excluded.stale_at, expires_at = excluded.expires_at, accessed = excluded.accessed '
+                + condition,
+                (encode_key(key), blob, len(blob), now + ttl, now + max(ttl, hard_ttl), now)
+            )
+            written = cursor.rowcount > 0
+            if written:
+                self._evict(db, now)
+        return written
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        """总字节数超过上限时先删除已硬过期的条目，再按最近访问时间淘汰到 LOW_WATER"""
+        if self._total(db) <= self.max_bytes:
+            return
+        deleted = db.execute('DELETE FROM entries WHERE expires_at <= ?', (now,)).rowcount
+        target = int(self.max_bytes * LOW_WATER)
+        excess = self._total(db) - target
+        while excess > 0:
+            # 最久未访问的条目中，之前累计字节数还不足超出部分的都删除
+            count = db.execute(
+                'DELETE FROM entries WHERE key IN ('
+                ' SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed, key) - size AS before'
+                '  FROM (SELECT key, size, accessed FROM entries ORDER BY accessed, key LIMIT ?))'
+                ' WHERE before < ?)',
+                (EVICT_BATCH, excess)
+            ).rowcount
+            if not count:
+                break
+            deleted += count
+            excess = self._total(db) - target
+        self._eviction_metric.inc(deleted)
+
+    @staticmethod
+    def _total(db: sqlite3.Connection) -> int:
+        return db.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+
+    def claim(self, key: Tuple[str, ...], lease: float = 15) -> Optional[str]:
+        """原子地声明由当前调用方解析这个键（put-if-absent 租约），成功返回租约令牌，
+        已有其他调用方持有未过期的租约时返回None"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                'INSERT INTO leases (key, token, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at '
+                'WHERE leases.expires_at <= ?',
+                (encode_key(key), token, now + lease, now)
+            )
+            return token if cursor.rowcount > 0 else None
+
+    def release(self, key: Tuple[str, ...], token: str):
+        """释放自己持有的租约"""
+        with self._transaction() as db:
+            db.execute('DELETE FROM leases WHERE key = ? AND token = ?', (encode_key(key), token))
+
+    def leased(self, key: Tuple[str, ...]) -> bool:
+        """是否有调用方持有这个键的未过期租约"""
+        row = self._connect().execute('SELECT expires_at FROM leases WHERE key = ?', (encode_key(key),)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def delete(self, key: Tuple[str, ...]):
+        with self._transaction() as db:
+            db.execute('DELETE FROM entries WHERE key = ?', (encode_key(key),))
+
+    def delete_platform(self, platform: str) -> int:
+        """删除某个平台的全部条目（含剧集列表），返回删除的条数"""
+        prefixes = (encode_key((platform,))[:-1] + ',', encode_key(('series', platform))[:-1] + ',')
+        with self._transaction() as db:
+            return sum(db.execute('DELETE FROM entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)).rowcount
+                       for prefix in prefixes)
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute('DELETE FROM entries')
+            db.execute('DELETE FROM leases')
+
+    def items(self) -> Iterator[Tuple[Tuple[str, ...], Dict[str, Any], float, float]]:
+        """全部未硬过期的条目 (键, 结果, 软过期时刻, 硬过期时刻)，用于导出快照"""
+        rows = self._connect().execute('SELECT key, value, stale_at, expires_at FROM entries WHERE expires_at > ?',
+                                       (time.time(),))
+        for key, value, stale_at, expires_at in rows:
+            yield tuple(json.loads(key)), json.loads(value), stale_at, expires_at
+
+    def stats(self) -> Dict[str, Any]:
+        db = self._connect()
+        entries = db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {'entries': entries, 'bytes': self._total(db), 'max_bytes': self.max_bytes}
+
+    def total_bytes(self) -> int:
+        return self._total(self._connect())
+
+
+def from_environment() -> Optional[SharedCache]:
+    """设置了 VIDEO_SHARED_CACHE 时打开共享缓存，否则返回None"""
+    path = os.environ.get('VIDEO_SHARED_CACHE')
+    if not path:
+        return None
+    shared = SharedCache(path, max_bytes=int(os.environ.get('VIDEO_SHARED_CACHE_BYTES', str(64 * 1024 * 1024))))
+    SHARED_BYTES.labels(shared.name).set_function(shared.total_bytes)
+    return shared
@@ -4,13 +4,23 @@
 """
 海绵宝宝影视启动脚本
 一键启动您的VIP视频解析器
+
+启动后轮询服务的就绪接口（Streamlit 的 /_stcore/health、解析服务的 /healthz），
+就绪后立即报告实际耗时并打开浏览器，而不是固定等待几秒
 """
 
 import os
 import sys
+import argparse
+import importlib.util
 import subprocess
 import webbrowser
 import time
+import urllib.request
+
+# 等待服务就绪的最长时间和轮询间隔（秒）
+READY_TIMEOUT = float(os.environ.get('VIDEO_READY_TIMEOUT', '30'))
+READY_INTERVAL = 0.05
 
 def print_logo():
     """打印海绵宝宝影视LOGO"""
@@ -26,23 +36,38 @@ def print_logo():
     print(logo)
 
 def check_dependencies():
-    """检查依赖"""
+    """检查依赖（只查找模块，不导入，服务进程会自己导入）"""
     print("🔍 检查依赖包...")
-    try:
-        import streamlit
-        import requests
+    missing = [name for name in ("streamlit", "requests") if importlib.util.find_spec(name) is None]
+    if not missing:
         print("✅ 依赖包检查完成")
         return True
-    except ImportError as e:
-        print(f"❌ 缺少依赖包: {e}")
-        print("正在安装依赖包...")
+    
+    print(f"❌ 缺少依赖包: {', '.join(missing)}")
+    print("正在安装依赖包...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        print("✅ 依赖包安装完成")
+        return True
+    except subprocess.CalledProcessError:
+        print("❌ 依赖包安装失败，请手动运行: pip install -r requirements.txt")
+        return False
+
+def wait_until_ready(url, process, timeout=READY_TIMEOUT):
+    """轮询就绪接口直到返回200，返回等待的秒数；进程提前退出或超时返回None"""
+    started = time.perf_counter()
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            return None
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-            print("✅ 依赖包安装完成")
-            return True
-        except subprocess.CalledProcessError:
-            print("❌ 依赖包安装失败，请手动运行: pip install -r requirements.txt")
-            return False
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            pass
+        time.sleep(READY_INTERVAL)
+    return None
 
 def start_app():
     """启动应用"""
@@ -62,10 +87,17 @@ def start_app():
         ], env=env)
         
         print("⏳ 等待应用启动...")
-        time.sleep(3)
+        url = "http://localhost:8501"
+        elapsed = wait_until_ready(f"{url}/_stcore/health", process)
+        if elapsed is None:
+            if process.poll() is not None:
+                print(f"❌ 应用进程已退出（退出码 {process.returncode}）")
+                return False
+            print(f"⚠️ {READY_TIMEOUT:g} 秒内未就绪，继续等待应用启动")
+        else:
+            print(f"✅ 应用已就绪，用时 {elapsed:.2f} 秒")
         
         # 自动打开浏览器
-        url = "http://localhost:8501"
         print(f"🌐 应用地址: {url}")
         
         try:
@@ -97,8 +129,70 @@ def start_app():
         print(f"❌ 启动失败: {e}")
         return False
 
+def start_api(port=8000, workers=1, threads=16, dispatch=None):
+    """启动无界面JSON解析服务"""
+    print("🚀 启动海绵宝宝影视解析服务...")
+    
+    try:
+        command = [
+            sys.executable, "api_server.py",
+            "--host", "0.0.0.0",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--threads", str(threads)
+        ]
+        if dispatch:
+            command += ["--dispatch", dispatch]
+        process = subprocess.Popen(command)
+        
+        print("⏳ 等待解析服务启动...")
+        elapsed = wait_until_ready(f"http://127.0.0.1:{port}/healthz", process)
+        if elapsed is None:
+            if process.poll() is not None:
+                print(f"❌ 解析服务进程已退出（退出码 {process.returncode}）")
+                return False
+            print(f"⚠️ {READY_TIMEOUT:g} 秒内未就绪，继续等待解析服务启动")
+        else:
+            print(f"✅ 解析服务已就绪，用时 {elapsed:.2f} 秒")
+        
+        print("\n" + "="*50)
+        print("🧽 海绵宝宝影视解析服务已启动！")
+        print(f"🌐 服务地址: http://localhost:{port}")
+        print(f"⚙️ 工作进程: {workers} 个，每进程 {threads} 个线程")
+        print("📡 接口: /parse  /parse/batch  /platforms  /healthz")
+        print("🔄 按 Ctrl+C 停止服务")
+        print("="*50)
+        
+        try:
+            process.wait()
+        except KeyboardInterrupt:
+            print("\n🛑 正在停止服务...")
+            process.terminate()
+            process.wait()
+            print("👋 解析服务已停止，下次再见！")
+            
+    except Exception as e:
+        print(f"❌ 启动失败: {e}")
+        return False
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="海绵宝宝影视启动脚本")
+    parser.add_argument("--api", action="store_true", help="启动无界面JSON解析服务而不是Streamlit界面")
+    parser.add_argument("--port", type=int, default=8000, help="解析服务端口（仅--api）")
+    parser.add_argument("--workers", type=int, default=1, help="预fork的工作进程数（仅--api）")
+    parser.add_argument("--threads", type=int, default=16, help="每个工作进程的线程数（仅--api）")
+    parser.add_argument("--dispatch", choices=["hash", "least-loaded"],
+                        help="多进程时由分发进程转发请求，hash 让同一个视频总是落在同一个工作进程（仅--api）")
+    parser.add_argument("--warmup", help="预热清单（每行一个链接），启动后在后台预解析，不影响就绪")
+    parser.add_argument("--history", help="解析记录文件，记录热门链接；没有预热清单时从中取链接预热")
+    parser.add_argument("--shared-cache", help="跨进程共享的结果缓存文件（SQLite），多个工作进程共用解析结果")
+    parser.add_argument("--snapshot", help="结果缓存快照文件（cache_snapshot.py 导出），启动时映射，查找时按需读取")
+    return parser.parse_args()
+
 def main():
     """主函数"""
+    args = parse_args()
     print_logo()
     
     # 检查依赖
@@ -106,16 +200,41 @@ def main():
         return
     
     # 检查文件
-    if not os.path.exists("app.py"):
-        print("❌ 找不到app.py文件")
+    entry_file = "api_server.py" if args.api else "app.py"
+    if not os.path.exists(entry_file):
+        print(f"❌ 找不到{entry_file}文件")
         return
     
     if not os.path.exists("enhanced_parser.py"):
         print("❌ 找不到enhanced_parser.py文件")
         return
     
+    # 预热配置通过环境变量传给服务进程
+    if args.warmup:
+        if not os.path.exists(args.warmup):
+            print(f"❌ 找不到预热清单 {args.warmup}")
+            return
+        os.environ["VIDEO_WARMUP_MANIFEST"] = os.path.abspath(args.warmup)
+        print(f"🔥 启动后在后台预热: {args.warmup}")
+    if args.history:
+        os.environ["VIDEO_PARSE_HISTORY"] = os.path.abspath(args.history)
+        if not args.warmup:
+            print(f"🔥 启动后在后台预热解析记录中的热门链接: {args.history}")
+    if args.shared_cache:
+        os.environ["VIDEO_SHARED_CACHE"] = os.path.abspath(args.shared_cache)
+        print(f"🗄️ 共享结果缓存: {args.shared_cache}")
+    if args.snapshot:
+        if not os.path.exists(args.snapshot):
+            print(f"❌ 找不到结果缓存快照 {args.snapshot}")
+            return
+        os.environ["VIDEO_CACHE_SNAPSHOT"] = os.path.abspath(args.snapshot)
+        print(f"🧊 结果缓存快照: {args.snapshot}")
+    
     # 启动应用
-    start_app()
+    if args.api:
+        start_api(args.port, args.workers, args.threads, args.dispatch)
+    else:
+        start_app()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
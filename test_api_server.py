@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分发进程测试：路由键只解析URL，预热与分发的归属一致，工作进程全部退出时返回503
+"""
+
+import json
+
+from api_server import RoutingServer, WorkerEndpoint, owned_by
+from enhanced_parser import EnhancedVIPParser
+from hash_ring import HashRing
+from result_cache import ResultCache
+from warmup import CacheWarmer
+
+
+def _server(names=('worker-0', 'worker-1'), capacity=1):
+    workers = [WorkerEndpoint(name, 0) for name in names]
+    server = RoutingServer(('127.0.0.1', 0), HashRing(names), workers, capacity=capacity,
+                           bind_and_activate=False)
+    return server, workers
+
+
+def test_route_key_does_not_create_parser():
+    """路由键按平台和视频ID计算，同一视频的各P归同一个工作进程，不创建解析器"""
+    server, _ = _server()
+    assert server.route_key('/parse', 'https://v.qq.com/x/cover/mcv8hkc8zk8lnov/m4101qychtr.html') \
+        == 'v.qq.com:m4101qychtr'
+    assert server.route_key('/series', 'https://v.qq.com/x/cover/mcv8hkc8zk8lnov/m4101qychtr.html') \
+        == 'series:v.qq.com:mcv8hkc8zk8lnov'
+    assert server.route_key('/parse', 'https://www.bilibili.com/video/BV1xx411c7mD?p=2') \
+        == server.route_key('/parse', 'https://www.bilibili.com/video/BV1xx411c7mD')
+    assert server.route_key('/parse', 'https://example.com/video/1') is None
+    assert server.route_key('/health', 'https://www.bilibili.com/video/BV1xx411c7mD') is None
+    assert getattr(server._local, 'parser', None) is None
+
+
+def test_saturated_owner_falls_back_to_least_loaded():
+    """归属进程饱和时改发给更空闲的进程"""
+    server, _ = _server()
+    key = 'bilibili.com:BV1xx411c7mD'
+    owner = server.workers[server.ring.get(key)]
+    owner.in_flight = 1
+    worker, route = server.choose(key)
+    assert route == 'fallback' and worker is not owner
+
+
+def test_no_worker_up_returns_503():
+    """工作进程全部退出（含仍在哈希环上、已标记下线的归属进程）时返回503，不抛出异常"""
+    server, workers = _server()
+    key = 'bilibili.com:BV1xx411c7mD'
+    for worker in workers:
+        worker.up = False
+        worker.in_flight = 1
+    assert server.choose(key) == (None, 'least_loaded')
+
+    status, _, _, payload = server.forward('GET', '/parse', None, key)
+    assert status == 503
+    assert json.loads(payload)['success'] is False
+
+
+def test_warmup_ownership_matches_dispatch():
+    """预热时各工作进程选中的链接与分发时的归属一致，多P视频的各P都在同一个进程预热"""
+    names = tuple(f'worker-{index}' for index in range(4))
+    server, _ = _server(names, capacity=16)
+    urls = [f'https://www.bilibili.com/video/BV1xx411c7mD?p={page}' for page in range(1, 9)]
+    urls += ['https://v.qq.com/x/cover/mcv8hkc8zk8lnov/m4101qychtr.html',
+             'https://www.iqiyi.com/v_1fbzh2w5p54.html',
+             'https://www.mgtv.com/b/332759/3567533.html']
+    parser = EnhancedVIPParser(cache=ResultCache(name='warmup-test'))
+    for url in urls:
+        parser.cache.put(parser.get_cache_key(url), {'success': True})
+
+    for url in urls:
+        warmed = []
+        for name in names:
+            warmer = CacheWarmer(select=owned_by(server.ring, name))
+            if warmer._warm(parser, url, set()) == 'already_cached':
+                warmed.append(name)
+        worker, _ = server.choose(server.route_key('/parse', url))
+        worker.in_flight -= 1
+        assert warmed == [worker.name], url
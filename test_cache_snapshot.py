@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果缓存快照测试：写入后顺序读取和按键查找一致，键哈希相同时逐个比较键，
+丢弃的键和平台不再从快照中读取
+"""
+
+import io
+import time
+
+import pytest
+
+import cache_snapshot
+from cache_snapshot import SnapshotReader, iter_snapshot, save_snapshot, write_snapshot
+from result_cache import ResultCache
+
+
+def _entries(count=100):
+    now = time.time()
+    entries = [(('bilibili.com', f'BV{i:08d}'), {'success': True, 'title': f'视频{i}', 'vid': f'BV{i:08d}'},
+                now + 600, now + 3600) for i in range(count)]
+    entries.append((('series', 'v.qq.com', 'mcv8hkc8zk8lnov'), {'success': True, 'episodes': [{'vid': 'a'}]},
+                    now - 10, now + 3600))
+    return entries
+
+
+def test_round_trip(tmp_path):
+    """顺序读取、按键查找和 items() 得到写入时的全部条目"""
+    entries = _entries()
+    path = str(tmp_path / 'cache.vps')
+    assert save_snapshot(entries, path) == len(entries)
+
+    with open(path, 'rb') as f:
+        assert list(iter_snapshot(f)) == entries
+
+    reader = SnapshotReader(path)
+    assert len(reader) == len(entries)
+    for key, value, stale_at, expires_at in entries:
+        assert reader.contains(key)
+        assert reader.get(key) == (value, stale_at, expires_at)
+    assert list(reader.items()) == entries
+    assert reader.get(('bilibili.com', 'BV-missing')) is None
+    assert reader.stats()['hits'] == len(entries)
+
+
+def test_expired_and_duplicate_entries_are_skipped():
+    """已硬过期的条目不写入，同一个键只保留第一个"""
+    now = time.time()
+    key = ('mgtv.com', '3567533')
+    entries = [(key, {'title': 'first'}, now + 60, now + 60),
+               (key, {'title': 'second'}, now + 60, now + 60),
+               (('mgtv.com', 'expired'), {'title': 'old'}, now - 60, now - 1)]
+    out = io.BytesIO()
+    assert write_snapshot(entries, out) == 1
+    out.seek(0)
+    assert [(found, value) for found, value, _, _ in iter_snapshot(out)] == [(key, {'title': 'first'})]
+
+
+def test_lookup_with_hash_collisions(tmp_path, monkeypatch):
+    """多个键哈希相同时按键区分，不会返回相邻的其他条目"""
+    monkeypatch.setattr(cache_snapshot, '_key_hash', lambda data: len(data) % 3)
+    entries = _entries(30)
+    path = str(tmp_path / 'cache.vps')
+    save_snapshot(entries, path)
+
+    reader = SnapshotReader(path)
+    for key, value, _, _ in entries:
+        assert reader.get(key)[0] == value
+    assert not reader.contains(('bilibili.com', 'BV99999999'))
+    assert reader.get(('bilibili.com', 'BV99999999')) is None
+
+
+def test_discard(tmp_path):
+    """丢弃的键和平台不再读取，其他条目不受影响"""
+    entries = _entries(10)
+    path = str(tmp_path / 'cache.vps')
+    save_snapshot(entries, path)
+    reader = SnapshotReader(path)
+
+    reader.discard(('bilibili.com', 'BV00000001'))
+    assert reader.get(('bilibili.com', 'BV00000001')) is None
+    assert not reader.contains(('bilibili.com', 'BV00000001'))
+    assert reader.get(('bilibili.com', 'BV00000002')) is not None
+    assert len(list(reader.items())) == len(entries) - 1
+
+    reader.discard_platform('v.qq.com')
+    assert reader.get(('series', 'v.qq.com', 'mcv8hkc8zk8lnov')) is None
+    reader.discard_platform('bilibili.com')
+    assert list(reader.items()) == []
+
+
+def test_result_cache_prefers_newer_writes(tmp_path):
+    """缓存写入或删除某个键后，快照中的旧条目不再被读回"""
+    path = str(tmp_path / 'cache.vps')
+    save_snapshot(_entries(3), path)
+    cache = ResultCache(name='snapshot-test', snapshot=SnapshotReader(path))
+    key = ('bilibili.com', 'BV00000000')
+    assert cache.get(key)['title'] == '视频0'
+
+    cache.put(key, {'success': True, 'title': 'new'})
+    cache.clear()
+    assert cache.get(key) is None
+
+    cache.invalidate_platform('bilibili.com')
+    assert cache.get(('bilibili.com', 'BV00000001')) is None
+
+
+def test_rejects_truncated_file(tmp_path):
+    path = tmp_path / 'cache.vps'
+    save_snapshot(_entries(3), str(path))
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+    assert cache_snapshot.open_snapshot(str(path)) is None
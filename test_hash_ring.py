@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+一致性哈希环测试：映射稳定，增删一个节点时只有约 1/N 的键改变归属，且只在变动的节点和其余节点之间移动
+"""
+
+from hash_ring import HashRing
+
+KEYS = [f'bilibili.com:BV{i:08d}' for i in range(20000)]
+NODES = [f'worker-{i}' for i in range(4)]
+
+
+def _owners(ring):
+    return {key: ring.get(key) for key in KEYS}
+
+
+def test_empty_ring():
+    ring = HashRing()
+    assert ring.get('v.qq.com:m4101qychtr') is None
+    ring.add('worker-0')
+    assert ring.get('v.qq.com:m4101qychtr') == 'worker-0'
+
+
+def test_mapping_is_stable_and_balanced():
+    """同一组节点（不论加入顺序）得到相同的映射，各节点分到的键数接近平均"""
+    owners = _owners(HashRing(NODES))
+    assert owners == _owners(HashRing(reversed(NODES)))
+    counts = {node: 0 for node in NODES}
+    for node in owners.values():
+        counts[node] += 1
+    average = len(KEYS) / len(NODES)
+    assert all(0.75 * average < count < 1.25 * average for count in counts.values())
+
+
+def test_adding_node_moves_only_its_share():
+    """加入第 N+1 个节点时约 1/(N+1) 的键改投新节点，其余键不动"""
+    ring = HashRing(NODES)
+    before = _owners(ring)
+    ring.add('worker-4')
+    after = _owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == 'worker-4' for key in moved)
+    expected = len(KEYS) / (len(NODES) + 1)
+    assert 0.75 * expected < len(moved) < 1.25 * expected
+
+
+def test_removing_node_moves_only_its_keys():
+    """移除节点时只有归属它的键改投其他节点，移除后再加入恢复原来的映射"""
+    ring = HashRing(NODES)
+    before = _owners(ring)
+    ring.remove('worker-2')
+    after = _owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert moved == [key for key in KEYS if before[key] == 'worker-2']
+    assert 'worker-2' not in after.values()
+    expected = len(KEYS) / len(NODES)
+    assert 0.75 * expected < len(moved) < 1.25 * expected
+
+    ring.add('worker-2')
+    assert _owners(ring) == before
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抓取计划测试：各解析器对页面请求出错、页面返回非200的处理与迁移到平台插件之前一致
+"""
+
+import pytest
+import requests
+
+import http_client
+from enhanced_parser import EnhancedVIPParser
+from result_cache import ResultCache
+from video_parser import VideoParser
+from youku_fix import YoukuFixer
+from youku_preferred import YoukuPreferredParser
+
+YOUKU_URL = 'https://v.youku.com/v_show/id_XNTkxNjcwMjg0OA==.html'
+
+
+def _raise(url):
+    raise OSError('net down')
+
+
+def _not_found(url):
+    response = requests.Response()
+    response.status_code = 404
+    response.url = url
+    response.encoding = 'utf-8'
+    response._content = b'not found'
+    return response
+
+
+@pytest.fixture
+def transport():
+    yield http_client.set_transport
+    http_client.set_transport(None)
+
+
+@pytest.mark.parametrize('parse', [lambda url: YoukuFixer().parse_youku_video(url),
+                                   lambda url: YoukuPreferredParser().parse_youku_video(url)])
+def test_youku_parsers_ignore_page_errors(transport, parse):
+    """优酷专用解析器请求页面出错时按链接中的视频ID和默认标题返回"""
+    transport(_raise)
+    result = parse(YOUKU_URL)
+    assert result['success']
+    assert result['vid'] == 'XNTkxNjcwMjg0OA=='
+    assert result['title'] == '优酷视频'
+
+
+@pytest.mark.parametrize('url', [YOUKU_URL, 'https://www.iqiyi.com/v_1fbzh2w5p54.html',
+                                 'https://www.mgtv.com/b/332759/3567533.html'])
+def test_video_parser_fails_on_page_status(transport, url):
+    """播放页返回非200时 VideoParser 解析失败，EnhancedVIPParser 按默认值返回"""
+    transport(_not_found)
+    result = VideoParser().parse_video(url)
+    assert not result['success']
+    assert result['error'] == '获取页面失败'
+
+    result = EnhancedVIPParser(cache=ResultCache(max_entries=0)).parse_video(url)
+    assert result['success']
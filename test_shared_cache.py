@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享缓存测试：租约的声明、释放和过期，put_if_absent 对已过期条目的处理，
+以及结果缓存经由共享层的单飞和后台刷新
+"""
+
+import threading
+import time
+
+from result_cache import ResultCache, LOCAL_TOKEN
+from shared_cache import SharedCache
+
+KEY = ('bilibili.com', 'BV1xx411c7mD')
+
+
+def _shared(tmp_path, name='shared'):
+    return SharedCache(str(tmp_path / 'cache.sqlite'), name=name)
+
+
+def test_claim_is_exclusive_until_release(tmp_path):
+    """同一个键同时只有一个调用方拿到租约，释放后其他调用方可以再声明"""
+    first, second = _shared(tmp_path), _shared(tmp_path)
+    token = first.claim(KEY)
+    assert token
+    assert first.leased(KEY) and second.leased(KEY)
+    assert second.claim(KEY) is None
+    # 其他键不受影响
+    assert second.claim(('v.qq.com', 'm4101qychtr'))
+
+    first.release(KEY, token)
+    assert not second.leased(KEY)
+    assert second.claim(KEY)
+
+
+def test_release_ignores_foreign_token(tmp_path):
+    """只有持有令牌的调用方才能释放租约"""
+    cache = _shared(tmp_path)
+    token = cache.claim(KEY)
+    cache.release(KEY, 'not-' + token)
+    assert cache.leased(KEY)
+    assert cache.claim(KEY) is None
+
+
+def test_expired_lease_can_be_claimed(tmp_path):
+    """持有方没有释放（如进程退出）时，租约过期后其他调用方可以接手，原持有方的释放不影响新租约"""
+    first, second = _shared(tmp_path), _shared(tmp_path)
+    stale_token = first.claim(KEY, lease=0.05)
+    time.sleep(0.1)
+    assert not second.leased(KEY)
+    token = second.claim(KEY)
+    assert token and token != stale_token
+
+    first.release(KEY, stale_token)
+    assert second.leased(KEY)
+
+
+def test_put_if_absent_keeps_live_entry(tmp_path):
+    """已有未硬过期的条目（含已软过期的）时 put_if_absent 不写入"""
+    cache = _shared(tmp_path)
+    cache.put(KEY, {'title': 'first'}, ttl=0, hard_ttl=60)
+    assert not cache.put_if_absent(KEY, {'title': 'second'}, ttl=60, hard_ttl=60)
+    value, stale_at, _ = cache.lookup(KEY)
+    assert value['title'] == 'first'
+    assert stale_at <= time.time()
+
+
+def test_put_if_absent_replaces_expired_entry(tmp_path):
+    """不存在或已硬过期的条目由 put_if_absent 写入，总字节数按新条目计算"""
+    cache = _shared(tmp_path)
+    assert cache.put_if_absent(KEY, {'title': 'first'}, ttl=0.05, hard_ttl=0.05)
+    time.sleep(0.1)
+    assert cache.lookup(KEY) is None
+    assert not cache.contains(KEY)
+
+    assert cache.put_if_absent(KEY, {'title': 'second'}, ttl=60, hard_ttl=60)
+    assert cache.lookup(KEY)[0]['title'] == 'second'
+    assert cache.stats()['bytes'] == len('{"title":"second"}'.encode('utf-8'))
+
+
+def test_result_cache_waits_for_other_process(tmp_path):
+    """拿不到租约的进程等待持有方写入共享层，得到对方的结果"""
+    owner = ResultCache(name='owner', shared=_shared(tmp_path))
+    waiter = ResultCache(name='waiter', shared=_shared(tmp_path))
+    token = owner.claim(KEY)
+    assert token and token != LOCAL_TOKEN
+    assert waiter.claim(KEY) is None
+
+    def fill():
+        time.sleep(0.1)
+        owner.put(KEY, {'success': True, 'title': '完美世界'})
+        owner.release(KEY, token)
+
+    thread = threading.Thread(target=fill)
+    thread.start()
+    assert waiter.wait_filled(KEY, timeout=5)['title'] == '完美世界'
+    thread.join()
+
+
+def test_result_cache_wait_gives_up_when_owner_fails(tmp_path):
+    """持有方释放租约却没有写入结果时，等待方立即返回None（自己解析）"""
+    owner = ResultCache(name='owner', shared=_shared(tmp_path))
+    waiter = ResultCache(name='waiter', shared=_shared(tmp_path))
+    token = owner.claim(KEY)
+    owner.release(KEY, token)
+    started = time.monotonic()
+    assert waiter.wait_filled(KEY, timeout=5) is None
+    assert time.monotonic() - started < 1
+
+
+def test_skipped_refresh_reads_back_shared_result(tmp_path):
+    """其他进程正在刷新时本进程的刷新计为跳过，租约释放后读回对方写入的新结果"""
+    local = ResultCache(ttl=60, hard_ttl=600, name='local', shared=_shared(tmp_path))
+    other = ResultCache(ttl=60, hard_ttl=600, name='other', shared=_shared(tmp_path))
+    local.put(KEY, {'success': True, 'title': 'old'}, ttl=0)
+    assert local.lookup(KEY)[1]
+    token = other.claim(KEY)
+
+    def refresh():
+        if local.claim(KEY) is not None:
+            return True
+        local.wait_released(KEY, timeout=5)
+        return None
+
+    def finish():
+        time.sleep(0.1)
+        other.put(KEY, {'success': True, 'title': 'new'})
+        other.release(KEY, token)
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    assert local.refresh(KEY, refresh)
+    thread.join()
+    deadline = time.monotonic() + 5
+    while local.refreshing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert local.lookup(KEY) == ({'success': True, 'title': 'new'}, False)
+
+
+def test_skipped_refresh_defers_stale_entry():
+    """刷新被跳过且没有得到新结果时，旧结果一段时间内不再触发刷新"""
+    cache = ResultCache(ttl=60, hard_ttl=600, name='deferred')
+    cache.put(KEY, {'success': True, 'title': 'old'}, ttl=0)
+    assert cache.refresh(KEY, lambda: None)
+    deadline = time.monotonic() + 5
+    while cache.refreshing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.lookup(KEY) == ({'success': True, 'title': 'old'}, False)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析分阶段计时
+开启后 parse_video 会在结果中附带 timings 字段，按阶段拆分耗时并统计下载字节数：
+
+    detect    平台检测
+    connect   建立连接并收到响应头（包含DNS、TLS和源站处理时间）
+    transfer  接收响应体
+    decode    响应体解码为文本
+    json      JSON解析
+    extract   其余时间，主要是正则提取和结果组装
+
+同时按平台和阶段累计到直方图，便于跨请求汇总
+
+开启方式：设置环境变量 VIDEO_PARSE_TIMINGS=1，或调用时传入 timings=True
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+from metrics import PARSES, PARSE_SECONDS
+
+STAGES = ('detect', 'connect', 'transfer', 'decode', 'json', 'extract')
+
+# 直方图桶上界（毫秒），最后一个桶收纳更大的值
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_enabled = os.environ.get('VIDEO_PARSE_TIMINGS', '').lower() in ('1', 'true', 'yes')
+_local = threading.local()
+_clock = time.perf_counter
+
+
+def set_enabled(enabled: bool):
+    """全局开关：开启后所有解析结果都附带 timings"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class ParseTimings:
+    """一次解析的分阶段计时"""
+
+    __slots__ = ('stages', 'bytes_received', 'requests', 'started')
+
+    def __init__(self):
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.bytes_received = 0
+        self.requests = 0
+        self.started = _clock()
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] += seconds
+
+    def finish(self) -> Dict[str, Any]:
+        """结束计时，没有单独计时的部分归入 extract"""
+        total = _clock() - self.started
+        measured = sum(seconds for stage, seconds in self.stages.items() if stage != 'extract')
+        self.stages['extract'] = max(0.0, total - measured)
+
+        timings = {f'{stage}_ms': round(seconds * 1e3, 3) for stage, seconds in self.stages.items()}
+        timings['total_ms'] = round(total * 1e3, 3)
+        timings['bytes'] = self.bytes_received
+        timings['requests'] = self.requests
+        return timings
+
+
+def current() -> Optional[ParseTimings]:
+    """当前线程正在进行的计时，未开启时为None"""
+    return getattr(_local, 'timings', None)
+
+
+class StageHistograms:
+    """按平台和阶段累计的耗时直方图"""
+
+    def __init__(self, bounds_ms=BUCKET_BOUNDS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._histograms = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform: str, timings: Dict[str, Any]):
+        """记录一次解析的计时结果"""
+        with self._lock:
+            for stage in STAGES + ('total',):
+                key = (platform, stage)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [[0] * (len(self.bounds_ms) + 1), 0, 0.0]
+                value = timings[f'{stage}_ms']
+                histogram[0][bisect.bisect_left(self.bounds_ms, value)] += 1
+                histogram[1] += 1
+                histogram[2] += value
+            self._bytes[platform] = self._bytes.get(platform, 0) + timings['bytes']
+
+    def _quantile(self, buckets: List[int], count: int, q: float) -> float:
+        """按桶估算分位数（取所在桶的上界）"""
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.bounds_ms[index] if index < len(self.bounds_ms) else float('inf')
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出当前统计：平台 -> 阶段 -> 次数、平均值、p50/p95估计和各桶计数"""
+        with self._lock:
+            items = [(key, list(buckets), count, total) for key, (buckets, count, total) in self._histograms.items()]
+            received = dict(self._bytes)
+
+        result = {}
+        for (platform, stage), buckets, count, total in sorted(items):
+            stages = result.setdefault(platform, {'bytes': received.get(platform, 0), 'stages': {}})['stages']
+            stages[stage] = {
+                'count': count,
+                'mean_ms': round(total / count, 3) if count else 0.0,
+                'p50_ms': self._quantile(buckets, count, 0.50),
+                'p95_ms': self._quantile(buckets, count, 0.95),
+                'buckets': buckets
+            }
+        return {'bounds_ms': list(self.bounds_ms), 'platforms': result}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._bytes.clear()
+
+
+_histograms = StageHistograms()
+
+
+def get_histograms() -> StageHistograms:
+    """进程内共享的阶段直方图"""
+    return _histograms
+
+
+def timed_parse(func: Callable) -> Callable:
+    """装饰解析入口：每次解析都记入解析次数和耗时指标，开启计时时再在结果中附带 timings 并记入直方图"""
+
+    @functools.wraps(func)
+    def wrapper(self, url, *args, timings: Optional[bool] = None, **kwargs):
+        # 嵌套调用（如解析器内部再调用解析入口）计入外层
+        if getattr(_local, 'active', False):
+            return func(self, url, *args, **kwargs)
+
+        enabled = _enabled if timings is None else timings
+        parse_timings = ParseTimings() if enabled else None
+        _local.active = True
+        _local.timings = parse_timings
+        start = _clock()
+        try:
+            result = func(self, url, *args, **kwargs)
+        finally:
+            _local.active = False
+            _local.timings = None
+        elapsed = _clock() - start
+
+        if isinstance(result, dict):
+            platform = result.get('platform') or type(self).__name__
+            if result.get('cache_hit'):
+                outcome = 'cache_hit'
+            else:
+                outcome = 'success' if result.get('success') else 'failure'
+            PARSES.labels(platform, outcome).inc()
+            PARSE_SECONDS.labels(platform).observe(elapsed)
+
+            if parse_timings is not None:
+                data = parse_timings.finish()
+                result['timings'] = data
+                _histograms.record(platform, data)
+        return result
+
+    return wrapper
+
+
+def timed_stage(stage: str) -> Callable:
+    """装饰解析过程中的某个步骤，计入指定阶段"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parse_timings = getattr(_local, 'timings', None)
+            if parse_timings is None:
+                return func(*args, **kwargs)
+            start = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                parse_timings.stages[stage] += _clock() - start
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动时预热解析结果缓存
+部署后缓存都是空的，热门视频的第一批用户要等完整的源站请求。启动时可以给出一份预热清单
+（每行一个视频链接，# 开头为注释；也可以是JSON链接数组），或者从持久化的解析记录中取最常解析的链接，
+在后台线程中依次解析并写入结果缓存：
+
+    不影响就绪   预热在后台线程进行，服务照常启动，健康检查立即可用
+    低优先级     按速率限制解析，线程调低调度优先级（Linux），前台有请求正在处理时先让出
+    进度         CacheWarmer.stats()、解析服务的 GET /warmup、warmup_progress / warmup_finished 事件
+                 和 video_warmup_urls_total 指标
+
+解析记录按缓存键累计每个链接的解析次数和最后解析时间，定期和进程退出时合并写回文件
+（多个工作进程写同一个文件时各自只写入增量），作为下一次启动的预热来源
+
+配置（环境变量）:
+    VIDEO_WARMUP_MANIFEST=warmup.txt        预热清单
+    VIDEO_PARSE_HISTORY=parse_history.json  解析记录文件；没有预热清单时从中取最常解析的链接
+    VIDEO_WARMUP_LIMIT=200                  最多预热的链接数
+    VIDEO_WARMUP_RATE=2                     每秒最多解析的链接数
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, Iterable
+
+import events
+from enhanced_parser import EnhancedVIPParser
+from metrics import REGISTRY
+from prefetch import RateLimiter
+
+WARMUP_URLS = REGISTRY.counter('video_warmup_urls_total', '启动预热处理的链接数', ('result',))
+
+_log = events.get_logger('warmup')
+
+# 解析记录最多保留的链接数，超出时去掉解析次数最少的
+MAX_HISTORY = 10000
+# 前台繁忙时每个链接最多让出的时间（秒），之后照常预热，避免持续有请求时永远不预热
+MAX_YIELD = 2.0
+
+
+def load_manifest(path: str) -> List[str]:
+    """读取预热清单：JSON数组，或每行一个链接（# 开头为注释）"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return [str(url).strip() for url in json.loads(text) if str(url).strip()]
+    return [line.strip() for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith('#')]
+
+
+class ParseHistory:
+    """持久化的解析记录：缓存键 -> 链接、解析次数、最后解析时间"""
+
+    def __init__(self, path: str, flush_interval: float = 30):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def record(self, key: str, url: str):
+        """记录一次成功的解析（只写内存，由后台线程定期写回文件）"""
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = {'url': url, 'count': 1, 'last': time.time()}
+            else:
+                entry['url'] = url
+                entry['count'] += 1
+                entry['last'] = time.time()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically,
+                                                 name='parse-history', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """读取文件中的记录，文件不存在或已损坏时返回空记录"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def top(self, limit: int) -> List[str]:
+        """最常解析的链接（次数相同时最近解析的在前）"""
+        entries = self.load()
+        with self._lock:
+            pending = {key: dict(entry) for key, entry in self._pending.items()}
+        _merge(entries, pending)
+        ranked = sorted(entries.values(), key=lambda entry: (-entry['count'], -entry['last']))
+        return [entry['url'] for entry in ranked[:limit]]
+
+    def flush(self):
+        """把内存中的增量合并写回文件"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with _file_lock(self.path):
+            entries = self.load()
+            _merge(entries, pending)
+            if len(entries) > MAX_HISTORY:
+                ranked = sorted(entries.items(), key=lambda item: (-item[1]['count'], -item[1]['last']))
+                entries = dict(ranked[:MAX_HISTORY])
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                _log.warning('history_flush_failed', path=self.path, error=str(e))
+
+
+def _merge(entries: Dict[str, Dict[str, Any]], pending: Dict[str, Dict[str, Any]]):
+    for key, delta in pending.items():
+        entry = entries.get(key)
+        if entry is None:
+            entries[key] = delta
+        else:
+            entry['count'] = entry.get('count', 0) + delta['count']
+            if delta['last'] >= entry.get('last', 0):
+                entry['url'] = delta['url']
+                entry['last'] = delta['last']
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """多个工作进程合并写同一个记录文件时的互斥（没有 fcntl 的系统上不加锁）"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+class CacheWarmer:
+    """在后台按速率限制依次解析链接，把结果写入解析器的缓存"""
+
+    def __init__(self, parser_factory: Callable[[], EnhancedVIPParser] = EnhancedVIPParser,
+                 rate: float = 2.0, busy: Optional[Callable[[], bool]] = None,
+                 select: Optional[Callable[[str], bool]] = None):
+        self.parser_factory = parser_factory
+        self.limiter = RateLimiter(rate, burst=1)
+        # 前台是否繁忙（如解析服务有正在处理的请求），繁忙时先让出
+        self.busy = busy
+        # 只预热它接受的链接（如按一致性哈希分发时只预热归属本进程的链接），其余计为 skipped
+        self.select = select
+        self._thread = None
+        self._stats = {
+            'total': 0,
+            'done': 0,
+            'fetched': 0,
+            'already_cached': 0,
+            'skipped': 0,
+            'failed': 0,
+            'started': None,
+            'finished': None
+        }
+
+    def start(self, urls: Iterable[str]) -> threading.Thread:
+        """开始后台预热，立即返回"""
+        urls = list(urls)
+        self._stats['total'] = len(urls)
+        self._stats['started'] = time.time()
+        self._thread = threading.Thread(target=self._run, args=(urls,), name='cache-warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stats(self) -> Dict[str, Any]:
+        """预热进度"""
+        stats = dict(self._stats)
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待预热结束（测试和基准测试用），超时返回False"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.stats()['running']
+
+    def _run(self, urls: List[str]):
+        _lower_priority()
+        parser = self.parser_factory()
+        seen = set()
+        step = max(1, len(urls) // 10)
+        for url in urls:
+            try:
+                result = self._warm(parser, url, seen)
+            except Exception:
+                result = 'failed'
+            self._stats[result] += 1
+            self._stats['done'] += 1
+            WARMUP_URLS.labels(result).inc()
+            if self._stats['done'] % step == 0:
+                _log.info('warmup_progress', done=self._stats['done'], total=self._stats['total'])
+        self._stats['finished'] = time.time()
+        _log.info('warmup_finished', elapsed_s=round(self._stats['finished'] - self._stats['started'], 2),
+                  **{key: self._stats[key] for key in ('total', 'fetched', 'already_cached', 'skipped', 'failed')})
+
+    def _warm(self, parser: EnhancedVIPParser, url: str, seen: set) -> str:
+        key = parser.get_cache_key(url)
+        if key is None or key in seen or (self.select is not None and not self.select(url)):
+            return 'skipped'
+        seen.add(key)
+        if parser.cache.contains(key):
+            return 'already_cached'
+
+        self.limiter.acquire()
+        if self.busy is not None:
+            deadline = time.monotonic() + MAX_YIELD
+            while self.busy() and time.monotonic() < deadline:
+                time.sleep(0.05)
+        # 请求之间其他线程可能已经解析过
+        if parser.cache.contains(key):
+            return 'already_cached'
+        result = parser.parse_video(url)
+        return 'fetched' if result.get('success') else 'failed'
+
+
+def _lower_priority():
+    """调低当前线程的调度优先级（Linux上nice值按线程生效，其他系统忽略）"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> Optional[ParseHistory]:
+    """设置了 VIDEO_PARSE_HISTORY 时返回进程内共享的解析记录，否则返回None"""
+    global _history
+    path = os.environ.get('VIDEO_PARSE_HISTORY')
+    if not path:
+        return None
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = ParseHistory(path)
+    return _history
+
+
+def flush_history():
+    """把解析记录写回文件（用 os._exit 退出的进程需要在退出前调用，正常退出时由 atexit 调用）"""
+    if _history is not None:
+        try:
+            _history.flush()
+        except OSError as e:
+            _log.warning('history_flush_failed', path=_history.path, error=str(e))
+
+
+def record_parse(parser: EnhancedVIPParser, url: str, result: Dict[str, Any]):
+    """解析成功后调用，写入解析记录（未设置 VIDEO_PARSE_HISTORY 时不做任何事）"""
+    history = get_history()
+    if history is None or not result.get('success'):
+        return
+    key = parser.get_cache_key(url)
+    history.record(':'.join(key) if key else url, url)
+
+
+def warmup_urls(manifest: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+    """预热的链接：优先使用预热清单，否则取解析记录中最常解析的链接"""
+    manifest = manifest or os.environ.get('VIDEO_WARMUP_MANIFEST')
+    limit = limit if limit is not None else int(os.environ.get('VIDEO_WARMUP_LIMIT', '200'))
+    if manifest:
+        return load_manifest(manifest)[:limit]
+    history = get_history()
+    return history.top(limit) if history is not None else []
+
+
+def start_warmup(parser_factory: Callable[[], EnhancedVIPParser] = EnhancedVIPParser,
+                 manifest: Optional[str] = None, rate: Optional[float] = None,
+                 busy: Optional[Callable[[], bool]] = None,
+                 select: Optional[Callable[[str], bool]] = None) -> Optional[CacheWarmer]:
+    """按配置开始后台预热，没有可预热的链接时返回None；清单读取失败只记录事件，不影响启动"""
+    try:
+        urls = warmup_urls(manifest)
+    except (OSError, ValueError) as e:
+        _log.warning('warmup_manifest_failed', path=manifest or os.environ.get('VIDEO_WARMUP_MANIFEST'),
+                     error=str(e))
+        return None
+    if not urls:
+        return None
+    rate = rate if rate is not None else float(os.environ.get('VIDEO_WARMUP_RATE', '2'))
+    warmer = CacheWarmer(parser_factory, rate=rate, busy=busy, select=select)
+    warmer.start(urls)
+    return warmer
@@ -6,128 +6,124 @@
 专门处理 v.youku.com/video?vid= 格式的链接
 """
 
-import requests
-import re
-import json
-import base64
-from urllib.parse import urlparse, parse_qs, unquote
+import platforms
+from http_client import fetch
 from typing import Optional, Dict, Any
+import events
+from profiling import profiled
+from timings import timed_parse, timed_stage
+
+_log = events.get_logger('youku')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Referer': 'https://www.youku.com/',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+# 更新的第三方解析接口
+PARSE_APIS = (
+    'https://jx.xymp4.cc/?url={}',  # 优酷首选 - 用户验证可用
+    'https://www.8090g.cn/?url={}',  # 稳定解析 - 0.72s响应
+    'https://jx.m3u8.tv/jiexi/?url={}',  # 高清解析 - 1.32s响应
+    'https://www.yemu.xyz/?url={}',  # 全网VIP - 1.54s响应
+    'https://jx.xyflv.cc/?url={}',  # 极速播放 - 1.61s响应
+    'https://api.jiexi.la/?url={}',  # 蓝光解析 - 2.20s响应
+    'https://jx.aidouer.net/?url={}',  # 万能解析 - 6.04s响应
+    'https://jx.xmflv.com/?url={}',  # 备用解析
+    'https://jx.618g.com/?url={}'  # 通用解析
+)
 
 class YoukuFixer:
-    """优酷解析修复器"""
+    """优酷解析修复器，链接和页面的提取规则在平台配置中"""
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Referer': 'https://www.youku.com/',
-            'DNT': '1',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # 更新的第三方解析接口
-        self.parse_apis = [
-            'https://jx.xymp4.cc/?url={}',  # 优酷首选 - 用户验证可用
-            'https://www.8090g.cn/?url={}',  # 稳定解析 - 0.72s响应
-            'https://jx.m3u8.tv/jiexi/?url={}',  # 高清解析 - 1.32s响应
-            'https://www.yemu.xyz/?url={}',  # 全网VIP - 1.54s响应
-            'https://jx.xyflv.cc/?url={}',  # 极速播放 - 1.61s响应
-            'https://api.jiexi.la/?url={}',  # 蓝光解析 - 2.20s响应
-            'https://jx.aidouer.net/?url={}',  # 万能解析 - 6.04s响应
-            'https://jx.xmflv.com/?url={}',  # 备用解析
-            'https://jx.618g.com/?url={}'  # 通用解析
-        ]
+    headers = HEADERS
+    parse_apis = PARSE_APIS
     
+    def _fetch(self, url: str):
+        """供平台插件的抓取计划使用"""
+        return fetch(url, headers=self.headers, timeout=10)
+    
+    @timed_stage('detect')
     def extract_youku_vid(self, url: str) -> Optional[str]:
         """提取优酷视频ID - 支持多种格式"""
         try:
-            # 解析URL
-            parsed = urlparse(url)
-            
-            # 方法1: 从URL参数中提取vid
-            if 'vid' in parsed.query:
-                params = parse_qs(parsed.query)
-                if 'vid' in params and params['vid']:
-                    vid = params['vid'][0]
-                    print(f"从URL参数提取到vid: {vid}")
-                    return vid
-            
-            # 方法2: 从路径中提取 /id_xxx.html 格式
-            path_match = re.search(r'/id_([^.]+)\.html', url)
-            if path_match:
-                vid = path_match.group(1)
-                print(f"从路径提取到vid: {vid}")
+            # 方法1/2: 从URL参数或 /id_xxx.html 路径中提取
+            vid = platforms.url_fields('youku.com', url).get('vid')
+            if vid:
+                if _log.debug_enabled:
+                    _log.debug('vid_extracted', source='url', vid=vid)
                 return vid
             
             # 方法3: 从页面内容中提取
             try:
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = self._fetch(url)
                 if response.status_code == 200:
-                    html = response.text
-                    
-                    # 多种正则表达式模式
-                    patterns = [
-                        r'videoId["\']?\s*:\s*["\']([^"\']+)["\']',
-                        r'vid["\']?\s*:\s*["\']([^"\']+)["\']',
-                        r'"vid"\s*:\s*"([^"]+)"',
-                        r'data-vid="([^"]+)"',
-                        r'showid[=:]([^&\s]+)'
-                    ]
-                    
-                    for pattern in patterns:
-                        match = re.search(pattern, html)
-                        if match:
-                            vid = match.group(1)
-                            print(f"从页面内容提取到vid: {vid}")
-                            return vid
+                    vid = platforms.extract_page('youku.com', response).get('vid')
+                    if vid:
+                        if _log.debug_enabled:
+                            _log.debug('vid_extracted', source='page', vid=vid)
+                        return vid
+                elif _log.debug_enabled:
+                    _log.debug('page_fetch_status', status=response.status_code)
             except Exception as e:
-                print(f"获取页面内容失败: {e}")
+                _log.warning('page_fetch_failed', url=url, error=str(e))
             
             return None
             
         except Exception as e:
-            print(f"提取视频ID失败: {e}")
+            _log.warning('vid_extract_failed', url=url, error=str(e))
             return None
     
+    @profiled
+    @timed_parse
     def parse_youku_video(self, url: str) -> Dict[str, Any]:
-        """解析优酷视频"""
+        """解析优酷视频，timings=True 时附带分阶段耗时，profile=True 时剖析本次解析"""
         try:
-            print(f"开始解析优酷视频: {url}")
-            
-            # 提取视频ID
-            vid = self.extract_youku_vid(url)
-            if not vid:
+            with events.scope(url=url):
+                if _log.debug_enabled:
+                    _log.debug('parse_started')
+                
+                # 视频ID和标题一次页面请求同时提取
+                # 页面请求出错时仍按链接中的视频ID和默认标题返回
+                info = platforms.run_plan('youku.com', url, self._fetch, required_steps=False)
+                vid = info['vid']
+                if not vid:
+                    _log.info('parse_failed', reason='no_vid')
+                    return {
+                        'success': False,
+                        'error': '无法提取视频ID，请检查链接格式'
+                    }
+                
+                events.annotate(cid=f'youku:{vid}')
+                title = info['title']
+                
+                # 生成解析链接
+                parse_urls = []
+                for i, api_template in enumerate(self.parse_apis, 1):
+                    parse_url = api_template.format(url)
+                    parse_urls.append({
+                        'name': f'解析线路{i}',
+                        'url': parse_url
+                    })
+                
+                if _log.debug_enabled:
+                    _log.debug('parse_finished', title=title, routes=len(parse_urls))
+                
                 return {
-                    'success': False,
-                    'error': '无法提取视频ID，请检查链接格式'
+                    'success': True,
+                    'title': title,
+                    'vid': vid,
+                    'original_url': url,
+                    'parse_urls': parse_urls,
+                    'best_parse_url': parse_urls[0]['url'] if parse_urls else None
                 }
             
-            print(f"成功提取视频ID: {vid}")
-            
-            # 尝试获取视频标题
-            title = self.get_video_title(url)
-            
-            # 生成解析链接
-            parse_urls = []
-            for i, api_template in enumerate(self.parse_apis, 1):
-                parse_url = api_template.format(url)
-                parse_urls.append({
-                    'name': f'解析线路{i}',
-                    'url': parse_url
-                })
-            
-            return {
-                'success': True,
-                'title': title,
-                'vid': vid,
-                'original_url': url,
-                'parse_urls': parse_urls,
-                'best_parse_url': parse_urls[0]['url'] if parse_urls else None
-            }
-            
         except Exception as e:
             return {
                 'success': False,
@@ -137,37 +133,21 @@ class YoukuFixer:
     def get_video_title(self, url: str) -> str:
         """获取视频标题"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._fetch(url)
             if response.status_code == 200:
-                html = response.text
-                
-                # 提取标题
-                title_match = re.search(r'<title>(.*?)</title>', html)
-                if title_match:
-                    title = title_match.group(1).replace(' - 优酷视频', '').strip()
+                title = platforms.extract_page('youku.com', response).get('title')
+                if title is not None:
                     return title
                 
-                # 备用标题提取方法
-                title_patterns = [
-                    r'"title"\s*:\s*"([^"]+)"',
-                    r'data-title="([^"]+)"',
-                    r'<h1[^>]*>([^<]+)</h1>'
-                ]
-                
-                for pattern in title_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        return match.group(1).strip()
-                        
         except Exception as e:
-            print(f"获取标题失败: {e}")
+            _log.warning('title_fetch_failed', url=url, error=str(e))
         
         return "优酷视频"
     
     def test_parse_api(self, api_url: str) -> Dict[str, Any]:
         """测试解析接口可用性"""
         try:
-            response = requests.get(api_url, headers=self.headers, timeout=15)
+            response = fetch(api_url, headers=self.headers, timeout=15)
             
             if response.status_code == 200:
                 content = response.text.lower()
@@ -235,4 +215,5 @@ def test_youku_link():
         print(f"❌ 解析失败: {result['error']}")
 
 if __name__ == "__main__":
+    events.configure(level='DEBUG')
     test_youku_link() 
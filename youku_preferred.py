@@ -6,89 +6,67 @@
 使用 jx.xymp4.cc 作为首选解析接口
 """
 
-import requests
-import time
-from urllib.parse import urlparse, parse_qs, quote
-from typing import Dict, Any, Optional
+import platforms
+from http_client import fetch
+from urllib.parse import quote
+from typing import Dict, Any
+from profiling import profiled
+from timings import timed_parse
+from youku_fix import HEADERS
+
+# 首选解析器排序（用户验证可用的放在最前面）
+PREFERRED_APIS = (
+    {
+        'name': '🥇 优酷首选',
+        'url': 'https://jx.xymp4.cc/?url={}',
+        'priority': 1,
+        'note': '用户验证可用'
+    },
+    {
+        'name': '🥈 稳定解析',
+        'url': 'https://www.8090g.cn/?url={}',
+        'priority': 2,
+        'note': '响应时间0.72秒'
+    },
+    {
+        'name': '🥉 高清解析',
+        'url': 'https://jx.m3u8.tv/jiexi/?url={}',
+        'priority': 3,
+        'note': '响应时间1.32秒'
+    },
+    {
+        'name': '🏅 全网VIP',
+        'url': 'https://www.yemu.xyz/?url={}',
+        'priority': 4,
+        'note': '响应时间1.54秒'
+    },
+    {
+        'name': '⚡ 极速播放',
+        'url': 'https://jx.xyflv.cc/?url={}',
+        'priority': 5,
+        'note': '响应时间1.61秒'
+    }
+)
 
 class YoukuPreferredParser:
-    """优酷首选解析器"""
+    """优酷首选解析器，链接和页面的提取规则在平台配置中"""
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Referer': 'https://www.youku.com/',
-            'DNT': '1',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # 首选解析器排序（用户验证可用的放在最前面）
-        self.preferred_apis = [
-            {
-                'name': '🥇 优酷首选',
-                'url': 'https://jx.xymp4.cc/?url={}',
-                'priority': 1,
-                'note': '用户验证可用'
-            },
-            {
-                'name': '🥈 稳定解析',
-                'url': 'https://www.8090g.cn/?url={}',
-                'priority': 2,
-                'note': '响应时间0.72秒'
-            },
-            {
-                'name': '🥉 高清解析',
-                'url': 'https://jx.m3u8.tv/jiexi/?url={}',
-                'priority': 3,
-                'note': '响应时间1.32秒'
-            },
-            {
-                'name': '🏅 全网VIP',
-                'url': 'https://www.yemu.xyz/?url={}',
-                'priority': 4,
-                'note': '响应时间1.54秒'
-            },
-            {
-                'name': '⚡ 极速播放',
-                'url': 'https://jx.xyflv.cc/?url={}',
-                'priority': 5,
-                'note': '响应时间1.61秒'
-            }
-        ]
+    headers = HEADERS
+    preferred_apis = PREFERRED_APIS
+    
+    def _fetch(self, url: str):
+        """供平台插件的抓取计划使用"""
+        return fetch(url, headers=self.headers, timeout=10)
     
     def extract_youku_info(self, url: str) -> Dict[str, Any]:
         """提取优酷视频信息"""
         try:
-            parsed = urlparse(url)
-            vid = ''
-            title = '优酷视频'
-            
-            # 从URL参数提取vid
-            if 'vid' in parsed.query:
-                params = parse_qs(parsed.query)
-                if 'vid' in params and params['vid']:
-                    vid = params['vid'][0]
-            
-            # 获取视频标题
-            try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                if response.status_code == 200:
-                    html = response.text
-                    import re
-                    title_match = re.search(r'<title>(.*?)</title>', html)
-                    if title_match:
-                        title = title_match.group(1).replace(' - 优酷视频', '').strip()
-            except:
-                pass
-            
+            # 页面请求出错时仍按链接中的视频ID和默认标题返回
+            info = platforms.run_plan('youku.com', url, self._fetch, required_steps=False)
             return {
                 'success': True,
-                'vid': vid,
-                'title': title,
+                'vid': info['vid'],
+                'title': info['title'],
                 'original_url': url
             }
             
@@ -119,8 +97,10 @@ class YoukuPreferredParser:
         
         return parse_urls
     
+    @profiled
+    @timed_parse
     def parse_youku_video(self, url: str) -> Dict[str, Any]:
-        """解析优酷视频（使用首选解析器）"""
+        """解析优酷视频（使用首选解析器），timings=True 时附带分阶段耗时，profile=True 时剖析本次解析"""
         try:
             # 提取视频信息
             info = self.extract_youku_info(url)